@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# Optional import - pyarrow enables Feather sidecars
+try:
+    from pyarrow import feather
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+def file_fingerprint(file_path):
+    """Return the path, size and modification time identifying a file's contents."""
+    stat = os.stat(file_path)
+    return {
+        'path': os.path.abspath(file_path),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime
+    }
+
+
+class DialectCache:
+    """Persistent cache of sniffed CSV dialects keyed by file fingerprint."""
+
+    def __init__(self, config_dir: Path, cache_file: str = "dialects.json", max_entries: int = 500):
+        self.cache_file = Path(config_dir) / cache_file
+        self.max_entries = max_entries
+        self.entries = self.load_entries()
+        self._lock = threading.Lock()  # files may be parsed in parallel
+
+    def load_entries(self) -> dict:
+        """Loads cached dialects from file."""
+        try:
+            with open(self.cache_file, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            print("Error: Invalid JSON in dialect cache. Starting with an empty cache.")
+            return {}
+
+    def save_entries(self):
+        """Saves cached dialects to file, keeping only the most recent entries."""
+        try:
+            # Another window may have stored dialects in the meantime
+            entries = self.load_entries()
+            entries.update(self.entries)
+            if len(entries) > self.max_entries:
+                newest = sorted(entries.items(), key=lambda item: item[1].get('stored', 0))
+                entries = dict(newest[-self.max_entries:])
+            with open(self.cache_file, "w") as f:
+                json.dump(entries, f, indent=4)
+            self.entries = entries
+        except Exception as e:
+            print(f"Error saving dialect cache: {e}")
+
+    def lookup(self, file_path):
+        """Return the cached dialect of an unchanged file, or None."""
+        fingerprint = file_fingerprint(file_path)
+        entry = self.entries.get(fingerprint['path'])
+        if entry is None:
+            return None
+        if entry['size'] != fingerprint['size'] or entry['mtime'] != fingerprint['mtime']:
+            return None
+        return entry['dialect']
+
+    def store(self, file_path, dialect, dtypes=None):
+        """Remember the dialect (and optionally the column dtypes) of a file."""
+        fingerprint = file_fingerprint(file_path)
+        dialect = dict(dialect)
+        with self._lock:
+            if dtypes is not None:
+                dialect['dtypes'] = dtypes
+            elif 'dtypes' not in dialect:
+                previous = self.lookup(file_path)
+                if previous and 'dtypes' in previous:
+                    dialect['dtypes'] = previous['dtypes']
+            self.entries[fingerprint['path']] = {
+                'size': fingerprint['size'],
+                'mtime': fingerprint['mtime'],
+                'stored': time.time(),
+                'dialect': dialect
+            }
+            self.save_entries()
+
+
+def quick_hash(file_path, block_size=1024 * 1024):
+    """Hash the size and the first, middle and last block of a file.
+    
+    Reading three blocks keeps the check cheap even for multi-gigabyte
+    catalogs while still catching edits that keep size and mtime intact.
+    """
+    size = os.path.getsize(file_path)
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(file_path, 'rb') as f:
+        for offset in (0, max(0, size // 2 - block_size // 2), max(0, size - block_size)):
+            f.seek(offset)
+            digest.update(f.read(block_size))
+    return digest.hexdigest()
+
+
+class SidecarCache:
+    """Columnar copies of loaded catalogs that can be reopened without parsing.
+    
+    Sidecars are written as uncompressed Feather files when pyarrow is
+    installed and as a directory of .npy files otherwise. Both formats are
+    memory-mapped on load; object columns of the .npy bundle are pickled
+    and therefore read into memory.
+    """
+
+    def __init__(self, config_dir: Path, cache_dir: str = "sidecars", max_entries: int = 10):
+        self.cache_dir = Path(config_dir) / cache_dir
+        self.cache_dir.mkdir(exist_ok=True)
+        self.max_entries = max_entries
+
+    def _base_path(self, file_path):
+        key = hashlib.blake2b(os.path.abspath(file_path).encode(), digest_size=8).hexdigest()
+        return self.cache_dir / key
+
+    def _read_manifest(self, file_path):
+        try:
+            with open(self._base_path(file_path).with_suffix(".json"), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def load(self, file_path):
+        """Return the cached DataFrame of an unchanged file, or None."""
+        manifest = self._read_manifest(file_path)
+        if manifest is None:
+            return None
+        fingerprint = file_fingerprint(file_path)
+        if (manifest['size'] != fingerprint['size'] or manifest['mtime'] != fingerprint['mtime']
+                or manifest['hash'] != quick_hash(file_path)):
+            return None
+
+        base_path = self._base_path(file_path)
+        try:
+            if manifest['format'] == 'feather':
+                table = feather.read_table(base_path.with_suffix(".feather"), memory_map=True)
+                return table.to_pandas()
+            return self._load_npy(base_path.with_suffix(".npy.d"), manifest)
+        except Exception as e:
+            print(f"Error reading sidecar for {file_path}: {e}")
+            return None
+
+    def store(self, file_path, data):
+        """Write a sidecar for a freshly parsed file."""
+        base_path = self._base_path(file_path)
+        manifest = file_fingerprint(file_path)
+        manifest['hash'] = quick_hash(file_path)
+        manifest['columns'] = [str(column) for column in data.columns]
+        manifest['dtypes'] = [str(dtype) for dtype in data.dtypes]
+        try:
+            data = data.reset_index(drop=True)
+            if HAS_PYARROW:
+                manifest['format'] = 'feather'
+                temp_path = base_path.with_suffix(".feather.tmp")
+                data.to_feather(temp_path, compression='uncompressed')
+                os.replace(temp_path, base_path.with_suffix(".feather"))
+            else:
+                manifest['format'] = 'npy'
+                self._store_npy(base_path.with_suffix(".npy.d"), data)
+            # The manifest is written last so an interrupted write is never trusted
+            with open(base_path.with_suffix(".json"), "w") as f:
+                json.dump(manifest, f, indent=4)
+            self._evict()
+        except Exception as e:
+            print(f"Error writing sidecar for {file_path}: {e}")
+
+    def _store_npy(self, directory, data):
+        directory.mkdir(exist_ok=True)
+        for i in range(data.shape[1]):
+            values = data.iloc[:, i]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # Categoricals are stored as their codes plus the categories
+                np.save(directory / f"{i}.categories.npy", values.cat.categories.to_numpy(dtype=object),
+                        allow_pickle=True)
+                values = values.cat.codes
+            values = values.to_numpy()
+            np.save(directory / f"{i}.npy", values, allow_pickle=values.dtype == object)
+
+    def _load_npy(self, directory, manifest):
+        columns = {}
+        for i, (column, dtype) in enumerate(zip(manifest['columns'], manifest['dtypes'])):
+            path = directory / f"{i}.npy"
+            if dtype == 'category':
+                categories = np.load(directory / f"{i}.categories.npy", allow_pickle=True)
+                columns[column] = pd.Categorical.from_codes(np.load(path), categories=categories)
+                continue
+            try:
+                values = np.load(path, mmap_mode='r')
+            except ValueError:
+                # Object arrays are pickled and cannot be memory-mapped
+                values = np.load(path, allow_pickle=True)
+            columns[column] = pd.Series(values, copy=False).astype(dtype, copy=False)
+        return pd.DataFrame(columns)
+
+    def _evict(self):
+        """Remove the oldest sidecars beyond max_entries."""
+        manifests = sorted(self.cache_dir.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        for manifest_path in manifests[:-self.max_entries]:
+            stem = manifest_path.with_suffix("")
+            for path in (stem.with_suffix(".feather"), manifest_path):
+                if path.exists():
+                    path.unlink()
+            shutil.rmtree(stem.with_suffix(".npy.d"), ignore_errors=True)
+
+
+class StatisticsCache:
+    """Column statistics of catalogs, keyed by file fingerprint.
+    
+    Every file gets its own small JSON file, so storing the statistics of
+    one catalog never rewrites those of the others.
+    """
+
+    def __init__(self, config_dir: Path, cache_dir: str = "statistics", max_entries: int = 100):
+        self.cache_dir = Path(config_dir) / cache_dir
+        self.cache_dir.mkdir(exist_ok=True)
+        self.max_entries = max_entries
+
+    def _path(self, file_path):
+        key = hashlib.blake2b(os.path.abspath(file_path).encode(), digest_size=8).hexdigest()
+        return self.cache_dir / f"{key}.json"
+
+    def load(self, file_path):
+        """Return the cached statistics of an unchanged file as a dict per column, or None."""
+        try:
+            with open(self._path(file_path), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            fingerprint = file_fingerprint(file_path)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if entry['size'] != fingerprint['size'] or entry['mtime'] != fingerprint['mtime']:
+            return None
+        return entry['columns']
+
+    def store(self, file_path, columns):
+        """Remember the statistics of a file."""
+        entry = file_fingerprint(file_path)
+        entry['columns'] = columns
+        try:
+            temp_path = self._path(file_path).with_suffix(".tmp")
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(temp_path, self._path(file_path))
+            # Remove the oldest entries beyond max_entries
+            paths = sorted(self.cache_dir.glob("*.json"), key=lambda path: path.stat().st_mtime)
+            for path in paths[:-self.max_entries]:
+                path.unlink()
+        except Exception as e:
+            print(f"Error writing statistics for {file_path}: {e}")
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem,
+                            QHeaderView, QAbstractItemView, QPlainTextEdit)
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtGui import QFont
+
+# Names of the column kinds in the profile panel
+KIND_NAMES = {'number': "Zahl", 'date': "Datum", 'category': "Kategorie", 'text': "Text"}
+
+
+def sorted_distinct(values):
+    """Number of distinct values of an array, counted on a sorted copy."""
+    if not len(values):
+        return 0
+    ordered = np.sort(values)
+    return int(np.count_nonzero(ordered[1:] != ordered[:-1]) + 1)
+
+
+def top_values(labels, counts, top):
+    """The most frequent values with their counts, most frequent first; none if all are unique."""
+    if not len(counts) or counts.max() <= 1:
+        return []
+    if len(counts) > top:
+        chosen = np.argpartition(counts, -top)[-top:]
+    else:
+        chosen = np.arange(len(counts))
+    chosen = chosen[np.argsort(-counts[chosen], kind='stable')]
+    return [[str(labels[i]), int(counts[i])] for i in chosen if counts[i] > 0]
+
+
+class ColumnStatistics:
+    """Cardinality, missing values, range and histogram of one column.
+
+    Numbers and dates get an equal-width histogram of their values, dates
+    as seconds since 1970; categories and text the counts of their most
+    frequent values.
+    """
+
+    def __init__(self, column, kind, rows, nulls, distinct, minimum=None, maximum=None,
+                 edges=None, counts=None, top=None):
+        self.column = column
+        self.kind = kind
+        self.rows = rows
+        self.nulls = nulls
+        self.distinct = distinct
+        self.minimum = minimum
+        self.maximum = maximum
+        self.edges = edges or []
+        self.counts = counts or []
+        self.top = top or []
+
+    @classmethod
+    def from_values(cls, column, values, nulls, bins=20, top=10):
+        """Compute the statistics of a column with whole-array operations."""
+        rows = len(values)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes = values.cat.codes.to_numpy()
+            counts = np.bincount(codes[codes >= 0], minlength=len(values.cat.categories))
+            return cls(column, 'category', rows, nulls, int(np.count_nonzero(counts)),
+                       top=top_values(values.cat.categories, counts, top))
+        if values.dtype.kind in 'iuf' or (values.dtype.kind == 'M' and isinstance(values.dtype, np.dtype)):
+            if values.dtype.kind == 'M':
+                kind = 'date'
+                array = values.to_numpy()
+                numbers = array[~np.isnat(array)].astype('datetime64[s]').view(np.int64).astype(np.float64)
+            else:
+                kind = 'number'
+                numbers = values.to_numpy(dtype=np.float64, na_value=np.nan)
+                numbers = numbers[~np.isnan(numbers)]
+            # Infinite values count as distinct but stay out of the range and the histogram
+            finite = numbers[np.isfinite(numbers)]
+            if not len(finite):
+                return cls(column, kind, rows, nulls, sorted_distinct(numbers))
+            minimum, maximum = float(finite.min()), float(finite.max())
+            counts, edges = np.histogram(finite, bins=bins, range=(minimum, maximum))
+            return cls(column, kind, rows, nulls, sorted_distinct(numbers), minimum, maximum,
+                       edges.tolist(), counts.tolist())
+        codes, uniques = pd.factorize(values)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        return cls(column, 'text', rows, nulls, len(uniques), top=top_values(uniques, counts, top))
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, entry):
+        return cls(**entry)
+
+    def range_share(self, low=None, high=None):
+        """Estimated share of rows between low and high, from the histogram.
+
+        Values are assumed to be spread evenly within each bin; bounds of
+        date columns are given in seconds since 1970.
+        """
+        if not self.rows or not self.counts:
+            return 0.0
+        low = self.minimum if low is None else low
+        high = self.maximum if high is None else high
+        if high < low:
+            return 0.0
+        edges = np.asarray(self.edges)
+        counts = np.asarray(self.counts, dtype=np.float64)
+        widths = np.diff(edges)
+        if not widths.any():
+            inside = counts.sum() if low <= self.minimum <= high else 0.0
+            return inside / self.rows
+        # Share of every bin covered by [low, high]; bins of zero width count if their value is inside
+        covered = np.clip(np.minimum(edges[1:], high) - np.maximum(edges[:-1], low), 0, None)
+        fraction = np.where(widths > 0, covered / np.where(widths > 0, widths, 1),
+                            (edges[:-1] >= low) & (edges[:-1] <= high))
+        # A single value still matches some rows
+        return max(float((fraction * counts).sum()) / self.rows, 1.0 / max(self.distinct, 1) / 10)
+
+    def value_share(self, value):
+        """Estimated share of rows equal to value, from the most frequent values."""
+        if not self.rows:
+            return 0.0
+        for label, count in self.top:
+            if label == value:
+                return count / self.rows
+        listed = sum(count for _, count in self.top)
+        others = max(self.distinct - len(self.top), 1)
+        return max(self.rows - self.nulls - listed, 0) / others / self.rows
+
+    def format_value(self, value, rounded=False):
+        """A value of the column as text; rounded for the bounds of the histogram."""
+        if value is None:
+            return ""
+        if self.kind == 'date':
+            timestamp = pd.Timestamp(int(value), unit='s')
+            whole_day = rounded or timestamp == timestamp.normalize()
+            return timestamp.strftime("%Y-%m-%d" if whole_day else "%Y-%m-%d %H:%M:%S")
+        return f"{value:.4g}" if rounded else f"{value:g}"
+
+    def describe(self, width=30):
+        """Plain text profile with the histogram as bars."""
+        lines = [f"{self.column} ({KIND_NAMES.get(self.kind, self.kind)})",
+                 f"Zeilen: {self.rows}, leer: {self.nulls}, verschieden: {self.distinct}"]
+        if self.minimum is not None:
+            lines.append(f"Minimum: {self.format_value(self.minimum)}, Maximum: {self.format_value(self.maximum)}")
+        if self.counts:
+            largest = max(max(self.counts), 1)
+            for start, count in zip(self.edges, self.counts):
+                lines.append(f"{self.format_value(start, rounded=True):>10} "
+                             f"{'█' * round(count / largest * width):<{width}} {count}")
+        if self.top:
+            largest = max(self.top[0][1], 1)
+            label_width = min(max(len(label) for label, _ in self.top), 30)
+            lines.append("Häufigste Werte:")
+            for label, count in self.top:
+                lines.append(f"{label[:30]:>{label_width}} {'█' * round(count / largest * width):<{width}} {count}")
+        return "\n".join(lines)
+
+
+def compute_statistics(data, bins=20, top=10, is_cancelled=None):
+    """Return ColumnStatistics for every column by name, or None if cancelled.
+
+    Missing values of all columns are counted in one pass over the frame;
+    every column is then summarized with whole-array operations.
+    """
+    nulls = data.isna().sum()
+    statistics = {}
+    for i, column in enumerate(data.columns):
+        if is_cancelled is not None and is_cancelled():
+            return None
+        statistics[str(column)] = ColumnStatistics.from_values(str(column), data.iloc[:, i],
+                                                               int(nulls.iloc[i]), bins, top)
+    return statistics
+
+
+def statistics_to_dict(statistics):
+    return {column: entry.to_dict() for column, entry in statistics.items()}
+
+
+def statistics_from_dict(entries):
+    return {column: ColumnStatistics.from_dict(entry) for column, entry in entries.items()}
+
+
+class StatisticsThread(QThread):
+    """Thread to compute the column statistics of a catalog, or load them from the cache.
+    
+    Storing computed statistics is left to the receiver, which knows
+    whether the catalog was edited in the meantime.
+    """
+    statistics_ready = pyqtSignal(object)  # dict of ColumnStatistics
+
+    def __init__(self, data, file_path=None, cache=None):
+        super().__init__()
+        self.data = data
+        self.file_path = file_path
+        self.cache = cache
+        self.from_cache = False
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        try:
+            columns = [str(column) for column in self.data.columns]
+            if self.file_path and self.cache is not None:
+                entries = self.cache.load(self.file_path)
+                if entries is not None and list(entries) == columns:
+                    self.from_cache = True
+                    self.statistics_ready.emit(statistics_from_dict(entries))
+                    return
+            statistics = compute_statistics(self.data, is_cancelled=self.is_cancelled)
+        except Exception as e:
+            print(f"Error computing column statistics: {e}")
+            # An empty result still tells the receiver that the computation is over
+            statistics = {}
+        if statistics is not None:
+            self.statistics_ready.emit(statistics)
+
+
+class ColumnProfileWidget(QWidget):
+    """Panel listing the statistics of every column, with the histogram of the selected one."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.columns = []
+        self.statistics = {}
+
+        layout = QVBoxLayout(self)
+        self.status_label = QLabel("Keine Daten geladen")
+        layout.addWidget(self.status_label)
+
+        self.table = QTableWidget(0, 6)
+        self.table.setHorizontalHeaderLabels(["Spalte", "Typ", "Leer", "Verschieden", "Minimum", "Maximum"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.currentCellChanged.connect(self.show_details)
+        layout.addWidget(self.table)
+
+        self.details = QPlainTextEdit()
+        self.details.setReadOnly(True)
+        self.details.setFont(QFont("Monospace"))
+        layout.addWidget(self.details)
+
+    def set_statistics(self, columns, statistics, computing=False):
+        """Show the statistics of the given columns; columns without statistics are marked."""
+        self.columns = [str(column) for column in columns]
+        self.statistics = statistics
+        if not self.columns:
+            self.status_label.setText("Keine Daten geladen")
+        elif computing:
+            self.status_label.setText("Statistiken werden berechnet ...")
+        else:
+            self.status_label.setText(f"{len(self.columns)} Spalten")
+
+        self.table.setRowCount(len(self.columns))
+        for row, column in enumerate(self.columns):
+            entry = statistics.get(column)
+            if entry is None:
+                cells = [column, "", "", "veraltet" if not computing else "", "", ""]
+            else:
+                cells = [column, KIND_NAMES.get(entry.kind, entry.kind), str(entry.nulls), str(entry.distinct),
+                         entry.format_value(entry.minimum), entry.format_value(entry.maximum)]
+            for i, text in enumerate(cells):
+                self.table.setItem(row, i, QTableWidgetItem(text))
+        self.show_details(self.table.currentRow())
+
+    def show_details(self, row, *args):
+        entry = self.statistics.get(self.columns[row]) if 0 <= row < len(self.columns) else None
+        self.details.setPlainText(entry.describe() if entry is not None else "")
@@ -2,13 +2,37 @@
 # -*- coding: utf-8 -*-
 
 import pandas as pd
+import multiprocessing
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, 
                             QLabel, QListWidget, QComboBox, QFileDialog, 
                             QGroupBox, QRadioButton, QProgressBar, QMessageBox,
                             QSplitter, QTableView, QCheckBox, QSpinBox,
                             QFormLayout, QDialogButtonBox)
-from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QThread, pyqtSignal
+
+# Import from parent directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import Config
+from catalog_cache import DialectCache, StatisticsCache
+from csv_loader import (HAS_PYARROW, column_dtypes, frame_from_worker, parse_csv_file,
+                        read_csv_kwargs, read_file_info)
+from dataframe_optimizer import optimize_dataframe
+from merge_engine import (UNION, INTERSECTION, UPDATE, LOAD, ALIGN, DEDUPE, WRITE, KeySketch, MergeCancelled,
+                          estimate_merged_rows, merge_frames)
+from merge_profile import MergeProfiler, format_plan
+from key_index import MasterKeyIndex, text_kwargs
+from streaming_merge import StreamingMerger
+
+# Progress bar labels of the merge stages
+STAGE_LABELS = {
+    LOAD: "Laden",
+    ALIGN: "Abgleichen",
+    DEDUPE: "Duplikate entfernen",
+    WRITE: "Schreiben"
+}
 
 class PandasPreviewModel(QAbstractTableModel):
     """Model for displaying pandas DataFrame preview in a QTableView."""
@@ -43,6 +67,151 @@ class PandasPreviewModel(QAbstractTableModel):
         return None
 
 
+class MergeThread(QThread):
+    """Thread to merge and write the files without freezing the UI."""
+    stage_changed = pyqtSignal(str)  # label of the running stage
+    progress_updated = pyqtSignal(int)  # progress within the running stage
+    merge_finished = pyqtSignal(bool, str)  # success, message
+    
+    def __init__(self, file_paths, file_info, file_dataframes, options, output_path, plan,
+                 dialect_cache=None, streaming=False, verify_duplicates=False, key_index_dir=None,
+                 chunk_rows=100000):
+        super().__init__()
+        self.file_paths = list(file_paths)
+        self.file_info = file_info
+        self.file_dataframes = dict(file_dataframes)  # Loaded files are added to this copy
+        self.options = options  # strategy, conflict and match_column
+        self.output_path = output_path
+        self.profiler = MergeProfiler(plan)
+        self.dialect_cache = dialect_cache
+        self.streaming = streaming
+        self.verify_duplicates = verify_duplicates
+        self.key_index_dir = key_index_dir  # Set to update the first file through its key index
+        self.chunk_rows = chunk_rows
+        self.merged_data = None
+        self.rows_written = 0
+        self._stage = None
+        self._cancelled = False
+        
+    def cancel(self):
+        """Request the merge to stop at the next chunk or stage."""
+        self._cancelled = True
+        
+    def is_cancelled(self):
+        return self._cancelled
+        
+    def report(self, stage, percent, rows=None):
+        """Forward progress to the dialog and stop here if the merge was cancelled."""
+        if self._cancelled:
+            raise MergeCancelled()
+        self.profiler.update(stage, rows)
+        if stage != self._stage:
+            self._stage = stage
+            self.stage_changed.emit(STAGE_LABELS[stage])
+        self.progress_updated.emit(percent)
+        
+    def run(self):
+        self.profiler.start()
+        try:
+            if self.key_index_dir is not None:
+                self.merge_indexed()
+            elif self.streaming:
+                # Rows are not kept in memory for a check, so collisions are made unlikely instead
+                merger = StreamingMerger(self.file_paths, dialect_cache=self.dialect_cache,
+                                         chunk_rows=self.chunk_rows, progress=self.report,
+                                         fingerprint_bits=128 if self.verify_duplicates else 64, **self.options)
+                self.rows_written = merger.merge(self.output_path)
+            else:
+                self.load_frames()
+                dfs = [self.file_dataframes[path] for path in self.file_paths]
+                self.merged_data = merge_frames(dfs, progress=self.report,
+                                                verify_duplicates=self.verify_duplicates, **self.options)
+                self.write_csv(self.merged_data)
+            self.profiler.finish("ok")
+            self.merge_finished.emit(True, f"Die Dateien wurden erfolgreich zusammengeführt ({self.rows_written} Zeilen) "
+                                           f"und unter {self.output_path} gespeichert.")
+            
+        except MergeCancelled:
+            self.profiler.finish("cancelled")
+            self.remove_output()
+            self.merge_finished.emit(False, "Zusammenführung abgebrochen")
+        except Exception as e:
+            self.profiler.finish(str(e))
+            self.remove_output()
+            self.merge_finished.emit(False, f"Fehler beim Zusammenführen: {str(e)}")
+            
+    def merge_indexed(self):
+        """Update the first file through its persistent key index, parsing only the delta files."""
+        master = self.file_paths[0]
+        index = MasterKeyIndex(self.key_index_dir, master, self.options['match_column'],
+                               self.file_info[master]['dialect'])
+        self.report(LOAD, 0, 0)
+        index.ensure(progress=self.report)
+        deltas = [pd.read_csv(path, engine='c', **text_kwargs(self.file_info[path]['dialect']))
+                  for path in self.file_paths[1:]]
+        self.report(LOAD, 100, sum(len(delta) for delta in deltas))
+        self.rows_written = index.upsert(deltas, self.options['conflict'], self.output_path, progress=self.report)
+        
+    def load_frames(self):
+        """Parse all files not loaded yet, in parallel across cores."""
+        pending = [path for path in self.file_paths if path not in self.file_dataframes]
+        rows = sum(len(self.file_dataframes[path]) for path in self.file_paths if path not in pending)
+        self.report(LOAD, 0, rows)
+        if not pending:
+            return
+            
+        # Worker processes only pay off when results come back as Arrow buffers;
+        # otherwise threads share the work, as the C parser releases the GIL
+        workers = min(len(pending), os.cpu_count() or 1)
+        if HAS_PYARROW and len(pending) > 1:
+            # Workers are spawned, as forking a process running Qt threads can deadlock the child
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {}
+            for path in pending:
+                dialect = self.file_info[path]['dialect']
+                futures[executor.submit(parse_csv_file, path, dialect)] = (path, dialect)
+                
+            for done, future in enumerate(as_completed(futures), 1):
+                path, dialect = futures[future]
+                try:
+                    df = frame_from_worker(future.result())
+                except Exception as e:
+                    raise ValueError(f"Die Datei {os.path.basename(path)} konnte nicht geladen werden: {str(e)}")
+                if self.dialect_cache is not None and 'dtypes' not in dialect:
+                    self.dialect_cache.store(path, dialect, column_dtypes(df))
+                df = optimize_dataframe(df, dates=False)
+                self.file_dataframes[path] = df
+                rows += len(df)
+                self.report(LOAD, done * 100 // len(pending), rows)
+        finally:
+            # Files still being parsed are abandoned when the merge was cancelled
+            executor.shutdown(wait=not self._cancelled, cancel_futures=True)
+            
+    def write_csv(self, data):
+        """Write the merged data chunk by chunk, so cancelling does not wait for the whole file."""
+        self.report(WRITE, 0, len(data))
+        self.rows_written = 0
+        with open(self.output_path, 'w', newline='', encoding='utf-8') as f:
+            data.iloc[:0].to_csv(f, index=False)
+            for start in range(0, len(data), self.chunk_rows):
+                data.iloc[start:start + self.chunk_rows].to_csv(f, index=False, header=False)
+                self.rows_written = min(start + self.chunk_rows, len(data))
+                self.report(WRITE, self.rows_written * 100 // len(data), self.rows_written)
+                
+    def remove_output(self):
+        """Delete a partially written output file."""
+        if self._stage != WRITE or self.key_index_dir is not None:
+            return  # Nothing written yet, or written to a temporary file that is gone already
+        try:
+            if os.path.exists(self.output_path):
+                os.remove(self.output_path)
+        except OSError as e:
+            print(f"Error removing incomplete merge output: {e}")
+
+
 class CSVMergerDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -50,8 +219,16 @@ class CSVMergerDialog(QDialog):
         self.setMinimumSize(800, 600)
         
         self.files_to_merge = []  # List to store file paths
+        self.file_info = {}  # Dict to store columns and row estimates per file
         self.file_dataframes = {}  # Dict to store loaded DataFrames
+        self.key_sketches = {}  # Dict to store key sketches per file and key columns
         self.merged_data = None   # To store the merged result
+        self.merge_thread = None
+        self.merge_profiler = None  # Report of the last merge
+        config = Config()
+        self.dialect_cache = DialectCache(config.config_dir)
+        self.statistics_cache = StatisticsCache(config.config_dir)
+        self.key_index_dir = config.config_dir / "key_indexes"
         
         self.create_ui()
         
@@ -109,6 +286,28 @@ class CSVMergerDialog(QDialog):
         
         self.match_columns_checkbox.toggled.connect(self.match_column_combo.setEnabled)
         
+        self.streaming_checkbox = QCheckBox("Speicherschonend zusammenführen (für sehr große Dateien)")
+        self.streaming_checkbox.setToolTip(
+            "Liest die Dateien abschnittsweise und gleicht Einträge über eine temporäre "
+            "Datenbank auf der Festplatte ab. Alle Werte werden als Text behandelt."
+        )
+        options_layout.addRow("", self.streaming_checkbox)
+        
+        self.verify_duplicates_checkbox = QCheckBox("Duplikate exakt prüfen (langsamer)")
+        self.verify_duplicates_checkbox.setToolTip(
+            "Ganze Zeilen werden über Prüfsummen verglichen. Mit dieser Option werden "
+            "Zeilen mit gleicher Prüfsumme zusätzlich Wert für Wert verglichen."
+        )
+        options_layout.addRow("", self.verify_duplicates_checkbox)
+        
+        self.key_index_checkbox = QCheckBox("Schlüsselindex der Stammdatei verwenden (nur Aktualisieren)")
+        self.key_index_checkbox.setToolTip(
+            "Die erste Datei gilt als Stammdatei. Ein dauerhaft gespeicherter Index ihrer Abgleichspalte "
+            "sorgt dafür, dass nur die betroffenen Zeilen neu geschrieben und neue Zeilen angehängt werden. "
+            "Alle Werte werden als Text behandelt."
+        )
+        options_layout.addRow("", self.key_index_checkbox)
+        
         main_layout.addWidget(options_group)
         
         # Preview section
@@ -119,6 +318,9 @@ class CSVMergerDialog(QDialog):
         self.preview_button = QPushButton("Vorschau generieren")
         self.preview_button.clicked.connect(self.generate_preview)
         preview_buttons_layout.addWidget(self.preview_button)
+        self.plan_button = QPushButton("Plan anzeigen")
+        self.plan_button.clicked.connect(self.show_plan)
+        preview_buttons_layout.addWidget(self.plan_button)
         preview_buttons_layout.addStretch()
         
         self.preview_info_label = QLabel("Keine Vorschau verfügbar")
@@ -139,12 +341,17 @@ class CSVMergerDialog(QDialog):
         main_layout.addLayout(progress_layout)
         
         button_layout = QHBoxLayout()
+        self.report_button = QPushButton("Leistungsbericht")
+        self.report_button.clicked.connect(lambda: self.show_merge_report())
+        self.report_button.setEnabled(False)
+        button_layout.addWidget(self.report_button)
+        
         self.merge_button = QPushButton("Zusammenführen")
         self.merge_button.clicked.connect(self.merge_files)
         self.merge_button.setEnabled(False)
         
         self.cancel_button = QPushButton("Abbrechen")
-        self.cancel_button.clicked.connect(self.reject)
+        self.cancel_button.clicked.connect(self.reject)  # Also cancels a running merge
         
         button_layout.addStretch()
         button_layout.addWidget(self.merge_button)
@@ -153,7 +360,7 @@ class CSVMergerDialog(QDialog):
         main_layout.addLayout(button_layout)
         
     def add_files(self):
-        """Add files to the merge list."""
+        """Add files to the merge list, reading only their headers."""
         file_paths, _ = QFileDialog.getOpenFileNames(
             self, "CSV-Dateien auswählen", "", "CSV-Dateien (*.csv);;Alle Dateien (*)"
         )
@@ -162,21 +369,25 @@ class CSVMergerDialog(QDialog):
             for path in file_paths:
                 # Only add if not already in list
                 if path not in self.files_to_merge:
-                    self.files_to_merge.append(path)
-                    self.file_list.addItem(os.path.basename(path))
-                    
-                    # Load the file data
+                    # The full parse is deferred until a preview or merge needs the data
                     try:
-                        df = pd.read_csv(path, sep=None, engine='python')
-                        self.file_dataframes[path] = df
-                        
-                        # Update match column combo box with column names from first file
-                        if len(self.files_to_merge) == 1:
-                            self.match_column_combo.clear()
-                            self.match_column_combo.addItems(df.columns.tolist())
+                        info = read_file_info(path, self.dialect_cache)
                     except Exception as e:
                         QMessageBox.warning(self, "Fehler beim Laden", 
                                            f"Die Datei {os.path.basename(path)} konnte nicht geladen werden: {str(e)}")
+                        continue
+                        
+                    self.files_to_merge.append(path)
+                    # Statistics cached when the file was opened in the reader give exact counts
+                    info['statistics'] = self.statistics_cache.load(path)
+                    self.file_info[path] = info
+                    self.file_list.addItem(f"{os.path.basename(path)} (ca. {info['estimated_rows']} Zeilen)")
+                    self.merged_data = None
+                    
+                    # Update match column combo box with column names from first file
+                    if len(self.files_to_merge) == 1:
+                        self.match_column_combo.clear()
+                        self.match_column_combo.addItems(info['columns'])
             
             # Enable merge button if we have at least two files
             self.merge_button.setEnabled(len(self.files_to_merge) >= 2)
@@ -187,9 +398,11 @@ class CSVMergerDialog(QDialog):
         if current_row >= 0:
             file_path = self.files_to_merge[current_row]
             self.files_to_merge.pop(current_row)
+            self.file_info.pop(file_path, None)
             if file_path in self.file_dataframes:
                 del self.file_dataframes[file_path]
             self.file_list.takeItem(current_row)
+            self.merged_data = None
             
             # Disable merge button if we have less than two files
             self.merge_button.setEnabled(len(self.files_to_merge) >= 2)
@@ -198,143 +411,261 @@ class CSVMergerDialog(QDialog):
         """Handle file selection in the list."""
         self.remove_file_button.setEnabled(row >= 0)
         
-    def generate_preview(self):
-        """Generate a preview of the merged data."""
+    def generate_preview(self, max_rows=100, sample_rows=1000):
+        """Generate a preview of the merged data without performing the merge.
+        
+        Only the first rows of every file are merged for display. The size of
+        the full result is estimated from key sketches, which need a single
+        pass over the key columns of each file and are cached afterwards.
+        """
         if len(self.files_to_merge) < 2:
             QMessageBox.warning(self, "Warnung", "Mindestens zwei Dateien müssen zum Zusammenführen ausgewählt werden.")
             return
             
         try:
-            # Store the merge result temporarily
-            self.merged_data = self.perform_merge()
+            strategy_index = self.merge_strategy_combo.currentIndex()
+            use_match_column = self.match_columns_checkbox.isChecked()
+            match_column = self.match_column_combo.currentText() if use_match_column else None
+            
+            samples = [self.sample_rows(path, sample_rows) for path in self.files_to_merge]
+            preview = merge_frames(samples, strategy_index, self.conflict_resolution_combo.currentIndex(),
+                                   match_column)
             
             # Show preview in table
-            preview_model = PandasPreviewModel(self.merged_data, max_rows=100)
+            preview_model = PandasPreviewModel(preview, max_rows=max_rows)
             self.preview_table.setModel(preview_model)
             
-            # Update preview info
-            rows, cols = self.merged_data.shape
-            self.preview_info_label.setText(f"Vorschau: {rows} Zeilen, {cols} Spalten")
+            # Update preview info with estimates for the full merge
+            rows = self.merge_plan(compute_sketches=True)['estimated_rows']
+            self.preview_info_label.setText(f"Vorschau: ca. {rows} Zeilen, {preview.shape[1]} Spalten")
             
         except Exception as e:
             QMessageBox.critical(self, "Fehler bei der Vorschau", f"Fehler beim Erstellen der Vorschau: {str(e)}")
             self.preview_info_label.setText("Fehler bei der Vorschau")
             
-    def merge_files(self):
-        """Perform the merge operation and return the result."""
+    def merge_plan(self, compute_sketches=False):
+        """Describe the merge the current options would run.
+        
+        Key counts and the size of the result are estimated from key
+        sketches. Without compute_sketches only sketches cached by an
+        earlier preview are used, so no file has to be read.
+        """
+        strategy_index = self.merge_strategy_combo.currentIndex()
+        use_match_column = self.match_columns_checkbox.isChecked()
+        match_column = self.match_column_combo.currentText() if use_match_column else None
+        key_columns = self.key_columns(strategy_index, match_column)
+        
+        inputs = []
+        sketches = []
+        for path in self.files_to_merge:
+            sketch = None
+            if key_columns and (compute_sketches or (path, tuple(key_columns)) in self.key_sketches):
+                sketch = self.key_sketch(path, key_columns)
+            elif strategy_index == INTERSECTION and not key_columns:
+                sketch = KeySketch()  # Nothing in common, so nothing will match
+            sketches.append(sketch)
+            distinct_keys = None
+            if sketch is not None and key_columns:
+                distinct_keys = sketch.estimate()
+            elif key_columns:
+                distinct_keys = self.cached_distinct(path, key_columns)
+            inputs.append({
+                'path': path,
+                'name': os.path.basename(path),
+                'estimated_rows': self.estimated_rows(path),
+                'columns': self.file_info[path]['columns'],
+                'distinct_keys': distinct_keys
+            })
+            
+        row_counts = [entry['estimated_rows'] for entry in inputs]
+        estimated_rows = None
+        if not key_columns and strategy_index != INTERSECTION:
+            estimated_rows = estimate_merged_rows(None, row_counts, strategy_index)
+        elif all(sketch is not None for sketch in sketches):
+            estimated_rows = estimate_merged_rows(sketches, row_counts, strategy_index)
+            
+        return {
+            'strategy': self.merge_strategy_combo.currentText(),
+            'conflict': self.conflict_resolution_combo.currentText(),
+            'match_column': match_column,
+            'key_columns': key_columns,
+            'whole_row_keys': strategy_index == UNION and not key_columns,
+            'streaming': self.streaming_checkbox.isChecked(),
+            'key_index': self.use_key_index(),
+            'inputs': inputs,
+            'estimated_rows': estimated_rows
+        }
+        
+    def use_key_index(self):
+        """Whether the merge can update the first file through its key index.
+        
+        The index only applies to updates by match column whose delta files
+        bring no columns the master lacks, as those would change every row.
+        """
+        if not self.key_index_checkbox.isChecked() or self.merge_strategy_combo.currentIndex() != UPDATE:
+            return False
+        if not self.match_columns_checkbox.isChecked() or not self.files_to_merge:
+            return False
+        master_columns = self.file_info[self.files_to_merge[0]]['columns']
+        if self.match_column_combo.currentText() not in master_columns:
+            return False
+        return all(set(self.file_info[path]['columns']) <= set(master_columns) and
+                   self.match_column_combo.currentText() in self.file_info[path]['columns']
+                   for path in self.files_to_merge[1:])
+        
+    def show_plan(self):
+        """Show what the merge would do before running it."""
         if len(self.files_to_merge) < 2:
             QMessageBox.warning(self, "Warnung", "Mindestens zwei Dateien müssen zum Zusammenführen ausgewählt werden.")
             return
-            
         try:
-            # Show progress
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setValue(0)
-            
-            # If we didn't generate a preview, do the merge now
-            if self.merged_data is None:
-                self.merged_data = self.perform_merge()
-            
-            self.progress_bar.setValue(50)
-            
-            # Ask user for save location
-            save_path, _ = QFileDialog.getSaveFileName(
-                self, "Zusammengeführte CSV-Datei speichern", "", "CSV-Dateien (*.csv);;Alle Dateien (*)"
-            )
+            QMessageBox.information(self, "Zusammenführungsplan", format_plan(self.merge_plan(compute_sketches=True)))
+        except Exception as e:
+            QMessageBox.critical(self, "Fehler beim Planen", f"Der Plan konnte nicht erstellt werden: {str(e)}")
             
-            if save_path:
-                self.merged_data.to_csv(save_path, index=False)
-                self.progress_bar.setValue(100)
-                
-                QMessageBox.information(
-                    self, 
-                    "Zusammenführung abgeschlossen", 
-                    f"Die Dateien wurden erfolgreich zusammengeführt und unter {save_path} gespeichert."
-                )
-                self.accept()  # Close dialog with success
+    def sample_rows(self, path, rows):
+        """Return the first rows of a file, reading only those if it is not loaded."""
+        if path in self.file_dataframes:
+            return self.file_dataframes[path].head(rows)
+        return pd.read_csv(path, nrows=rows, engine='c', **read_csv_kwargs(self.file_info[path]['dialect']))
+        
+    def estimated_rows(self, path):
+        """Return the exact row count of a loaded or profiled file, otherwise the estimate."""
+        if path in self.file_dataframes:
+            return len(self.file_dataframes[path])
+        statistics = self.file_info[path].get('statistics')
+        if statistics:
+            return next(iter(statistics.values()))['rows']
+        return self.file_info[path]['estimated_rows']
+        
+    def cached_distinct(self, path, key_columns):
+        """Exact number of distinct keys from cached column statistics, for a single key column."""
+        statistics = self.file_info[path].get('statistics')
+        if not statistics or len(key_columns) != 1 or key_columns[0] not in statistics:
+            return None
+        entry = statistics[key_columns[0]]
+        # Missing keys count as one more key, as in the sketches
+        return entry['distinct'] + (1 if entry['nulls'] else 0)
+        
+    def key_columns(self, strategy_index, match_column):
+        """Columns identifying rows for the size estimate, or None to count every row.
+        
+        A union without match column compares whole rows; sketching those
+        would mean parsing every file completely, so it is estimated by the
+        number of input rows instead.
+        """
+        columns = [self.file_info[path]['columns'] for path in self.files_to_merge]
+        if match_column is not None and all(match_column in file_columns for file_columns in columns):
+            return [match_column]
+        if strategy_index == INTERSECTION:  # Intersection joins on all common columns
+            return [column for column in columns[0] if all(column in other for other in columns[1:])]
+        return None
+        
+    def key_sketch(self, path, key_columns, chunk_rows=500000):
+        """Return a cached sketch of the keys of a file, reading only the key columns."""
+        cache_key = (path, tuple(key_columns))
+        if cache_key not in self.key_sketches:
+            sketch = KeySketch()
+            if path in self.file_dataframes:
+                sketch.add(self.file_dataframes[path][key_columns])
             else:
-                self.progress_bar.setVisible(False)
-                
-        except Exception as e:
-            self.progress_bar.setVisible(False)
-            QMessageBox.critical(self, "Fehler bei der Zusammenführung", f"Fehler beim Zusammenführen: {str(e)}")
+                kwargs = read_csv_kwargs(self.file_info[path]['dialect'], usecols=key_columns)
+                for chunk in pd.read_csv(path, chunksize=chunk_rows, engine='c', **kwargs):
+                    sketch.add(chunk[key_columns])
+            self.key_sketches[cache_key] = sketch
+        return self.key_sketches[cache_key]
             
-    def perform_merge(self):
-        """Perform the actual merge operation based on selected options."""
-        if not self.file_dataframes:
-            raise ValueError("Keine Dateien geladen")
+    def merge_files(self):
+        """Ask for the output file and merge in a background thread."""
+        if len(self.files_to_merge) < 2:
+            QMessageBox.warning(self, "Warnung", "Mindestens zwei Dateien müssen zum Zusammenführen ausgewählt werden.")
+            return
+            
+        # Ask user for save location
+        save_path, _ = QFileDialog.getSaveFileName(
+            self, "Zusammengeführte CSV-Datei speichern", "", "CSV-Dateien (*.csv);;Alle Dateien (*)"
+        )
+        if not save_path:
+            return
             
-        # Get options
-        strategy_index = self.merge_strategy_combo.currentIndex()
-        conflict_index = self.conflict_resolution_combo.currentIndex()
         use_match_column = self.match_columns_checkbox.isChecked()
-        match_column = self.match_column_combo.currentText() if use_match_column else None
+        options = {
+            'strategy': self.merge_strategy_combo.currentIndex(),
+            'conflict': self.conflict_resolution_combo.currentIndex(),
+            'match_column': self.match_column_combo.currentText() if use_match_column else None
+        }
+        self.merge_thread = MergeThread(self.files_to_merge, self.file_info, self.file_dataframes, options,
+                                        save_path, self.merge_plan(), dialect_cache=self.dialect_cache,
+                                        streaming=self.streaming_checkbox.isChecked(),
+                                        verify_duplicates=self.verify_duplicates_checkbox.isChecked(),
+                                        key_index_dir=self.key_index_dir if self.use_key_index() else None)
+        self.merge_thread.stage_changed.connect(self.on_merge_stage)
+        self.merge_thread.progress_updated.connect(self.progress_bar.setValue)
+        self.merge_thread.merge_finished.connect(self.on_merge_finished)
+        
+        self.set_controls_enabled(False)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setValue(0)
+        self.merge_thread.start()
         
-        # Get dataframes list
-        dfs = list(self.file_dataframes.values())
+    def on_merge_stage(self, label):
+        """Show the running merge stage on the progress bar."""
+        self.progress_bar.setFormat(f"{label}: %p%")
+        self.progress_bar.setValue(0)
         
-        # Perform merge based on strategy
-        if strategy_index == 0:  # Append
-            result = pd.concat(dfs, ignore_index=True)
+    def on_merge_finished(self, success, message):
+        """Handle the end of a background merge."""
+        thread = self.merge_thread
+        self.merge_thread = None
+        self.set_controls_enabled(True)
+        self.progress_bar.setVisible(False)
+        self.progress_bar.setFormat("%p%")
+        
+        # Keep parsed files for another attempt
+        self.file_dataframes.update(thread.file_dataframes)
+        self.merge_profiler = thread.profiler
+        self.report_button.setEnabled(True)
+        
+        if success:
+            self.merged_data = thread.merged_data
+            self.show_merge_report("Zusammenführung abgeschlossen", message)
+            self.accept()  # Close dialog with success
+        elif not thread.is_cancelled():
+            QMessageBox.critical(self, "Fehler bei der Zusammenführung", message)
             
-            # Handle duplicates based on conflict resolution
-            if use_match_column and match_column in result.columns:
-                if conflict_index == 0:  # Keep first occurrence
-                    result = result.drop_duplicates(subset=match_column, keep='first')
-                elif conflict_index == 1:  # Keep last occurrence
-                    result = result.drop_duplicates(subset=match_column, keep='last')
-                elif conflict_index == 2:  # Keep longer value
-                    # This is more complex, group by match column and pick the longest value for each column
-                    pass  # Would need custom implementation
-                elif conflict_index == 3:  # Merge values
-                    # This is more complex, would need to join values
-                    pass  # Would need custom implementation
-                    
-        elif strategy_index == 1:  # Union
-            # Concatenate all and remove duplicates
-            result = pd.concat(dfs, ignore_index=True)
-            if use_match_column and match_column in result.columns:
-                result = result.drop_duplicates(subset=match_column)
-            else:
-                result = result.drop_duplicates()
+    def show_merge_report(self, title="Leistungsbericht", message="Bericht der letzten Zusammenführung."):
+        """Show the profile of the last merge, with the option to save it as JSON."""
+        box = QMessageBox(QMessageBox.Information, title, message, QMessageBox.Ok, self)
+        box.setDetailedText(self.merge_profiler.format_report(STAGE_LABELS))
+        save_button = box.addButton("Bericht speichern...", QMessageBox.ActionRole)
+        box.exec_()
+        if box.clickedButton() is save_button:
+            self.export_merge_report()
+            
+    def export_merge_report(self):
+        """Save the profile of the last merge as JSON."""
+        save_path, _ = QFileDialog.getSaveFileName(
+            self, "Leistungsbericht speichern", "merge_report.json", "JSON-Dateien (*.json);;Alle Dateien (*)"
+        )
+        if save_path:
+            try:
+                self.merge_profiler.save_json(save_path)
+            except Exception as e:
+                QMessageBox.critical(self, "Fehler beim Speichern", f"Der Bericht konnte nicht gespeichert werden: {str(e)}")
                 
-        elif strategy_index == 2:  # Intersection
-            # This is more complex, find common records
-            # Start with the first dataframe
-            result = dfs[0]
-            for df in dfs[1:]:
-                if use_match_column and match_column in result.columns and match_column in df.columns:
-                    # Inner merge on the match column
-                    result = pd.merge(result, df, on=match_column, how='inner')
-                else:
-                    # Without a match column, we can use all columns, but this might not be what user expects
-                    common_cols = list(set(result.columns) & set(df.columns))
-                    if common_cols:
-                        result = pd.merge(result, df, on=common_cols, how='inner')
-                    else:
-                        # No common columns to merge on
-                        result = pd.DataFrame()  # Empty result
-                        break
-                        
-        elif strategy_index == 3:  # Update
-            # Start with the first dataframe
-            result = dfs[0].copy()
-            for df in dfs[1:]:
-                if use_match_column and match_column in result.columns and match_column in df.columns:
-                    # Update existing records and add new ones
-                    common_rows = result[match_column].isin(df[match_column])
-                    # For common rows, update values
-                    if conflict_index == 0:  # Keep first occurrence (don't update)
-                        pass  # Nothing to do
-                    elif conflict_index == 1:  # Keep last occurrence (update)
-                        for idx, row in df[df[match_column].isin(result[match_column])].iterrows():
-                            match_value = row[match_column]
-                            result.loc[result[match_column] == match_value, df.columns] = row
-                    # Add new rows
-                    new_rows = df[~df[match_column].isin(result[match_column])]
-                    result = pd.concat([result, new_rows], ignore_index=True)
-                else:
-                    # Without a match column, just append
-                    result = pd.concat([result, df], ignore_index=True)
-        
-        return result
\ No newline at end of file
+    def set_controls_enabled(self, enabled):
+        """Lock the file list and options while a merge is running."""
+        for widget in (self.add_file_button, self.remove_file_button, self.file_list,
+                       self.merge_strategy_combo, self.conflict_resolution_combo,
+                       self.match_columns_checkbox, self.streaming_checkbox, self.verify_duplicates_checkbox,
+                       self.key_index_checkbox,
+                       self.preview_button, self.plan_button, self.report_button, self.merge_button):
+            widget.setEnabled(enabled)
+        self.match_column_combo.setEnabled(enabled and self.match_columns_checkbox.isChecked())
+        
+    def reject(self):
+        """Cancel a running merge first; close the dialog otherwise."""
+        if self.merge_thread is not None:
+            self.merge_thread.cancel()
+            return
+        super().reject()
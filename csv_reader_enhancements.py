@@ -3,8 +3,12 @@
 
 from csv_merger import CSVMergerDialog
 from portfolio_exporter import PortfolioExportDialog
+from advanced_search import AdvancedSearchDialog, CustomProxyModel, index_report, substring_index, SUBSTRING_OPERATORS
+from search_index import is_text_column
+from query_language import CompiledQuery, QueryError
 from keyboard_navigation import enhance_keyboard_navigation
-from PyQt5.QtWidgets import QAction, QMessageBox
+from PyQt5.QtWidgets import QAction, QMessageBox, QApplication
+from PyQt5.QtCore import Qt
 
 
 def integrate_enhancements(window):
@@ -13,6 +17,7 @@ def integrate_enhancements(window):
     # Add functions to main window
     add_csv_merger_functionality(window)
     add_portfolio_export_functionality(window)
+    add_advanced_search_functionality(window)
     
     # Apply keyboard navigation enhancements
     enhance_keyboard_navigation(window)
@@ -79,4 +84,109 @@ def add_portfolio_export_functionality(window):
     export_action = QAction("Portfolio &exportieren...", window)
     export_action.setShortcut("Ctrl+E")
     export_action.triggered.connect(window.show_portfolio_exporter)
-    window.tools_menu.addAction(export_action)
\ No newline at end of file
+    window.tools_menu.addAction(export_action)
+
+
+def add_advanced_search_functionality(window):
+    """Add advanced search functionality to the main window."""
+    
+    # Add method to window
+    def show_advanced_search():
+        if window.current_data is None or window.current_data.empty:
+            QMessageBox.warning(
+                window,
+                "Keine Daten",
+                "Es sind keine Daten zum Durchsuchen vorhanden. "
+                "Bitte öffnen Sie zuerst eine Datei und warten Sie, bis sie vollständig geladen ist."
+            )
+            return
+            
+        if window.advanced_search_dialog is None:
+            window.advanced_search_dialog = AdvancedSearchDialog(window)
+            window.advanced_search_dialog.index_report_requested.connect(show_index_report)
+            window.advanced_search_dialog.query_plan_requested.connect(show_query_plan)
+        dialog = window.advanced_search_dialog
+        columns = [str(column) for column in window.current_data.columns]
+        if dialog.columns != columns:
+            dialog.set_columns(columns)
+        dialog.set_statistics(window.column_statistics)
+        if dialog.exec_() != AdvancedSearchDialog.Accepted:
+            return
+            
+        criteria = dialog.get_search_criteria()
+        if criteria['query']:
+            try:
+                CompiledQuery(criteria['query'], window.current_data)
+            except QueryError as e:
+                QMessageBox.warning(window, "Ungültige Abfrage", str(e))
+                return
+        ensure_substring_index(criteria)
+        proxy = window.filter_proxy()
+        proxy.set_filter_criteria(criteria)
+        window.statusBar.showMessage(
+            f"{proxy.rowCount()} von {window.table_model().rowCount()} Zeilen gefunden")
+    
+    def ensure_substring_index(criteria):
+        """Build the substring index the criteria ask for, once the word index is ready."""
+        column = criteria['column']
+        if (not criteria['use_substring_index'] or criteria['operator'] not in SUBSTRING_OPERATORS
+                or window.search_index is None or substring_index(criteria, window.search_index) is not None
+                or column not in window.current_data.columns or not is_text_column(window.current_data[column])):
+            return
+        window.statusBar.showMessage(f"Erstelle Teilstring-Index für {column} ...")
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            window.search_index.add_substring_index(window.current_data, column)
+        finally:
+            QApplication.restoreOverrideCursor()
+    
+    def show_index_report():
+        dialog = window.advanced_search_dialog
+        dialog.show_index_report(index_report(window.current_data, window.search_index,
+                                              dialog.get_search_criteria()))
+    
+    def show_query_plan():
+        """Run the query of the dialog and show the order in which its conditions were evaluated."""
+        dialog = window.advanced_search_dialog
+        criteria = dialog.get_search_criteria()
+        if not criteria['query']:
+            dialog.show_query_plan("Bitte geben Sie eine Abfrage ein.")
+            return
+        try:
+            # The same statistics as the proxy, so the plan shown is the plan that runs
+            query = CompiledQuery(criteria['query'], window.current_data, window.search_index,
+                                  criteria['case_sensitive'], statistics=window.column_statistics)
+        except QueryError as e:
+            dialog.show_query_plan(f"Ungültige Abfrage: {e}")
+            return
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            query.rows()
+        finally:
+            QApplication.restoreOverrideCursor()
+        dialog.show_query_plan(query.explain())
+    
+    def clear_advanced_search():
+        if isinstance(window.table_view.model(), CustomProxyModel):
+            proxy = window.table_view.model()
+            proxy.set_filter_criteria({})
+            if not proxy.is_filtered():
+                window.table_view.setModel(proxy.sourceModel())
+            window.statusBar.showMessage(f"Filter aufgehoben - {proxy.rowCount()} Zeilen")
+    
+    # Store reference for dialog
+    window.advanced_search_dialog = None
+    
+    # Add methods to window
+    window.show_advanced_search = show_advanced_search
+    window.clear_advanced_search = clear_advanced_search
+    
+    # Add menu items
+    search_action = QAction("&Erweiterte Suche...", window)
+    search_action.setShortcut("Ctrl+Shift+F")
+    search_action.triggered.connect(window.show_advanced_search)
+    window.tools_menu.addAction(search_action)
+    
+    clear_search_action = QAction("Suchfilter &aufheben", window)
+    clear_search_action.triggered.connect(window.clear_advanced_search)
+    window.tools_menu.addAction(clear_search_action)
@@ -1,18 +1,40 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import re
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                             QPushButton, QComboBox, QLineEdit, QGroupBox,
-                            QFormLayout, QCheckBox, QDateEdit, QDialogButtonBox)
-from PyQt5.QtCore import Qt, QSortFilterProxyModel, QDate, QRegExp
+                            QFormLayout, QCheckBox, QDateEdit, QDialogButtonBox, QPlainTextEdit)
+from PyQt5.QtCore import QAbstractProxyModel, QModelIndex, QDate, pyqtSignal
+from PyQt5.QtGui import QFont
+
+from dataframe_optimizer import find_date_columns
+from search_index import TOKEN_PATTERN, find_rows, is_text_column, tokenize
+from query_language import QUERY_HELP, query_mask
+
+# Operators offered by the dialog
+CONTAINS, STARTS_WITH, ENDS_WITH, EQUALS, NOT_EQUALS = (
+    "enthält", "beginnt mit", "endet mit", "ist gleich", "ist nicht gleich")
+# Looks up word beginnings in the search index
+WORDS = "enthält Wörter"
+# Operators a SubstringIndex answers, with its names for them
+SUBSTRING_OPERATORS = {CONTAINS: 'contains', ENDS_WITH: 'ends_with'}
 
 class AdvancedSearchDialog(QDialog):
+    index_report_requested = pyqtSignal()
+    query_plan_requested = pyqtSignal()
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Erweiterte Suche")
         self.setMinimumWidth(600)
         
         self.columns = []  # Will be populated with column names
+        self.statistics = {}  # ColumnStatistics by column name
         self.create_ui()
         
     def create_ui(self):
@@ -28,7 +50,7 @@ class AdvancedSearchDialog(QDialog):
         self.column_combo.addItems(self.columns)
         
         self.operator_combo = QComboBox()
-        self.operator_combo.addItems(["enthält", "beginnt mit", "endet mit", "ist gleich", "ist nicht gleich"])
+        self.operator_combo.addItems([CONTAINS, WORDS, STARTS_WITH, ENDS_WITH, EQUALS, NOT_EQUALS])
         
         self.search_value = QLineEdit()
         
@@ -42,12 +64,13 @@ class AdvancedSearchDialog(QDialog):
         criteria_layout.addLayout(text_search_layout)
         
         # Date range (if applicable)
-        date_group = QGroupBox("Datumsbereich")
-        date_group.setCheckable(True)
-        date_group.setChecked(False)
-        date_layout = QFormLayout(date_group)
+        self.date_group = QGroupBox("Datumsbereich")
+        self.date_group.setCheckable(True)
+        self.date_group.setChecked(False)
+        date_layout = QFormLayout(self.date_group)
         
         self.date_column = QComboBox()
+        self.date_column.currentTextChanged.connect(self.set_date_defaults)
         self.start_date = QDateEdit(QDate.currentDate().addMonths(-1))
         self.end_date = QDateEdit(QDate.currentDate())
         
@@ -55,7 +78,7 @@ class AdvancedSearchDialog(QDialog):
         date_layout.addRow("Von:", self.start_date)
         date_layout.addRow("Bis:", self.end_date)
         
-        criteria_layout.addWidget(date_group)
+        criteria_layout.addWidget(self.date_group)
         
         # Case sensitivity
         self.case_sensitive = QCheckBox("Groß-/Kleinschreibung beachten")
@@ -63,6 +86,46 @@ class AdvancedSearchDialog(QDialog):
         
         layout.addWidget(criteria_group)
         
+        # Query language, combined with the criteria above
+        query_group = QGroupBox("Abfrage")
+        query_layout = QVBoxLayout(query_group)
+        query_edit_layout = QHBoxLayout()
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText("z.B. location:album* AND year:1990..1999 AND NOT condition:\"Poor\"")
+        self.query_edit.setToolTip(QUERY_HELP)
+        query_edit_layout.addWidget(self.query_edit, 1)
+        self.explain_button = QPushButton("Erklären")
+        self.explain_button.clicked.connect(self.query_plan_requested)
+        query_edit_layout.addWidget(self.explain_button)
+        query_layout.addLayout(query_edit_layout)
+        
+        self.query_plan = QPlainTextEdit()
+        self.query_plan.setReadOnly(True)
+        self.query_plan.setFont(QFont("Monospace"))
+        self.query_plan.setPlaceholderText(QUERY_HELP)
+        self.query_plan.setMaximumHeight(160)
+        query_layout.addWidget(self.query_plan)
+        
+        layout.addWidget(query_group)
+        
+        # Optional substring index
+        index_group = QGroupBox("Suchindex")
+        index_layout = QVBoxLayout(index_group)
+        self.substring_index = QCheckBox("Teilstring-Index für \"enthält\" und \"endet mit\" verwenden "
+                                         "(braucht zusätzlichen Speicher)")
+        index_layout.addWidget(self.substring_index)
+        
+        report_layout = QHBoxLayout()
+        self.index_report = QLabel()
+        self.index_report.setWordWrap(True)
+        report_layout.addWidget(self.index_report, 1)
+        self.report_button = QPushButton("Indexbericht")
+        self.report_button.clicked.connect(self.index_report_requested)
+        report_layout.addWidget(self.report_button)
+        index_layout.addLayout(report_layout)
+        
+        layout.addWidget(index_group)
+        
         # Buttons
         button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         button_box.accepted.connect(self.accept)
@@ -79,34 +142,458 @@ class AdvancedSearchDialog(QDialog):
         self.column_combo.clear()
         self.column_combo.addItems(columns)
         
-        # Update date columns (assume columns with 'date' in the name)
+        # Update date columns (the loader parses the same columns as dates)
         self.date_column.clear()
-        date_columns = [col for col in columns if 'date' in col.lower() or 'datum' in col.lower()]
+        date_columns = find_date_columns(columns)
         self.date_column.addItems(date_columns if date_columns else columns)
         
+    def set_statistics(self, statistics):
+        """Use column statistics to preset the date range to the dates of the chosen column."""
+        self.statistics = statistics
+        self.set_date_defaults(self.date_column.currentText())
+        
+    def set_date_defaults(self, column):
+        entry = self.statistics.get(column)
+        if entry is None or entry.kind != 'date' or entry.minimum is None or self.date_group.isChecked():
+            return
+        for edit, value in ((self.start_date, entry.minimum), (self.end_date, entry.maximum)):
+            edit.setDate(QDate.fromString(entry.format_value(value, rounded=True), "yyyy-MM-dd"))
+        
+    def show_index_report(self, text):
+        self.index_report.setText(text)
+        
+    def show_query_plan(self, text):
+        self.query_plan.setPlainText(text)
+        
     def get_search_criteria(self):
         """Get the search criteria as a dict."""
         return {
             'column': self.column_combo.currentText(),
             'operator': self.operator_combo.currentText(),
             'value': self.search_value.text(),
+            'query': self.query_edit.text().strip(),
             'case_sensitive': self.case_sensitive.isChecked(),
+            'use_substring_index': self.substring_index.isChecked(),
             'use_date_range': self.date_group.isChecked(),
             'date_column': self.date_column.currentText(),
             'start_date': self.start_date.date().toString("yyyy-MM-dd"),
             'end_date': self.end_date.date().toString("yyyy-MM-dd")
         }
 
-class CustomProxyModel(QSortFilterProxyModel):
-    """Enhanced proxy model for advanced filtering."""
+
+
+def match_text(text, operator, value, case_sensitive):
+    """Evaluate a text condition on a Series of strings; missing values never match."""
+    if operator == NOT_EQUALS:
+        return ~match_text(text, EQUALS, value, case_sensitive)
+    if case_sensitive:
+        if operator == CONTAINS:
+            mask = text.str.contains(value, regex=False)
+        elif operator == STARTS_WITH:
+            mask = text.str.startswith(value)
+        elif operator == ENDS_WITH:
+            mask = text.str.endswith(value)
+        elif operator == EQUALS:
+            mask = text == value
+        else:
+            raise ValueError(f"Unbekannte Bedingung: {operator}")
+    else:
+        # Anchored patterns let the string kernels ignore case without lowering every value
+        if operator == CONTAINS:
+            mask = text.str.contains(value, case=False, regex=False)
+        elif operator == STARTS_WITH:
+            mask = text.str.contains("^" + re.escape(value), case=False)
+        elif operator == ENDS_WITH:
+            mask = text.str.contains(re.escape(value) + "$", case=False)
+        elif operator == EQUALS:
+            mask = text.str.lower() == value.lower()
+        else:
+            raise ValueError(f"Unbekannte Bedingung: {operator}")
+    return mask.to_numpy(dtype=bool, na_value=False)
+
+
+def column_mask(values, operator, value, case_sensitive):
+    """Evaluate a text condition on a column of any dtype.
+    
+    Categorical and non-text columns are matched on their distinct values
+    only, and the result is spread to the rows through the value codes.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    elif pd.api.types.is_string_dtype(values.dtype):
+        return match_text(values, operator, value, case_sensitive)
+    else:
+        codes, uniques = pd.factorize(values)
+    matches = match_text(pd.Series(uniques).astype(str), operator, value, case_sensitive)
+    # Code -1 marks a missing value, which only "ist nicht gleich" accepts
+    return np.append(matches, operator == NOT_EQUALS)[codes]
+
+
+def date_range_mask(values, start_date, end_date):
+    """Rows whose date lies between start_date and end_date, both inclusive."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        dates = pd.Series(pd.to_datetime(values.cat.categories, errors='coerce'))
+        inside = date_range_mask(dates, start_date, end_date)
+        return np.append(inside, False)[values.cat.codes.to_numpy()]
+    if values.dtype.kind != 'M':
+        values = pd.to_datetime(values, errors='coerce')
+    start = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+    return ((values >= start) & (values < end)).to_numpy(dtype=bool, na_value=False)
+
+
+def words_mask(values, column, value, case_sensitive, index=None):
+    """Rows in which every word of value starts a word of the column.
+    
+    The search index ignores case, so a case-sensitive search checks the
+    rows it found once more.
+    """
+    mask = np.zeros(len(values), dtype=bool)
+    rows = find_rows(values.to_frame(column), value, [column], index)
+    if case_sensitive:
+        words = TOKEN_PATTERN.findall(value)
+        found = [all(any(token.startswith(word) for token in TOKEN_PATTERN.findall(str(text))) for word in words)
+                 for text in values.iloc[rows]]
+        rows = rows[np.asarray(found, dtype=bool)]
+    mask[rows] = True
+    return mask
+
+
+def substring_index(criteria, index):
+    """Return the substring index that can answer the criteria, or None."""
+    if (index is None or not criteria.get('use_substring_index')
+            or criteria.get('operator') not in SUBSTRING_OPERATORS):
+        return None
+    return index.substrings.get(criteria.get('column'))
+
+
+def index_report(data, index, criteria):
+    """Compare the size of the substring index of the searched column with the time it saves."""
+    column = criteria.get('column')
+    if column not in data.columns or not is_text_column(data[column]):
+        return "Die gewählte Spalte enthält keinen Text."
+    if index is None:
+        return "Der Suchindex wird noch erstellt."
+    lines = []
+    column_size = data[column].memory_usage(deep=True)
+    if column in index.columns:
+        lines.append(f"Wortindex '{column}': {index.columns[column].size() / 1024 ** 2:.1f} MB "
+                     f"(Spalte: {column_size / 1024 ** 2:.1f} MB)")
+    substrings = index.substrings.get(column)
+    if substrings is None:
+        lines.append("Kein Teilstring-Index für diese Spalte; er wird bei der ersten Suche mit "
+                     "\"enthält\" oder \"endet mit\" erstellt, wenn die Option gewählt ist.")
+        return "\n".join(lines)
+    lines.append(f"Teilstring-Index '{column}': {substrings.size() / 1024 ** 2:.1f} MB, "
+                 f"{len(substrings.trigrams)} Trigramme, erstellt in {substrings.build_seconds:.1f} s")
+    if criteria.get('value') and criteria.get('operator') in SUBSTRING_OPERATORS:
+        started = time.perf_counter()
+        substrings.mask(SUBSTRING_OPERATORS[criteria['operator']], criteria['value'], criteria['case_sensitive'])
+        indexed = time.perf_counter() - started
+        started = time.perf_counter()
+        column_mask(data[column], criteria['operator'], criteria['value'], criteria['case_sensitive'])
+        scanned = time.perf_counter() - started
+        lines.append(f"\"{criteria['operator']} {criteria['value']}\": mit Index {indexed * 1000:.1f} ms, "
+                     f"ohne Index {scanned * 1000:.1f} ms")
+    return "\n".join(lines)
+
+
+def filter_mask(data, criteria, index=None, statistics=None):
+    """Evaluate the criteria of AdvancedSearchDialog on a DataFrame as one boolean mask."""
+    mask = np.ones(len(data), dtype=bool)
+    if criteria.get('value') and criteria.get('column') in data.columns:
+        substrings = substring_index(criteria, index)
+        if criteria['operator'] == WORDS:
+            mask &= words_mask(data[criteria['column']], criteria['column'], criteria['value'],
+                               criteria.get('case_sensitive', False), index)
+        elif substrings is not None and len(substrings.codes) == len(data):
+            mask &= substrings.mask(SUBSTRING_OPERATORS[criteria['operator']], criteria['value'],
+                                    criteria.get('case_sensitive', False))
+        else:
+            mask &= column_mask(data[criteria['column']], criteria['operator'], criteria['value'],
+                                criteria.get('case_sensitive', False))
+    if criteria.get('use_date_range') and criteria.get('date_column') in data.columns:
+        mask &= date_range_mask(data[criteria['date_column']], criteria['start_date'], criteria['end_date'])
+    if criteria.get('query'):
+        mask &= query_mask(data, criteria['query'], index, criteria.get('case_sensitive', False), statistics)
+    return mask
+
+
+def active_query(criteria, quick_search=""):
+    """Reduce criteria and quick search to the parts that filter, as a hashable key."""
+    text = None
+    if criteria.get('value'):
+        text = (criteria['column'], criteria['operator'], criteria['value'],
+                criteria.get('case_sensitive', False), criteria.get('use_substring_index', False))
+    dates = None
+    if criteria.get('use_date_range'):
+        dates = (criteria['date_column'], criteria['start_date'], criteria['end_date'])
+    query = (criteria['query'], criteria.get('case_sensitive', False)) if criteria.get('query') else None
+    return text, dates, query, quick_search.strip()
+
+
+def words_narrow(new_words, old_words):
+    """True if every old word is the beginning of a new word, so fewer rows can match."""
+    return all(any(new.startswith(old) for new in new_words) for old in old_words)
+
+
+def text_narrows(new, old):
+    """True if every value matching the new text condition matches the old one."""
+    if old is None:
+        return True
+    if new is None or new[:2] != old[:2] or new[3] != old[3]:
+        return False
+    operator, case_sensitive = new[1], new[3]
+    new_value, old_value = (new[2], old[2]) if case_sensitive else (new[2].lower(), old[2].lower())
+    if operator == CONTAINS:
+        return old_value in new_value
+    if operator == STARTS_WITH:
+        return new_value.startswith(old_value)
+    if operator == ENDS_WITH:
+        return new_value.endswith(old_value)
+    if operator == WORDS:
+        return words_narrow(TOKEN_PATTERN.findall(new_value), TOKEN_PATTERN.findall(old_value))
+    return new_value == old_value
+
+
+def query_narrows(new, old):
+    """True if the rows of the new query are a subset of the rows of the old one."""
+    new_text, new_dates, new_query, new_quick = new
+    old_text, old_dates, old_query, old_quick = old
+    if old_query is not None and new_query != old_query:
+        return False
+    if old_dates is not None and (new_dates is None or new_dates[0] != old_dates[0]
+                                  or new_dates[1] < old_dates[1] or new_dates[2] > old_dates[2]):
+        return False
+    return text_narrows(new_text, old_text) and words_narrow(tokenize(new_quick), tokenize(old_quick))
+
+
+class IncrementalFilter:
+    """Evaluates search queries, reusing the results of earlier ones.
+    
+    The results of the last few queries are kept in a small LRU, so going
+    back to an earlier query (e.g. by backspacing in the search bar) costs
+    nothing. A query that narrows a cached one, by more characters or an
+    added condition, is only evaluated on the rows of that query. Those are
+    scanned, as the indexes describe the whole table; while the cached rows
+    are a large share of the table, the indexes answer the query instead.
+    """
+    
+    def __init__(self, max_entries=8, max_subset_share=0.25):
+        self.max_entries = max_entries
+        self.max_subset_share = max_subset_share
+        self._results = OrderedDict()  # active_query -> accepted rows
+        
+    def clear(self):
+        """Forget all results, e.g. after the data changed."""
+        self._results.clear()
+        
+    def rows(self, data, criteria, quick_search, index=None, statistics=None):
+        """Return the rows accepted by the criteria and the quick search, or None if all are."""
+        query = active_query(criteria, quick_search)
+        if query == (None, None, None, ""):
+            return None
+        rows = self._results.get(query)
+        if rows is not None:
+            self._results.move_to_end(query)
+            return rows
+        
+        # The smallest cached result the new query narrows, if it is small enough to scan
+        previous = None
+        for cached_query, cached_rows in self._results.items():
+            if query_narrows(query, cached_query) and (previous is None or len(cached_rows) < len(previous)):
+                previous = cached_rows
+        if previous is not None and (index is None or len(previous) <= len(data) * self.max_subset_share):
+            rows = previous[evaluate(subset_frame(data, criteria, quick_search, previous), criteria, quick_search,
+                                     statistics=statistics)]
+        else:
+            rows = evaluate(data, criteria, quick_search, index, statistics)
+            
+        self._results[query] = rows
+        if len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+        return rows
+
+
+def subset_frame(data, criteria, quick_search, rows):
+    """The given rows of the columns a query reads."""
+    if criteria.get('query'):
+        return data.iloc[rows]  # Queries may name any column
+    columns = [column for column in (criteria.get('column'), criteria.get('date_column')) if column in data.columns]
+    if quick_search.strip():
+        columns += [column for column in data.columns if is_text_column(data[column])]
+    return data[list(dict.fromkeys(columns))].iloc[rows]
+
+
+def evaluate(data, criteria, quick_search, index=None, statistics=None):
+    """Positions of the rows of data accepted by the criteria and the quick search."""
+    mask = filter_mask(data, criteria, index, statistics)
+    if quick_search.strip():
+        found = np.zeros(len(data), dtype=bool)
+        found[find_rows(data, quick_search, index=index)] = True
+        mask &= found
+    return np.flatnonzero(mask)
+
+
+class CustomProxyModel(QAbstractProxyModel):
+    """Proxy model for advanced filtering and the quick search.
+    
+    The criteria are evaluated on the DataFrame of the source model as one
+    vectorized mask, and the proxy serves the accepted rows from the
+    resulting array of source row numbers. Qt never asks for rows one by
+    one, which keeps filtering fast on catalogs with millions of rows.
+    Results of recent queries are reused through an IncrementalFilter.
+    They are kept as DataFrame rows, so sorting the source only maps them
+    to its new row order.
+    """
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self.filter_criteria = {}
+        self.quick_search = ""
+        self.search_index = None
+        self.statistics = {}
+        self.incremental_filter = IncrementalFilter()
+        self._rows = None  # accepted source rows in ascending order, None for all
+        self._layout = None  # persistent indexes and DataFrame rows while the source is sorted
+        
+    def _source_signals(self, model):
+        return (model.modelReset, model.rowsInserted, model.rowsRemoved)
+        
+    def setSourceModel(self, model):
+        previous = self.sourceModel()
+        if previous is not None:
+            for signal in self._source_signals(previous):
+                signal.disconnect(self.invalidateFilter)
+            previous.dataChanged.disconnect(self.source_data_changed)
+            previous.layoutAboutToBeChanged.disconnect(self.source_layout_about_to_change)
+            previous.layoutChanged.disconnect(self.source_layout_changed)
+        self.beginResetModel()
+        super().setSourceModel(model)
+        for signal in self._source_signals(model):
+            signal.connect(self.invalidateFilter)
+        self.incremental_filter.clear()
+        # Edited cells stay visible until the next search, like in a spreadsheet
+        model.dataChanged.connect(self.source_data_changed)
+        model.layoutAboutToBeChanged.connect(self.source_layout_about_to_change)
+        model.layoutChanged.connect(self.source_layout_changed)
+        self._rows = self.filter_rows()
+        self.endResetModel()
         
     def set_filter_criteria(self, criteria):
         self.filter_criteria = criteria
-        self.invalidateFilter()
+        self.refilter()
+        
+    def set_quick_search(self, text):
+        self.quick_search = text
+        self.refilter()
+        
+    def set_search_index(self, index):
+        """Use a TokenIndex of the source data for word searches."""
+        self.search_index = index
+        
+    def set_statistics(self, statistics):
+        """Use the ColumnStatistics of the source data to plan queries."""
+        self.statistics = statistics
+        
+    def is_filtered(self):
+        return self._rows is not None
+        
+    def invalidateFilter(self):
+        """Evaluate the criteria again after the source data changed."""
+        self.incremental_filter.clear()
+        self.refilter()
+        
+    def refilter(self):
+        """Show the rows of the current criteria and quick search."""
+        self.beginResetModel()
+        self._rows = self.filter_rows()
+        self.endResetModel()
+        
+    def filter_rows(self):
+        """Return the source rows accepted by the criteria and the quick search, or None if all are."""
+        model = self.sourceModel()
+        if model is None:
+            return None
+        if active_query(self.filter_criteria, self.quick_search) == (None, None, None, ""):
+            return None  # Spares collecting the chunks of a model that is still loading
+        rows = self.incremental_filter.rows(model.dataframe(), self.filter_criteria,
+                                            self.quick_search, self.search_index, self.statistics)
+        return np.sort(model.view_rows(rows))
+        
+    def source_data_changed(self, top_left, bottom_right, roles=()):
+        """Forward changed cells of the source to the rows shown by the proxy."""
+        self.incremental_filter.clear()  # Cached results may no longer match the edited values
+        first, last = top_left.row(), bottom_right.row()
+        if self._rows is not None:
+            first = int(np.searchsorted(self._rows, first))
+            last = int(np.searchsorted(self._rows, last, side='right')) - 1
+        if first <= last:
+            self.dataChanged.emit(self.index(first, top_left.column()),
+                                  self.index(last, bottom_right.column()), roles)
+        
+    def source_layout_about_to_change(self, *args):
+        """Remember the DataFrame rows behind the shown and the selected rows before the source is sorted."""
+        self.layoutAboutToBeChanged.emit()
+        model = self.sourceModel()
+        indexes = self.persistentIndexList()
+        shown = None if self._rows is None else model.frame_rows(self._rows)
+        selected = model.frame_rows([self.mapToSource(index).row() for index in indexes])
+        self._layout = (indexes, shown, selected)
+        
+    def source_layout_changed(self, *args):
+        """Show the same rows in the new order of the source."""
+        indexes, shown, selected = self._layout
+        self._layout = None
+        model = self.sourceModel()
+        if shown is not None:
+            self._rows = np.sort(model.view_rows(shown))
+        rows = model.view_rows(selected)
+        if self._rows is not None:
+            rows = np.searchsorted(self._rows, rows)
+        self.changePersistentIndexList(indexes, [self.index(int(row), index.column())
+                                                 for row, index in zip(rows, indexes)])
+        self.layoutChanged.emit()
         
     def filterAcceptsRow(self, source_row, source_parent):
-        # Implementation
\ No newline at end of file
+        if self._rows is None:
+            return True
+        position = np.searchsorted(self._rows, source_row)
+        return position < len(self._rows) and self._rows[position] == source_row
+        
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        if self._rows is None:
+            return self.sourceModel().rowCount()
+        return len(self._rows)
+        
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return self.sourceModel().columnCount()
+        
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < self.rowCount() and 0 <= column < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(row, column)
+        
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+        
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        row = proxy_index.row() if self._rows is None else int(self._rows[proxy_index.row()])
+        return self.sourceModel().index(row, proxy_index.column())
+        
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        row = source_index.row()
+        if self._rows is not None:
+            position = np.searchsorted(self._rows, row)
+            if position == len(self._rows) or self._rows[position] != row:
+                return QModelIndex()
+            row = int(position)
+        return self.index(row, source_index.column())
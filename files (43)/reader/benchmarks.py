@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from PyQt5.QtCore import Qt
+
+from photo_catalog_reader import PandasModel
+from merge_engine import UPDATE, KEEP_FIRST, KEEP_LAST, KEEP_LONGER, MERGE_VALUES, merge_frames
+from streaming_merge import StreamingMerger
+
+CONFLICTS = [("Erstes behalten", KEEP_FIRST), ("Letztes behalten", KEEP_LAST),
+             ("Längeren Wert behalten", KEEP_LONGER), ("Werte zusammenführen", MERGE_VALUES)]
+
+
+def make_catalog(rows):
+    """Create a synthetic catalog with the usual mix of column types."""
+    rng = np.random.default_rng(42)
+    return pd.DataFrame({
+        'filename': [f"IMG_{i:07d}.jpg" for i in range(rows)],
+        'category': rng.choice(["Art", "Document", "Photograph", "Postcard", "Other"], rows),
+        'condition': rng.choice(["Excellent", "Good", "Fair", "Poor"], rows),
+        'location': rng.choice(["Box 1", "Box 2", "Album 1", "Album 2", "Wall", "Storage"], rows),
+        'year': rng.integers(1850, 2020, rows),
+        'width_cm': rng.random(rows) * 50,
+        'text': rng.choice(["Familienfoto", "Hafen von Hamburg", "Postkarte aus Wien", ""], rows),
+    })
+
+
+def scroll_pattern(rows, columns, screens=200, screen_rows=40):
+    """Return (row, column) pairs as a view would request them while scrolling."""
+    rng = np.random.default_rng(7)
+    cells = []
+    for top in rng.integers(0, rows - screen_rows, screens):
+        for row in range(top, top + screen_rows):
+            for column in range(columns):
+                cells.append((row, column))
+    return cells
+
+
+def bench_legacy_data(data, cells):
+    """Per-cell cost of the old iloc + str() implementation."""
+    start = time.perf_counter()
+    for row, column in cells:
+        str(data.iloc[row, column])
+    return (time.perf_counter() - start) / len(cells)
+
+
+def bench_model_data(data, cells, repaint=False):
+    """Per-cell cost of PandasModel.data(), optionally with a warm cache."""
+    model = PandasModel(data)
+    indexes = [model.index(row, column) for row, column in cells]
+    if repaint:
+        for index in indexes:
+            model.data(index, Qt.DisplayRole)
+    start = time.perf_counter()
+    for index in indexes:
+        model.data(index, Qt.DisplayRole)
+    return (time.perf_counter() - start) / len(indexes)
+
+
+def bench_table_model(rows):
+    print(f"PandasModel.data() bei {rows:,} Zeilen")
+    data = make_catalog(rows)
+    cells = scroll_pattern(rows, data.shape[1])
+    
+    legacy = bench_legacy_data(data, cells)
+    cold = bench_model_data(data, cells)
+    warm = bench_model_data(data, cells, repaint=True)
+    
+    print(f"  iloc + str():        {legacy * 1e6:8.2f} µs/Zelle")
+    print(f"  Spaltenspeicher:     {cold * 1e6:8.2f} µs/Zelle  ({legacy / cold:.1f}x)")
+    print(f"  Spaltenspeicher+LRU: {warm * 1e6:8.2f} µs/Zelle  ({legacy / warm:.1f}x)")
+
+
+def bench_sort(rows):
+    print(f"PandasModel.sort() bei {rows:,} Zeilen")
+    data = make_catalog(rows)
+    data['category'] = data['category'].astype('category')
+    data['date'] = pd.Timestamp("1950-01-01") + pd.to_timedelta(np.arange(rows) % 25000, unit='D')
+    model = PandasModel(data)
+    for column, name in enumerate(data.columns):
+        start = time.perf_counter()
+        model.sort(column, Qt.AscendingOrder)
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        model.sort(column, Qt.DescendingOrder)
+        cached = time.perf_counter() - start
+        print(f"  {name + ':':12} {first:8.3f} s, absteigend aus dem Cache {cached * 1000:6.1f} ms")
+    
+    columns = [(list(data.columns).index(name), order) for name, order in
+               [('location', Qt.AscendingOrder), ('category', Qt.AscendingOrder), ('date', Qt.DescendingOrder)]]
+    start = time.perf_counter()
+    model.sort_by(columns)
+    first = time.perf_counter() - start
+    model.setData(model.index(0, list(data.columns).index('text')), "Geändert")
+    start = time.perf_counter()
+    model.sort_by(columns)
+    cached = time.perf_counter() - start
+    print(f"  location, category, date: {first:8.3f} s, nach Änderung einer anderen Spalte {cached * 1000:6.1f} ms")
+
+
+def legacy_update(base, delta, match_column):
+    """The row-by-row "Aktualisieren" loop perform_merge used to run.
+    
+    Values are assigned as arrays on an object copy; assigning the row Series
+    itself aligns it against the row index and fails on recent pandas.
+    """
+    result = base.astype(object)
+    for idx, row in delta[delta[match_column].isin(result[match_column])].iterrows():
+        match_value = row[match_column]
+        result.loc[result[match_column] == match_value, delta.columns] = row.to_numpy()
+    new_rows = delta[~delta[match_column].isin(result[match_column])]
+    return pd.concat([result, new_rows], ignore_index=True)
+
+
+def make_update_pair(rows):
+    """Create a base catalog and a delta of a fifth of its size, half of it new keys."""
+    base = make_catalog(rows)
+    delta = make_catalog(rows // 5)
+    delta['filename'] = [f"IMG_{i:07d}.jpg" for i in range(rows - rows // 10, rows - rows // 10 + rows // 5)]
+    delta['text'] = "Aktualisiert"
+    return base, delta
+
+
+def bench_update_merge(rows, legacy_limit=10_000):
+    print(f"Aktualisieren bei {rows:,} Basiszeilen und {rows // 5:,} Änderungszeilen")
+    base, delta = make_update_pair(rows)
+    
+    if rows <= legacy_limit:
+        start = time.perf_counter()
+        legacy_update(base, delta, 'filename')
+        print(f"  iterrows-Schleife:        {time.perf_counter() - start:8.3f} s")
+    else:
+        print("  iterrows-Schleife:        übersprungen (quadratische Laufzeit)")
+        
+    for name, conflict in CONFLICTS:
+        start = time.perf_counter()
+        merge_frames([base, delta], UPDATE, conflict, 'filename')
+        print(f"  {name + ':':25} {time.perf_counter() - start:8.3f} s")
+
+
+def check_streaming_update(rows):
+    """Merge with "Aktualisieren" in memory and streamed, and fail if the outputs differ.
+    
+    The base repeats some of its keys and the delta some of its new keys,
+    which both merges must keep as separate rows.
+    """
+    print(f"Aktualisieren gestreamt und im Speicher bei {rows:,} Basiszeilen")
+    base, delta = make_update_pair(rows)
+    base = pd.concat([base, base.iloc[:rows // 100]], ignore_index=True)
+    delta = pd.concat([delta, delta.iloc[-(rows // 100):]], ignore_index=True)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = [os.path.join(temp_dir, "base.csv"), os.path.join(temp_dir, "delta.csv")]
+        base.to_csv(paths[0], index=False)
+        delta.to_csv(paths[1], index=False)
+        frames = [pd.read_csv(path, dtype=str) for path in paths]
+        expected_path = os.path.join(temp_dir, "expected.csv")
+        output_path = os.path.join(temp_dir, "streamed.csv")
+        for name, conflict in CONFLICTS:
+            merge_frames(frames, UPDATE, conflict, 'filename').to_csv(expected_path, index=False)
+            start = time.perf_counter()
+            StreamingMerger(paths, UPDATE, conflict, 'filename').merge(output_path)
+            elapsed = time.perf_counter() - start
+            expected = pd.read_csv(expected_path, dtype=str)
+            streamed = pd.read_csv(output_path, dtype=str)
+            if not streamed.equals(expected):
+                raise AssertionError(f"Gestreamtes Ergebnis weicht ab ({name})")
+            print(f"  {name + ':':25} {elapsed:8.3f} s, {len(streamed):,} Zeilen, identisch")
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    for rows in sizes:
+        bench_table_model(rows)
+        bench_sort(rows)
+    for rows in [10_000, 100_000, 1_000_000]:
+        bench_update_merge(rows)
+    check_streaming_update(100_000)
+
+
+if __name__ == "__main__":
+    main()
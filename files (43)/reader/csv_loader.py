@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import codecs
+import csv
+import os
+import pandas as pd
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from dataframe_optimizer import memory_usage, optimize_dataframe
+
+# Optional import - pyarrow parses CSV considerably faster than pandas' C engine
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+def detect_encoding(sample):
+    """Guess the text encoding of a raw byte sample."""
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if sample.startswith(codecs.BOM_UTF16_LE) or sample.startswith(codecs.BOM_UTF16_BE):
+        return 'utf-16'
+    try:
+        sample.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off at the end of the sample is still UTF-8
+        if e.start < len(sample) - 3:
+            return 'cp1252'
+    return 'utf-8'
+
+
+def sniff_dialect(file_path, sample_size=64 * 1024):
+    """Detect separator, encoding and quoting from the start of a CSV file."""
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_size)
+
+    encoding = detect_encoding(sample)
+    text = sample.decode(encoding, errors='ignore')
+    if len(sample) == sample_size and '\n' in text:
+        # Only hand complete lines to the sniffer
+        text = text[:text.rfind('\n') + 1]
+
+    dialect = {'sep': ',', 'encoding': encoding, 'quotechar': '"', 'doublequote': True}
+    try:
+        sniffed = csv.Sniffer().sniff(text, delimiters=',;\t|')
+        dialect['sep'] = sniffed.delimiter
+        dialect['quotechar'] = sniffed.quotechar or '"'
+        dialect['doublequote'] = sniffed.doublequote
+    except csv.Error:
+        pass  # Fall back to plain comma separated values
+    return dialect
+
+
+def resolve_dialect(file_path, dialect_cache=None):
+    """Return the cached dialect of a known file, sniffing only unknown files."""
+    if dialect_cache is not None:
+        dialect = dialect_cache.lookup(file_path)
+        if dialect is not None:
+            return dialect
+    dialect = sniff_dialect(file_path)
+    if dialect_cache is not None:
+        dialect_cache.store(file_path, dialect)
+    return dialect
+
+
+def is_parser_dtype(name):
+    """Whether pd.read_csv can parse a column into the dtype of this name.
+
+    Dates are parsed through parse_dates; durations and Arrow-only types,
+    which pyarrow may infer, are left to type inference.
+    """
+    return not (name.startswith('timedelta') or '[pyarrow]' in name)
+
+
+def column_dtypes(data):
+    """Return the dtypes of a parsed DataFrame in a JSON friendly form."""
+    return {str(column): str(dtype) for column, dtype in data.dtypes.items() if is_parser_dtype(str(dtype))}
+
+
+def read_csv_kwargs(dialect, typed=True, usecols=None):
+    """Translate a sniffed dialect into keyword arguments for pd.read_csv.
+    
+    With typed, the cached dtypes of the file are passed on; usecols limits
+    them to the columns read.
+    """
+    kwargs = {
+        'sep': dialect['sep'],
+        'encoding': dialect['encoding'],
+        'quotechar': dialect['quotechar'],
+        'doublequote': dialect['doublequote'],
+    }
+    if usecols is not None:
+        kwargs['usecols'] = usecols
+    if typed and dialect.get('dtypes'):
+        dtypes = {column: dtype for column, dtype in dialect['dtypes'].items()
+                  if is_parser_dtype(dtype) and (usecols is None or column in usecols)}
+        # Known dtypes spare the parser its type inference; the C engine only parses dates through parse_dates
+        dates = [column for column, dtype in dtypes.items() if dtype.startswith('datetime64')]
+        kwargs['dtype'] = {column: dtype for column, dtype in dtypes.items() if column not in dates}
+        if dates:
+            kwargs['parse_dates'] = dates
+    return kwargs
+
+
+def read_file_info(file_path, dialect_cache=None, sample_size=64 * 1024):
+    """Read only the header of a CSV file and estimate its number of rows."""
+    dialect = resolve_dialect(file_path, dialect_cache)
+    columns = pd.read_csv(file_path, nrows=0, engine='c', **read_csv_kwargs(dialect, typed=False)).columns.tolist()
+
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_size)
+    lines = sample.count(b'\n')
+    if len(sample) < sample_size:
+        # The whole file fits into the sample, so the count is exact
+        estimated_rows = max(lines - 1 + (not sample.endswith(b'\n')), 0)
+    else:
+        estimated_rows = max(size * lines // len(sample) - 1, 0)
+    return {'columns': columns, 'estimated_rows': estimated_rows, 'dialect': dialect}
+
+
+def read_csv_file(file_path, dialect_cache=None):
+    """Read a whole CSV file with the C engine using the cached or sniffed dialect."""
+    dialect = resolve_dialect(file_path, dialect_cache)
+    data = pd.read_csv(file_path, engine='c', **read_csv_kwargs(dialect))
+    if dialect_cache is not None and 'dtypes' not in dialect:
+        dialect_cache.store(file_path, dialect, column_dtypes(data))
+    return data
+
+
+def iter_csv_chunks(handle, dialect, first_chunk_rows, chunk_rows, skip_rows=0):
+    """Yield DataFrame chunks parsed by the C engine from an open binary file."""
+    reader = pd.read_csv(handle, engine='c', chunksize=chunk_rows, **read_csv_kwargs(dialect))
+    with reader:
+        # Rows another parser already delivered are read again but not yielded
+        while skip_rows > 0:
+            skipped = reader.get_chunk(min(skip_rows, chunk_rows))
+            skip_rows -= len(skipped)
+
+        try:
+            yield reader.get_chunk(first_chunk_rows)
+        except StopIteration:
+            return
+        for chunk in reader:
+            yield chunk
+
+
+# pandas dtype names that have a direct Arrow counterpart
+ARROW_TYPES = {'int64': 'int64', 'float64': 'float64', 'bool': 'bool', 'object': 'string', 'str': 'string'}
+
+
+def arrow_csv_options(dialect, block_size=None):
+    """Translate a sniffed dialect into pyarrow CSV reader options."""
+    column_types = {column: pa.type_for_alias(ARROW_TYPES[dtype])
+                    for column, dtype in dialect.get('dtypes', {}).items()
+                    if dtype in ARROW_TYPES}
+    return {
+        'read_options': pa_csv.ReadOptions(encoding=dialect['encoding'], block_size=block_size),
+        'parse_options': pa_csv.ParseOptions(delimiter=dialect['sep'], quote_char=dialect['quotechar'],
+                                             double_quote=dialect['doublequote']),
+        'convert_options': pa_csv.ConvertOptions(column_types=column_types)
+    }
+
+
+def iter_arrow_chunks(handle, dialect, block_size=16 * 1024 * 1024):
+    """Yield DataFrame chunks from pyarrow's streaming CSV reader."""
+    reader = pa_csv.open_csv(handle, **arrow_csv_options(dialect, block_size))
+    for batch in reader:
+        yield batch.to_pandas()
+
+
+def parse_csv_file(file_path, dialect):
+    """Parse a whole CSV file, meant to run in a worker process.
+    
+    With pyarrow the table travels back as an Arrow IPC stream, which is
+    pickled as one flat buffer instead of one Python object per cell.
+    """
+    if HAS_PYARROW:
+        table = pa_csv.read_csv(file_path, **arrow_csv_options(dialect))
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    return pd.read_csv(file_path, engine='c', **read_csv_kwargs(dialect))
+
+
+def frame_from_worker(result):
+    """Turn the result of parse_csv_file back into a DataFrame."""
+    if isinstance(result, bytes):
+        return pa.ipc.open_stream(result).read_all().to_pandas()
+    return result
+
+
+class CSVLoaderThread(QThread):
+    """Thread to parse a CSV file in chunks without freezing the UI."""
+    chunk_loaded = pyqtSignal(object)  # DataFrame with the next rows
+    progress_updated = pyqtSignal(int)
+    data_loaded = pyqtSignal(object)  # complete DataFrame
+    load_finished = pyqtSignal(bool, str)  # success, message
+
+    def __init__(self, file_path, dialect_cache=None, sidecar_cache=None,
+                 first_chunk_rows=2000, chunk_rows=200000, categories=None):
+        super().__init__()
+        self.file_path = file_path
+        self.dialect_cache = dialect_cache
+        self.sidecar_cache = sidecar_cache
+        self.first_chunk_rows = first_chunk_rows
+        self.chunk_rows = chunk_rows
+        self.categories = categories
+        self.rows_loaded = 0
+        self.memory_before = None  # bytes as parsed, unknown for cached files
+        self.memory_after = None  # bytes after optimize_dataframe
+        self._cancelled = False
+
+    def cancel(self):
+        """Request the loader to stop after the current chunk."""
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        try:
+            if self.sidecar_cache is not None:
+                data = self.sidecar_cache.load(self.file_path)
+                if data is not None:
+                    self.rows_loaded = len(data)
+                    self.memory_after = memory_usage(data)
+                    self.chunk_loaded.emit(data)
+                    self.data_loaded.emit(data)
+                    self.progress_updated.emit(100)
+                    self.load_finished.emit(True, f"Datei geöffnet (Cache): {self.file_path}")
+                    return
+
+            dialect = resolve_dialect(self.file_path, self.dialect_cache)
+            frames = []
+            for chunk in self.read_chunks(dialect):
+                if self._cancelled:
+                    self.load_finished.emit(False, "Laden abgebrochen")
+                    return
+                chunk.index = pd.RangeIndex(self.rows_loaded, self.rows_loaded + len(chunk))
+                frames.append(chunk)
+                self.rows_loaded += len(chunk)
+                self.chunk_loaded.emit(chunk)
+
+            data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+            # The parsed dtypes are cached, as read_csv cannot produce the optimized ones
+            if self.dialect_cache is not None and 'dtypes' not in dialect:
+                self.dialect_cache.store(self.file_path, dialect, column_dtypes(data))
+            self.memory_before = memory_usage(data)
+            data = optimize_dataframe(data, self.categories)
+            self.memory_after = memory_usage(data)
+            self.data_loaded.emit(data)
+            self.progress_updated.emit(100)
+            self.load_finished.emit(True, f"Datei geöffnet: {self.file_path}")
+
+            if self.sidecar_cache is not None and not data.empty:
+                self.sidecar_cache.store(self.file_path, data)
+
+        except Exception as e:
+            self.load_finished.emit(False, f"Die Datei konnte nicht geladen werden: {str(e)}")
+
+    def read_chunks(self, dialect):
+        """Yield chunks from pyarrow when available, otherwise from the C engine."""
+        file_size = max(os.path.getsize(self.file_path), 1)
+        delivered = 0
+
+        if HAS_PYARROW:
+            try:
+                with open(self.file_path, 'rb') as handle:
+                    for chunk in iter_arrow_chunks(handle, dialect):
+                        delivered += len(chunk)
+                        self.progress_updated.emit(min(99, handle.tell() * 100 // file_size))
+                        yield chunk
+                return
+            except pa.ArrowInvalid:
+                # pyarrow infers types from the first block only; let pandas
+                # handle files whose later rows do not fit that guess
+                pass
+
+        with open(self.file_path, 'rb') as handle:
+            for chunk in iter_csv_chunks(handle, dialect, self.first_chunk_rows,
+                                         self.chunk_rows, skip_rows=delivered):
+                self.progress_updated.emit(min(99, handle.tell() * 100 // file_size))
+                yield chunk
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import numpy as np
+import pandas as pd
+
+# Words of a column name, split at separators and camelCase boundaries
+NAME_WORDS = re.compile(r'[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+')
+
+
+def is_date_name(name):
+    """Whether a column name announces dates: the word "date", or "Datum" also
+    inside compounds like "Aufnahmedatum", but not "Dateiname" or "updated"."""
+    words = [word.lower() for word in NAME_WORDS.findall(str(name))]
+    return any(word in ('date', 'dates') or 'datum' in word for word in words)
+
+
+def find_date_columns(columns):
+    """Columns that hold dates, judging by their name."""
+    return [column for column in columns if is_date_name(column)]
+
+
+def memory_usage(data):
+    """Memory used by a DataFrame in bytes, including the strings of object columns."""
+    return int(data.memory_usage(index=True, deep=True).sum())
+
+
+def parse_dates(values, sample_size=1000):
+    """Return the column as datetime64, or None if parsing would change the file on save.
+
+    Only dates that pandas writes back in exactly their original form are
+    converted, so saving an optimized catalog never reformats its dates.
+    """
+    present = values.dropna()
+    if present.empty:
+        return None
+    sample = present.iloc[:sample_size].astype(str)
+    try:
+        # Only ISO dates can survive the round trip below, so the slow per-value fallback is never needed
+        parsed = pd.to_datetime(sample, errors='raise', format='ISO8601')
+    except (ValueError, TypeError, OverflowError):
+        return None
+    date_format = "%Y-%m-%d" if (parsed == parsed.dt.normalize()).all() else "%Y-%m-%d %H:%M:%S"
+    if not (parsed.dt.strftime(date_format) == sample).all():
+        return None
+
+    result = pd.to_datetime(values, errors='coerce', format=date_format)
+    if result.isna().sum() != values.isna().sum():
+        return None  # Some later value does not follow the format of the sample
+    return result
+
+
+def downcast_numbers(values):
+    """Return the column in the smallest numeric dtype that holds all of its values exactly."""
+    if values.dtype.kind in 'iu':
+        return pd.to_numeric(values, downcast='integer' if values.min() < 0 else 'unsigned')
+    if values.dtype.kind == 'f':
+        narrow = values.astype(np.float32)
+        # Only keep float32 if every value survives the round trip, so saved files stay identical
+        if ((narrow.astype(np.float64) == values) | values.isna()).all():
+            return narrow
+    return values
+
+
+def optimize_dataframe(data, categories=None, max_category_share=0.5, dates=True):
+    """Shrink a loaded catalog in memory without changing its values.
+
+    Text columns with few distinct values become categoricals, numbers are
+    downcast where no precision is lost and date columns are parsed. The
+    vocabularies of Config.load_categories are added to the categories of
+    their columns, so values picked from them later fit in place.
+    
+    Set dates to False when frames of several files are combined, as a
+    column parsed in one file but not in another would mix types.
+    """
+    categories = categories or {}
+    date_columns = set(find_date_columns(data.columns)) if dates else set()
+    columns = {}
+    for column in data.columns:
+        values = data[column]
+        if values.dtype.kind in 'iuf':
+            values = downcast_numbers(values)
+        elif values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+            parsed = parse_dates(values) if column in date_columns else None
+            if parsed is not None:
+                values = parsed
+            elif len(values) and values.nunique() <= len(values) * max_category_share:
+                known = [value for value in categories.get(column, []) if value is not None]
+                present = pd.unique(values.dropna())
+                values = pd.Series(pd.Categorical(values, categories=pd.unique(np.concatenate(
+                    [np.asarray(known, dtype=object), present.astype(object)]))), index=values.index)
+        columns[column] = values
+    return pd.DataFrame(columns, index=data.index)
@@ -45,11 +45,14 @@ class ShortcutDialog(QDialog):
         """Add all shortcut information to the table."""
         shortcuts = [
             ("Datei öffnen", "Ctrl+O"),
+            ("Große Datei durchsuchen", "Ctrl+Shift+O"),
             ("Speichern", "Ctrl+S"),
             ("Speichern unter", "Ctrl+Shift+S"),
             ("CSV-Dateien zusammenführen", "Ctrl+M"),
             ("Portfolio exportieren", "Ctrl+E"),
             ("Suchen", "Ctrl+F"),
+            ("Erweiterte Suche", "Ctrl+Shift+F"),
+            ("Nach weiterer Spalte sortieren", "Shift+Klick auf Spaltenkopf"),
             ("Nächstes Bild", "Pfeil rechts"),
             ("Vorheriges Bild", "Pfeil links"),
             ("Zum Hauptpanel", "Alt+1"),
@@ -0,0 +1,679 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import time
+import numpy as np
+import pandas as pd
+
+from search_index import is_text_column, tokenize, word_mask
+
+# Short syntax reference for the dialog
+QUERY_HELP = (
+    "Wörter suchen in allen Textspalten, Spalte:Wert in einer Spalte.\n"
+    "Spalte:wort  Wortanfang    Spalte:\"Wert\"  genau gleich\n"
+    "Spalte:*teil*  enthält    Spalte:anfang*  beginnt mit    Spalte:*ende  endet mit\n"
+    "Spalte:/regex/  regulärer Ausdruck    Spalte:1990..1999  Bereich    Spalte:>=1990  Vergleich\n"
+    "Verknüpfen mit AND (UND), OR (ODER), NOT (NICHT) und Klammern; ohne Verknüpfung gilt AND."
+)
+
+QUERY_TOKEN = re.compile(r'\s*(?:(?P<paren>[()])|(?P<regex>/(?:[^/\\]|\\.)*/)|(?P<quoted>"(?:[^"\\]|\\.)*")'
+                         r'|(?P<colon>:)|(?P<word>[^\s()":]+))')
+KEYWORDS = {'AND': 'AND', 'UND': 'AND', 'OR': 'OR', 'ODER': 'OR', 'NOT': 'NOT', 'NICHT': 'NOT'}
+COMPARISON = re.compile(r'(>=|<=|>|<)(.+)')
+
+# Estimated cost of testing one row, relative to comparing a number
+ROW_COSTS = {'codes': 1.0, 'compare': 1.0, 'lookup': 0.5, 'text': 40.0, 'regex': 80.0, 'words': 150.0}
+# Share of rows assumed to match a text condition when nothing better is known
+# Categorical columns with more categories are not tested while planning
+MAX_PLANNED_CATEGORIES = 10000
+DEFAULT_SELECTIVITY = {'match': 0.1, 'equals': 0.01, 'contains': 0.1, 'starts_with': 0.05,
+                       'ends_with': 0.05, 'regex': 0.1, 'range': 0.3}
+
+# Names of the evaluation methods in the explain view
+METHOD_NAMES = {
+    'codes': "Kategoriecodes",
+    'compare': "Vergleich",
+    'index': "Wortindex",
+    'substrings': "Teilstring-Index",
+    'text': "Textvergleich",
+    'regex': "Regex-Suche",
+    'words': "Wortsuche ohne Index"
+}
+
+
+class QueryError(ValueError):
+    """A query that cannot be parsed or does not fit the catalog."""
+
+
+class Term:
+    """A condition on one column, or on all text columns if column is None.
+
+    kind is one of 'match' (word beginnings, or equality for numbers and
+    dates), 'equals', 'contains', 'starts_with', 'ends_with', 'regex' and
+    'range', whose value is a (low, high, low_inclusive, high_inclusive) tuple.
+    """
+
+    def __init__(self, column, kind, value, text):
+        self.column = column
+        self.kind = kind
+        self.value = value
+        self.text = text
+
+
+class Operation:
+    """AND, OR or NOT of sub-queries."""
+
+    def __init__(self, operator, children):
+        self.operator = operator
+        self.children = children
+
+
+def lex(query):
+    """Split a query into (kind, text) tokens."""
+    tokens = []
+    query = query.rstrip()
+    position = 0
+    while position < len(query):
+        match = QUERY_TOKEN.match(query, position)
+        if match is None:
+            raise QueryError(f"Unerwartetes Zeichen an Position {len(query[:position].rstrip()) + 1}: "
+                             f"{query[position:].lstrip()[:1]}")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == 'word' and text in KEYWORDS:
+            kind = KEYWORDS[text]
+        elif kind == 'quoted':
+            text = re.sub(r'\\(.)', r'\1', text[1:-1])
+        elif kind == 'regex':
+            text = text[1:-1].replace('\\/', '/')
+        tokens.append((kind, text))
+        position = match.end()
+    return tokens
+
+
+class QueryParser:
+    """Recursive descent parser; OR binds weaker than AND, which binds weaker than NOT."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else None
+
+    def take(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise QueryError("Die Abfrage ist leer.")
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise QueryError(f"Unerwartet: {self.tokens[self.position][1]}")
+        return node
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek() == 'OR':
+            self.take()
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else Operation('OR', children)
+
+    def parse_and(self):
+        children = [self.parse_not()]
+        while self.peek() not in (None, 'OR') and self.tokens[self.position] != ('paren', ')'):
+            if self.peek() == 'AND':
+                self.take()
+            children.append(self.parse_not())
+        return children[0] if len(children) == 1 else Operation('AND', children)
+
+    def parse_not(self):
+        if self.peek() == 'NOT':
+            self.take()
+            return Operation('NOT', [self.parse_not()])
+        return self.parse_atom()
+
+    def parse_atom(self):
+        if self.peek() is None:
+            raise QueryError("Die Abfrage endet unerwartet.")
+        kind, text = self.take()
+        if (kind, text) == ('paren', '('):
+            node = self.parse_or()
+            if self.position >= len(self.tokens) or self.take() != ('paren', ')'):
+                raise QueryError("Schließende Klammer fehlt.")
+            return node
+        if kind in ('word', 'quoted') and self.peek() == 'colon':
+            self.take()
+            if self.peek() not in ('word', 'quoted', 'regex'):
+                raise QueryError(f"Wert für Spalte '{text}' fehlt.")
+            return self.parse_value(text, *self.take())
+        if kind == 'regex':
+            return Term(None, 'regex', text, f"/{text}/")
+        if kind in ('word', 'quoted'):
+            return Term(None, 'match', text, text)
+        raise QueryError(f"Unerwartet: {text}")
+
+    def parse_value(self, column, kind, text):
+        """Term for the value of column:value."""
+        source = f"{column}:{text}"
+        if kind == 'regex':
+            return Term(column, 'regex', text, f"{column}:/{text}/")
+        if kind == 'quoted':
+            return Term(column, 'equals', text, f"{column}:\"{text}\"")
+        comparison = COMPARISON.fullmatch(text)
+        if comparison:
+            operator, bound = comparison.groups()
+            if operator.startswith('>'):
+                return Term(column, 'range', (bound, None, operator == '>=', False), source)
+            return Term(column, 'range', (None, bound, False, operator == '<='), source)
+        if '..' in text:
+            low, high = text.split('..', 1)
+            if not low and not high:
+                raise QueryError(f"Leerer Bereich: {source}")
+            return Term(column, 'range', (low or None, high or None, True, True), source)
+        if len(text) > 2 and text.startswith('*') and text.endswith('*'):
+            return Term(column, 'contains', text[1:-1], source)
+        if len(text) > 1 and text.startswith('*'):
+            return Term(column, 'ends_with', text[1:], source)
+        if len(text) > 1 and text.endswith('*'):
+            return Term(column, 'starts_with', text[:-1], source)
+        return Term(column, 'match', text, source)
+
+
+def parse_query(query):
+    """Parse a query into a tree of Terms and Operations; raise QueryError if invalid."""
+    return QueryParser(lex(query)).parse()
+
+
+def text_test(text, kind, value, case_sensitive):
+    """Evaluate a text condition on a Series of strings; missing values never match."""
+    if kind == 'regex':
+        try:
+            mask = text.str.contains(value, case=case_sensitive, regex=True)
+        except ValueError:
+            # pyarrow's RE2 lacks some features of Python's re, e.g. look-behind
+            mask = text.str.contains(value, flags=0 if case_sensitive else re.IGNORECASE, regex=True)
+    elif kind == 'equals':
+        mask = text == value if case_sensitive else text.str.lower() == value.lower()
+    elif kind == 'contains':
+        mask = text.str.contains(value, case=case_sensitive, regex=False)
+    elif kind == 'starts_with':
+        mask = text.str.startswith(value) if case_sensitive else text.str.contains("^" + re.escape(value), case=False)
+    elif kind == 'ends_with':
+        mask = text.str.endswith(value) if case_sensitive else text.str.contains(re.escape(value) + "$", case=False)
+    else:
+        raise ValueError(f"Unbekannte Bedingung: {kind}")
+    return mask.to_numpy(dtype=bool, na_value=False)
+
+
+def date_bound(text, upper):
+    """Parse the bound of a date range; a day as upper bound includes the whole day."""
+    try:
+        value = pd.Timestamp(text)
+    except ValueError:
+        raise QueryError(f"Kein Datum: {text}")
+    if upper and len(text.strip()) <= 10:
+        value += pd.Timedelta(days=1)
+        return value, False
+    return value, None
+
+
+def range_test(values, low, high, low_inclusive, high_inclusive):
+    """Rows of an array or Series lying in a range; missing values never do."""
+    mask = np.ones(len(values), dtype=bool)
+    if low is not None:
+        mask &= as_mask(values >= low if low_inclusive else values > low)
+    if high is not None:
+        mask &= as_mask(values <= high if high_inclusive else values < high)
+    return mask
+
+
+def as_mask(result):
+    """Boolean array of a comparison of an array or a Series, with missing values as False."""
+    if isinstance(result, pd.Series):
+        return result.to_numpy(dtype=bool, na_value=False)
+    return np.asarray(result, dtype=bool)
+
+
+class PlanNode:
+    """Part of a compiled query with its estimates and, once run, its measurements."""
+
+    selectivity = 1.0
+
+    def __init__(self):
+        self.rows_in = None
+        self.rows_out = None
+        self.seconds = None
+
+    def run(self, rows):
+        """Return the sorted subset of rows accepted by the node."""
+        started = time.perf_counter()
+        result = self.evaluate(rows)
+        self.seconds = time.perf_counter() - started
+        self.rows_in, self.rows_out = len(rows), len(result)
+        return result
+
+    def measured(self):
+        if self.seconds is None:
+            return ""
+        return f"; Zeilen {self.rows_in} → {self.rows_out}, {self.seconds * 1000:.1f} ms"
+
+
+class Predicate(PlanNode):
+    """A term bound to a column and a method to evaluate it.
+
+    Index methods compute the mask of all rows at once and cost the same
+    however few rows are left; the other methods only test the rows left
+    by the conditions evaluated before them.
+    """
+
+    def __init__(self, description, method, selectivity, fixed_cost, row_cost, test=None, full_mask=None):
+        super().__init__()
+        self.description = description
+        self.method = method
+        self.selectivity = float(min(max(selectivity, 0.0), 1.0))
+        self.fixed_cost = fixed_cost
+        self.row_cost = row_cost
+        self.test = test  # rows -> boolean mask over those rows
+        self.full_mask = full_mask  # () -> boolean mask over all rows
+
+    def cost(self, rows):
+        return self.fixed_cost + self.row_cost * rows
+
+    def evaluate(self, rows):
+        if self.full_mask is not None:
+            return rows[subset(self.full_mask(), rows)]
+        return rows[self.test(rows)]
+
+    def explain(self, depth):
+        return ["  " * depth + f"{self.description} [{METHOD_NAMES[self.method]}, "
+                f"Selektivität {self.selectivity:.1%}, Kosten {self.fixed_cost:.3g} + {self.row_cost:g}/Zeile"
+                f"{self.measured()}]"]
+
+
+class Conjunction(PlanNode):
+    """AND: every condition is only tested on the rows left by the ones before.
+
+    The conditions are ordered greedily by their cost on the rows left so
+    far divided by the share of rows they remove, so cheap conditions that
+    remove many rows come first.
+    """
+
+    def __init__(self, children, row_count):
+        super().__init__()
+        self.children = []
+        remaining = list(children)
+        rows = float(row_count)
+        while remaining:
+            best = min(remaining, key=lambda child: child.cost(rows) / max(1.0 - child.selectivity, 1e-9))
+            remaining.remove(best)
+            self.children.append(best)
+            rows *= best.selectivity
+        self.selectivity = float(np.prod([child.selectivity for child in children]))
+
+    def cost(self, rows):
+        total = 0.0
+        for child in self.children:
+            total += child.cost(rows)
+            rows *= child.selectivity
+        return total
+
+    def evaluate(self, rows):
+        for child in self.children:
+            if not len(rows):
+                break
+            rows = child.run(rows)
+        return rows
+
+    def explain(self, depth):
+        lines = ["  " * depth + f"UND [Selektivität {self.selectivity:.1%}{self.measured()}]"]
+        for child in self.children:
+            lines.extend(child.explain(depth + 1))
+        return lines
+
+
+class Disjunction(PlanNode):
+    """OR: every condition is only tested on the rows not yet accepted.
+
+    The conditions are ordered by their cost divided by the share of rows
+    they accept, so cheap conditions that accept many rows come first.
+    """
+
+    def __init__(self, children, row_count):
+        super().__init__()
+        self.children = []
+        remaining = list(children)
+        rows = float(row_count)
+        while remaining:
+            best = min(remaining, key=lambda child: child.cost(rows) / max(child.selectivity, 1e-9))
+            remaining.remove(best)
+            self.children.append(best)
+            rows *= 1.0 - best.selectivity
+        self.selectivity = 1.0 - float(np.prod([1.0 - child.selectivity for child in children]))
+
+    def cost(self, rows):
+        total = 0.0
+        for child in self.children:
+            total += child.cost(rows)
+            rows *= 1.0 - child.selectivity
+        return total
+
+    def evaluate(self, rows):
+        left = np.ones(len(rows), dtype=bool)  # rows no condition accepted so far
+        for child in self.children:
+            candidates = rows if left.all() else rows[left]
+            if not len(candidates):
+                break
+            left[np.searchsorted(rows, child.run(candidates))] = False
+        return rows[~left]
+
+    def explain(self, depth):
+        lines = ["  " * depth + f"ODER [Selektivität {self.selectivity:.1%}{self.measured()}]"]
+        for child in self.children:
+            lines.extend(child.explain(depth + 1))
+        return lines
+
+
+class Negation(PlanNode):
+    """NOT: the rows its condition rejects."""
+
+    def __init__(self, child):
+        super().__init__()
+        self.child = child
+        self.selectivity = 1.0 - child.selectivity
+
+    def cost(self, rows):
+        return self.child.cost(rows)
+
+    def evaluate(self, rows):
+        return without(rows, self.child.run(rows))
+
+    def explain(self, depth):
+        return ["  " * depth + f"NICHT [Selektivität {self.selectivity:.1%}{self.measured()}]"] + \
+            self.child.explain(depth + 1)
+
+
+def without(rows, found):
+    """The rows not found; found is a sorted subset of rows."""
+    keep = np.ones(len(rows), dtype=bool)
+    keep[np.searchsorted(rows, found)] = False
+    return rows[keep]
+
+
+class QueryCompiler:
+    """Binds a parsed query to a catalog and chooses how to evaluate every term.
+
+    Selectivities are estimated from the value counts of categorical
+    columns, the postings of the search index and the ColumnStatistics of
+    the catalog: histograms for ranges of numbers and dates, the most
+    frequent values for text equality. Without statistics, ranges assume
+    evenly spread values and other text conditions fall back to fixed
+    guesses. The estimates of a column are computed once per compiler.
+    """
+
+    def __init__(self, data, index=None, case_sensitive=False, statistics=None):
+        self.data = data
+        self.index = index if index is not None and index.row_count == len(data) else None
+        self.case_sensitive = case_sensitive
+        self.statistics = statistics or {}
+        self.columns = {str(column): column for column in data.columns}
+        self._counts = {}
+        self._ranges = {}
+
+    def compile(self, node):
+        if isinstance(node, Term):
+            return self.compile_term(node)
+        children = [self.compile(child) for child in node.children]
+        if node.operator == 'NOT':
+            return Negation(children[0])
+        if node.operator == 'AND':
+            return Conjunction(children, len(self.data))
+        return Disjunction(children, len(self.data))
+
+    def resolve_column(self, name):
+        if name in self.columns:
+            return self.columns[name]
+        matches = [column for key, column in self.columns.items() if key.lower() == name.lower()]
+        if len(matches) != 1:
+            raise QueryError(f"Unbekannte Spalte: {name}")
+        return matches[0]
+
+    def category_counts(self, column):
+        """Rows per category of a categorical column."""
+        if column not in self._counts:
+            codes = self.data[column].cat.codes.to_numpy()
+            self._counts[column] = np.bincount(codes[codes >= 0], minlength=len(self.data[column].cat.categories))
+        return self._counts[column]
+
+    def value_range(self, column, values):
+        """Smallest and largest value of a numeric or date column as floats, or None if empty."""
+        if column not in self._ranges:
+            numbers = values[~np.isnan(values)] if values.dtype.kind == 'f' else values
+            self._ranges[column] = (float(numbers.min()), float(numbers.max())) if len(numbers) else None
+        return self._ranges[column]
+
+    def compile_term(self, term):
+        if term.column is None:
+            return self.compile_all_columns(term)
+        column = self.resolve_column(term.column)
+        values = self.data[column]
+        if term.kind == 'match' and self.indexed(column):
+            return self.compile_index(term, [str(column)])
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            return self.compile_categorical(term, column, values)
+        if values.dtype.kind in 'iuf' or (values.dtype.kind == 'M' and isinstance(values.dtype, np.dtype)):
+            return self.compile_ordered(term, column, values)
+        return self.compile_text(term, column, values)
+
+    def check_regex(self, term):
+        try:
+            re.compile(term.value)
+        except re.error as e:
+            raise QueryError(f"Ungültiger regulärer Ausdruck {term.text}: {e}")
+
+    def category_matches(self, term, categories):
+        """Test a term on the distinct values of a column."""
+        if term.kind == 'match':
+            words = tokenize(term.value)
+            return word_mask(pd.Series(categories, dtype=object), words)
+        if term.kind == 'range':
+            low, high, low_inclusive, high_inclusive = term.value
+            return range_test(pd.Series(categories).astype(str), low, high, low_inclusive, high_inclusive)
+        if term.kind == 'regex':
+            self.check_regex(term)
+        return text_test(pd.Series(categories).astype(str), term.kind, term.value, self.case_sensitive)
+
+    def indexed(self, column):
+        return self.index is not None and str(column) in self.index.columns
+
+    def compile_index(self, term, columns):
+        """Word beginnings looked up in the search index, in any of the columns."""
+        words = tokenize(term.value)
+        if not words:
+            raise QueryError(f"Keine Wörter in {term.text}")
+        row_count = len(self.data)
+        count = min(sum(self.index.columns[column].prefix_count(word) for column in columns) for word in words)
+
+        def full_mask():
+            mask = np.ones(row_count, dtype=bool)
+            for word in words:
+                found = np.zeros(row_count, dtype=bool)
+                for column in columns:
+                    found |= self.index.word_mask(column, word)
+                mask &= found
+            return mask
+        return Predicate(term.text, 'index', count / max(row_count, 1),
+                         row_count * ROW_COSTS['lookup'] * len(words) * len(columns) + count, 0.0, full_mask=full_mask)
+
+    def compile_categorical(self, term, column, values):
+        """Terms on categoricals are tested on the categories and looked up by code."""
+        categories = values.cat.categories
+        codes = values.cat.codes.to_numpy()
+        lookup = []
+
+        def matches():
+            if not lookup:
+                lookup.append(np.append(self.category_matches(term, categories), False))  # code -1 is missing
+            return lookup[0]
+        if len(categories) <= MAX_PLANNED_CATEGORIES:
+            selectivity = self.category_counts(column)[matches()[:-1]].sum() / max(len(values), 1)
+        else:
+            selectivity = DEFAULT_SELECTIVITY[term.kind]
+        return Predicate(term.text, 'codes', selectivity, len(categories) * ROW_COSTS['text'],
+                         ROW_COSTS['codes'], test=lambda rows: matches()[subset(codes, rows)])
+
+    def compile_ordered(self, term, column, values):
+        """Terms on numbers and dates are compared on the typed values."""
+        is_date = values.dtype.kind == 'M'
+        if term.kind in ('match', 'equals'):
+            low, high, low_inclusive, high_inclusive = term.value, term.value, True, True
+        elif term.kind == 'range':
+            low, high, low_inclusive, high_inclusive = term.value
+        else:
+            # Text conditions test the distinct values as text
+            codes, uniques = pd.factorize(values)
+            matches = np.append(self.category_matches(term, pd.Index(uniques).astype(str)), False)
+            return Predicate(term.text, 'codes', DEFAULT_SELECTIVITY[term.kind], len(uniques) * ROW_COSTS['text'],
+                             ROW_COSTS['codes'], test=lambda rows: matches[subset(codes, rows)])
+        statistics = self.statistics.get(str(column))
+        if is_date:
+            array = values.to_numpy()
+            stamps = [None, None]
+            if low is not None:
+                stamps[0] = date_bound(low, False)[0]
+                low = stamps[0].to_datetime64().astype(array.dtype)
+            if high is not None:
+                stamps[1], exclusive = date_bound(high, True)
+                high_inclusive = high_inclusive if exclusive is None else False
+                high = stamps[1].to_datetime64().astype(array.dtype)
+            if statistics is not None:
+                # Statistics count dates in seconds since 1970
+                selectivity = statistics.range_share(*[None if stamp is None else stamp.timestamp()
+                                                       for stamp in stamps])
+            else:
+                numbers = array[~np.isnat(array)].view(np.int64)
+                selectivity = estimate_range(self.value_range(column, numbers),
+                                             *[None if bound is None else float(bound.view(np.int64))
+                                               for bound in (low, high)])
+        else:
+            if isinstance(values.dtype, np.dtype):
+                array = values.to_numpy()
+            else:
+                array = values.to_numpy(dtype=np.float64, na_value=np.nan)  # nullable integers
+            try:
+                low, high = [None if bound is None else float(bound) for bound in (low, high)]
+            except ValueError:
+                raise QueryError(f"Keine Zahl: {term.text}")
+            if statistics is not None:
+                selectivity = statistics.range_share(low, high)
+            else:
+                selectivity = estimate_range(self.value_range(column, array), low, high)
+        return Predicate(term.text, 'compare', selectivity, 0.0, ROW_COSTS['compare'],
+                         test=lambda rows: range_test(subset(array, rows), low, high, low_inclusive, high_inclusive))
+
+    def compile_text(self, term, column, values):
+        name = str(column)
+        substrings = self.index.substrings.get(name) if self.index is not None else None
+        if (term.kind in ('contains', 'ends_with') and substrings is not None
+                and len(substrings.codes) == len(values)):
+            return Predicate(term.text, 'substrings', DEFAULT_SELECTIVITY[term.kind], len(values) * ROW_COSTS['lookup'],
+                             0.0, full_mask=lambda: substrings.mask(term.kind, term.value, self.case_sensitive))
+        if term.kind == 'regex':
+            self.check_regex(term)
+        method = {'match': 'words', 'regex': 'regex'}.get(term.kind, 'text')
+        selectivity = DEFAULT_SELECTIVITY[term.kind]
+        statistics = self.statistics.get(name)
+        if term.kind == 'equals' and statistics is not None:
+            selectivity = statistics.value_share(term.value)
+        if term.kind == 'range':
+            low, high, low_inclusive, high_inclusive = term.value
+            return Predicate(term.text, 'compare', selectivity, 0.0, ROW_COSTS['text'],
+                             test=lambda rows: range_test(subset(values, rows), low, high,
+                                                          low_inclusive, high_inclusive))
+        if term.kind == 'match':
+            words = tokenize(term.value)
+            return Predicate(term.text, method, selectivity, 0.0, ROW_COSTS[method],
+                             test=lambda rows: word_mask(subset(values, rows), words))
+        return Predicate(term.text, method, selectivity, 0.0, ROW_COSTS[method],
+                         test=lambda rows: text_test(subset(values, rows), term.kind, term.value, self.case_sensitive))
+
+    def compile_all_columns(self, term):
+        """Bare words are looked up in every text column, like the quick search."""
+        columns = [column for column in self.data.columns if is_text_column(self.data[column])]
+        if not columns:
+            raise QueryError(f"Keine Textspalten für {term.text}")
+        if term.kind == 'regex':
+            self.check_regex(term)
+            children = [self.compile_term(Term(str(column), 'regex', term.value, f"{column}:{term.text}"))
+                        for column in columns]
+            return children[0] if len(children) == 1 else Disjunction(children, len(self.data))
+        if all(self.indexed(column) for column in columns):
+            return self.compile_index(term, [str(column) for column in columns])
+        words = tokenize(term.value)
+        if not words:
+            raise QueryError(f"Keine Wörter in {term.text}")
+        children = []
+        for word in words:
+            matches = [self.compile_term(Term(str(column), 'match', word, f"{column}:{word}")) for column in columns]
+            children.append(matches[0] if len(matches) == 1 else Disjunction(matches, len(self.data)))
+        return children[0] if len(children) == 1 else Conjunction(children, len(self.data))
+
+
+def subset(values, rows):
+    """The values of the given rows of an array or a Series, without copying if they are all rows."""
+    if len(rows) == len(values):
+        return values
+    return values.iloc[rows] if isinstance(values, pd.Series) else values[rows]
+
+
+def estimate_range(value_range, low, high):
+    """Share of values in [low, high], assuming they are spread evenly over their range."""
+    if value_range is None:
+        return 0.0
+    smallest, largest = value_range
+    low = smallest if low is None else max(low, smallest)
+    high = largest if high is None else min(high, largest)
+    if high < low:
+        return 0.0
+    if largest == smallest:
+        return 1.0
+    # A single value still matches some rows
+    return max((high - low) / (largest - smallest), 1.0 / 1000)
+
+
+class CompiledQuery:
+    """A query ready to run on one catalog, with an explanation of its plan."""
+
+    def __init__(self, query, data, index=None, case_sensitive=False, statistics=None):
+        self.query = query
+        self.row_count = len(data)
+        started = time.perf_counter()
+        self.plan = QueryCompiler(data, index, case_sensitive, statistics).compile(parse_query(query))
+        self.compile_seconds = time.perf_counter() - started
+
+    def rows(self):
+        """Sorted positions of the matching rows."""
+        return self.plan.run(np.arange(self.row_count))
+
+    def mask(self):
+        mask = np.zeros(self.row_count, dtype=bool)
+        mask[self.rows()] = True
+        return mask
+
+    def explain(self):
+        """Describe the chosen order, with measurements if the query was run."""
+        lines = [f"Abfrage: {self.query}",
+                 f"Geschätzte Treffer: {self.plan.selectivity * self.row_count:.0f} von {self.row_count} Zeilen, "
+                 f"Plan erstellt in {self.compile_seconds * 1000:.1f} ms"]
+        lines.extend(self.plan.explain(0))
+        if self.plan.seconds is not None:
+            lines.append(f"Ausgeführt in {self.plan.seconds * 1000:.1f} ms, {self.plan.rows_out} Treffer")
+        return "\n".join(lines)
+
+
+def query_mask(data, query, index=None, case_sensitive=False, statistics=None):
+    """Evaluate a query on a DataFrame as a boolean mask."""
+    return CompiledQuery(query, data, index, case_sensitive, statistics).mask()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import csv
+import os
+import sqlite3
+import tempfile
+import numpy as np
+import pandas as pd
+
+from csv_loader import resolve_dialect, read_csv_kwargs
+from merge_engine import (APPEND, UNION, INTERSECTION, UPDATE,
+                          KEEP_FIRST, KEEP_LAST, KEEP_LONGER, MERGE_VALUES, MERGE_SEPARATOR,
+                          LOAD, WRITE, row_fingerprints)
+
+# Stands in for a missing key, so rows without a key still collapse into one
+MISSING_KEY = "\x00"
+
+
+class StreamingMerger:
+    """Merge CSV files chunk by chunk with bounded memory.
+
+    Rows are upserted into an on-disk SQLite table keyed by the match column
+    (or by a fingerprint of the whole row where no match column applies) and
+    written to the output ordered by first appearance. All values are handled as text, and
+    conflicts follow the cell-wise semantics of the "Aktualisieren" strategy:
+    missing values never overwrite existing ones.
+
+    "Aktualisieren" itself keeps the rows as a sequence instead, so that
+    it yields the same rows as merge_engine.upsert (see update_rows), and
+    the intersection writes the columns of merge_engine.intersect_frames
+    (see intersect_rows).
+
+    progress is called as progress(stage, percent, rows) after every chunk,
+    with the number of rows read or written so far, and may raise
+    MergeCancelled to abort the merge.
+    """
+
+    def __init__(self, file_paths, strategy, conflict, match_column=None,
+                 dialect_cache=None, chunk_rows=100000, progress=None, fingerprint_bits=64):
+        self.file_paths = list(file_paths)
+        self.strategy = strategy
+        self.conflict = conflict
+        self.match_column = match_column
+        self.dialect_cache = dialect_cache
+        self.chunk_rows = chunk_rows
+        self.progress = progress
+        self.fingerprint_bits = fingerprint_bits
+        self.dialects = {}
+        self.file_columns = {}
+        self.columns = []
+        self.rows_written = 0
+
+    def read_headers(self):
+        """Sniff every input and collect the union of their columns in order."""
+        for path in self.file_paths:
+            dialect = resolve_dialect(path, self.dialect_cache)
+            columns = pd.read_csv(path, nrows=0, engine='c', **read_csv_kwargs(dialect, typed=False)).columns.tolist()
+            self.dialects[path] = dialect
+            self.file_columns[path] = columns
+            for column in columns:
+                if column not in self.columns:
+                    self.columns.append(column)
+
+    def iter_chunks(self, path):
+        """Yield the rows of one input as text, aligned to the output columns,
+        together with the number of bytes of the file read so far."""
+        kwargs = read_csv_kwargs(self.dialects[path], typed=False)
+        kwargs['dtype'] = str
+        with open(path, 'rb') as handle:
+            for chunk in pd.read_csv(handle, engine='c', chunksize=self.chunk_rows, **kwargs):
+                yield chunk.reindex(columns=self.columns), handle.tell()
+
+    def key_columns(self):
+        """Columns whose values identify a row, or None to append everything."""
+        if self.match_column is not None and all(self.match_column in self.file_columns[path]
+                                                 for path in self.file_paths):
+            return [self.match_column]
+        if self.strategy == UNION:
+            return list(self.columns)
+        if self.strategy == INTERSECTION:
+            return [column for column in self.columns
+                    if all(column in self.file_columns[path] for path in self.file_paths)]
+        return None
+
+    def report(self, stage, done, total, rows=None):
+        if self.progress is not None:
+            self.progress(stage, min(100, done * 100 // max(total, 1)), rows)
+
+    def merge(self, output_path):
+        """Merge all inputs into output_path and return the number of rows written."""
+        self.read_headers()
+        key_columns = self.key_columns()
+        if key_columns is None or (self.strategy == INTERSECTION and not key_columns):
+            if self.strategy == INTERSECTION:
+                # No common columns to merge on, an empty result as in merge_engine.intersect_frames
+                pd.DataFrame().to_csv(output_path, index=False)
+                return 0
+            return self.append_all(output_path)
+
+        total_bytes = sum(os.path.getsize(path) for path in self.file_paths)
+        self.report(LOAD, 0, total_bytes, 0)
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_path))) as temp_dir:
+            connection = sqlite3.connect(os.path.join(temp_dir, "merge.sqlite"))
+            try:
+                if self.strategy == UPDATE:
+                    self.update_rows(connection, key_columns, total_bytes)
+                elif self.strategy == INTERSECTION:
+                    self.intersect_rows(connection, key_columns, total_bytes)
+                else:
+                    self.upsert_rows(connection, key_columns, total_bytes)
+                connection.commit()
+                return self.write_output(connection, output_path, key_columns)
+            finally:
+                connection.close()
+
+    def iter_records(self, key_columns, total_bytes):
+        """Yield the number of every input with the positions, keys and values of its chunks."""
+        done_bytes = 0
+        position = 0
+        for file_number, path in enumerate(self.file_paths):
+            for chunk, read_bytes in self.iter_chunks(path):
+                keys = self.row_keys(chunk, key_columns)
+                records = chunk.astype(object).where(chunk.notna(), None).itertuples(index=False)
+                yield file_number, ((position + i, key, values) for i, (key, values) in enumerate(zip(keys, records)))
+                position += len(chunk)
+                self.report(LOAD, done_bytes + read_bytes, total_bytes, position)
+            done_bytes += os.path.getsize(path)
+
+    def upsert_rows(self, connection, key_columns, total_bytes):
+        """Resolve every row against the stored row with the same key as it is read."""
+        self.create_table(connection)
+        upsert_sql = self.upsert_statement()
+        for file_number, records in self.iter_records(key_columns, total_bytes):
+            connection.executemany(upsert_sql, ((key, position, *values) for position, key, values in records))
+
+    def intersect_rows(self, connection, key_columns, total_bytes):
+        """Store the first row of every key of every input, like merge_engine.intersect_frames.
+
+        The rows of all inputs sharing a key are joined when the output is
+        written (see output_query).
+        """
+        names = [f"c{i}" for i in range(len(self.columns))]
+        value_columns = ", ".join(f"{name} TEXT" for name in names)
+        self.configure(connection)
+        connection.execute(f"CREATE TABLE rows (file INTEGER, key TEXT, pos INTEGER, {value_columns}, "
+                           f"PRIMARY KEY (file, key))")
+        insert_sql = (f"INSERT OR IGNORE INTO rows (file, key, pos, {', '.join(names)}) "
+                      f"VALUES (?, ?, ?, {', '.join('?' for _ in names)})")
+        for file_number, records in self.iter_records(key_columns, total_bytes):
+            connection.executemany(insert_sql, ((file_number, key, position, *values)
+                                                for position, key, values in records))
+
+    def update_rows(self, connection, key_columns, total_bytes):
+        """Apply every later input to the rows of the first one, like merge_engine.upsert.
+
+        Rows are stored in order of appearance without a unique key, so
+        duplicate keys of the base file stay separate rows. Each later file
+        is staged as a whole: the last of its rows with a known key updates
+        every row with that key, and its rows with new keys are appended,
+        repeated keys included.
+        """
+        names = [f"c{i}" for i in range(len(self.columns))]
+        self.create_sequence_tables(connection)
+        current = 0
+        for file_number, records in self.iter_records(key_columns, total_bytes):
+            if file_number != current:
+                self.apply_delta(connection, names)
+                current = file_number
+            table = "rows" if file_number == 0 else "delta"
+            connection.executemany(
+                f"INSERT INTO {table} (pos, key, {', '.join(names)}) VALUES (?, ?, {', '.join('?' for _ in names)})",
+                ((position, key, *values) for position, key, values in records))
+        if current:
+            self.apply_delta(connection, names)
+
+    def apply_delta(self, connection, names):
+        """Merge the staged rows of one file into the stored rows and clear the stage."""
+        if self.conflict != KEEP_FIRST:
+            updates = ", ".join(f"{name} = {self.resolve_sql(f'rows.{name}', f'latest.{name}', self.conflict)}"
+                                for name in names)
+            connection.execute(f"UPDATE rows SET {updates} FROM "
+                               f"(SELECT * FROM delta WHERE pos IN (SELECT MAX(pos) FROM delta GROUP BY key)) "
+                               f"AS latest WHERE rows.key = latest.key")
+        connection.execute(f"INSERT INTO rows (pos, key, {', '.join(names)}) "
+                           f"SELECT pos, key, {', '.join(names)} FROM delta "
+                           f"WHERE key NOT IN (SELECT key FROM rows)")
+        connection.execute("DELETE FROM delta")
+
+    def append_all(self, output_path):
+        """Concatenate the inputs without any deduplication."""
+        self.rows_written = 0
+        header = True
+        total_bytes = sum(os.path.getsize(path) for path in self.file_paths)
+        done_bytes = 0
+        for path in self.file_paths:
+            for chunk, read_bytes in self.iter_chunks(path):
+                chunk.to_csv(output_path, index=False, header=header, mode='w' if header else 'a')
+                header = False
+                self.rows_written += len(chunk)
+                self.report(WRITE, done_bytes + read_bytes, total_bytes, self.rows_written)
+            done_bytes += os.path.getsize(path)
+        if header:
+            pd.DataFrame(columns=self.columns).to_csv(output_path, index=False)
+        return self.rows_written
+
+    def row_keys(self, chunk, key_columns):
+        """Keys of the rows of a chunk: the text of a single key column, or a
+        fingerprint of several, so the table does not store every row twice."""
+        if len(key_columns) == 1:
+            return chunk[key_columns[0]].fillna(MISSING_KEY).tolist()
+        # Columns missing from a file are float, so all keys are hashed as objects
+        keys = chunk[key_columns].fillna(MISSING_KEY).astype(object)
+        fingerprints = row_fingerprints(keys, self.fingerprint_bits)
+        if self.fingerprint_bits == 64:
+            return fingerprints.view(np.int64).tolist()  # SQLite integers are signed
+        return np.ascontiguousarray(fingerprints).view('V16').ravel().tolist()
+
+    def configure(self, connection):
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("PRAGMA temp_store = FILE")
+
+    def create_table(self, connection):
+        value_columns = ", ".join(f"c{i} TEXT" for i in range(len(self.columns)))
+        self.configure(connection)
+        connection.execute(f"CREATE TABLE rows (key TEXT PRIMARY KEY, pos INTEGER, {value_columns})")
+
+    def create_sequence_tables(self, connection):
+        """Tables of the stored rows and of the staged rows of one file, in order of appearance."""
+        value_columns = ", ".join(f"c{i} TEXT" for i in range(len(self.columns)))
+        self.configure(connection)
+        for table in ("rows", "delta"):
+            connection.execute(f"CREATE TABLE {table} (pos INTEGER PRIMARY KEY, key TEXT, {value_columns})")
+            connection.execute(f"CREATE INDEX {table}_key ON {table} (key)")
+
+    @staticmethod
+    def resolve_sql(old, new, conflict):
+        """SQL expression combining a stored and an incoming value like resolve_conflict."""
+        if conflict == KEEP_LAST:
+            return f"COALESCE({new}, {old})"
+        if conflict == KEEP_LONGER:
+            return f"CASE WHEN length({new}) > length(COALESCE({old}, '')) THEN {new} ELSE {old} END"
+        if conflict == MERGE_VALUES:
+            sep = MERGE_SEPARATOR.replace("'", "''")
+            return (f"CASE WHEN {new} IS NULL THEN {old} WHEN {old} IS NULL THEN {new} "
+                    f"WHEN instr('{sep}' || {old} || '{sep}', '{sep}' || {new} || '{sep}') > 0 "
+                    f"THEN {old} ELSE {old} || '{sep}' || {new} END")
+        return old
+
+    def upsert_statement(self):
+        """SQL inserting a row or resolving it against the stored row with the same key."""
+        names = [f"c{i}" for i in range(len(self.columns))]
+        placeholders = ", ".join("?" for _ in names)
+        updates = []
+
+        conflict = self.conflict
+        if self.strategy == UNION:
+            conflict = KEEP_FIRST  # Union keeps the first occurrence, like drop_duplicates
+        elif self.strategy == APPEND and conflict == KEEP_LAST:
+            updates.append("pos = excluded.pos")  # The last occurrence also takes the last place
+
+        if conflict != KEEP_FIRST:
+            updates += [f"{name} = {self.resolve_sql(name, f'excluded.{name}', conflict)}" for name in names]
+        action = f"DO UPDATE SET {', '.join(updates)}" if updates else "DO NOTHING"
+        return (f"INSERT INTO rows (key, pos, {', '.join(names)}) "
+                f"VALUES (?, ?, {placeholders}) ON CONFLICT(key) {action}")
+
+    def output_query(self, connection, key_columns):
+        """Header and SQL query of the output rows in order of appearance.
+
+        The intersection joins the rows of every input with the same key.
+        Its key columns come first, followed by the other columns of each
+        input, suffixed with the 1-based number of the input where several
+        inputs have them, as in merge_engine.intersect_frames.
+        """
+        if self.strategy != INTERSECTION:
+            connection.execute("CREATE INDEX rows_pos ON rows (pos)")
+            names = ", ".join(f"c{i}" for i in range(len(self.columns)))
+            return self.columns, f"SELECT {names} FROM rows ORDER BY pos"
+
+        connection.execute("CREATE INDEX rows_pos ON rows (file, pos)")
+        column_counts = {}
+        for path in self.file_paths:
+            for column in self.file_columns[path]:
+                if column not in key_columns:
+                    column_counts[column] = column_counts.get(column, 0) + 1
+        header = list(key_columns)
+        selected = [f"r0.c{self.columns.index(column)}" for column in key_columns]
+        joins = []
+        for number, path in enumerate(self.file_paths, 1):
+            for column in self.file_columns[path]:
+                if column not in key_columns:
+                    header.append(f"{column}_{number}" if column_counts[column] > 1 else column)
+                    selected.append(f"r{number - 1}.c{self.columns.index(column)}")
+            if number > 1:
+                joins.append(f"JOIN rows AS r{number - 1} ON r{number - 1}.file = {number - 1} "
+                             f"AND r{number - 1}.key = r0.key")
+        return header, (f"SELECT {', '.join(selected)} FROM rows AS r0 {' '.join(joins)} "
+                        f"WHERE r0.file = 0 ORDER BY r0.pos")
+
+    def write_output(self, connection, output_path, key_columns):
+        """Stream the merged rows to the output file in order of appearance."""
+        self.report(WRITE, 0, 1, 0)
+        header, query = self.output_query(connection, key_columns)
+        total_rows = connection.execute(f"SELECT count(*) FROM ({query})").fetchone()[0]
+        cursor = connection.execute(query)
+
+        self.rows_written = 0
+        with open(output_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(header)
+            while True:
+                rows = cursor.fetchmany(self.chunk_rows)
+                if not rows:
+                    break
+                writer.writerows(rows)
+                self.rows_written += len(rows)
+                self.report(WRITE, self.rows_written, total_rows, self.rows_written)
+        return self.rows_written
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+
+
+def has_digit_run(lowered, length):
+    """Whether some text of the column holds at least length digits in a row."""
+    return bool(lowered.str.contains(rf'\d{{{length}}}', regex=True).any())
+
+
+def longest_digit_run(lowered):
+    """Length of the longest run of digits in a column of text, found by doubling and bisecting."""
+    low, high = 0, 1
+    while has_digit_run(lowered, high):
+        low, high = high, high * 2
+    while high - low > 1:
+        middle = (low + high) // 2
+        if has_digit_run(lowered, middle):
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def natural_text(lowered):
+    """Text whose character order is the natural order ("box 2" before "box 10").
+
+    Every run of digits is zero-padded to the longest run of the column,
+    one whole-column regular expression per run length: a marker is put
+    in front of every run, and the runs of each shorter length replace
+    their marker by their padding.
+    """
+    width = longest_digit_run(lowered)
+    if not width:
+        return lowered
+    padded = lowered.str.replace('\x01', '', regex=False).str.replace(r'(\d+)', '\x01\\1', regex=True)
+    for length in range(1, width):
+        # The padding comes before the groups, so no zero is read as part of a group number
+        padded = padded.str.replace(rf'\x01(\d{{{length}}})(\D|$)', '0' * (width - length) + r'\1\2', regex=True)
+    # Only the longest runs are left, which need no padding
+    return padded.str.replace('\x01', '', regex=False)
+
+
+def ordered_ranks(lowered):
+    """Rank of every string among the distinct strings in natural order, NaN if missing.
+
+    The strings are sorted by their natural_text. Where digits have leading
+    zeros, strings equal as numbers ("07", "7") share a natural_text, so
+    they are sorted in character order first to stay apart in that order.
+    Equal neighbours share a rank.
+    """
+    lowered = lowered.reset_index(drop=True)
+    natural = natural_text(lowered)
+    if natural is lowered or not lowered.str.contains(r'(?:^|\D)0\d', regex=True).any():
+        order = natural.sort_values(kind='stable', na_position='last').index.to_numpy()
+    else:
+        order = lowered.sort_values(kind='stable', na_position='last').index.to_numpy()
+        resorted = natural.iloc[order].reset_index(drop=True).sort_values(kind='stable', na_position='last')
+        order = order[resorted.index.to_numpy()]
+    present = int(lowered.notna().sum())
+    ordered = lowered.iloc[order[:present]].array
+    starts = np.ones(present, dtype=bool)
+    starts[1:] = np.asarray(ordered[1:] != ordered[:-1], dtype=bool)
+    key = np.full(len(lowered), np.nan)
+    key[order[:present]] = np.cumsum(starts) - 1
+    return key
+
+
+def text_key(values, sample=10000):
+    """Case-insensitive rank of every text value, NaN if missing.
+
+    Text repeating within the first rows is factorized first, so only its
+    distinct values are sorted.
+    """
+    lowered = values.astype(str).str.lower()
+    head = lowered.iloc[:sample]
+    if head.nunique() * 2 <= len(head):
+        codes, labels = pd.factorize(lowered)
+        # Code -1 marks a missing value and picks the trailing NaN
+        return np.append(ordered_ranks(pd.Series(labels)), np.nan)[codes]
+    return ordered_ranks(lowered)
+
+
+def sort_key(values):
+    """Return a float array whose ascending order is the order of the column.
+
+    Numbers keep their value, dates become ticks of their unit, categories the key
+    of their category and text its rank (see ordered_ranks). Missing values
+    are NaN, which a NumPy sort places last.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        category_key = sort_key(pd.Series(values.cat.categories))
+        # Code -1 marks a missing value and picks the trailing NaN
+        return np.append(category_key, np.nan)[values.cat.codes.to_numpy()]
+    if values.dtype.kind in 'iufb':
+        return values.to_numpy(dtype=np.float64, na_value=np.nan)
+    if values.dtype.kind == 'M':
+        if getattr(values.dtype, 'tz', None) is not None:
+            values = values.dt.tz_convert(None)
+        # Counted in the column's own unit, as nanoseconds only reach from 1677 to 2262
+        array = values.to_numpy()
+        key = array.view(np.int64).astype(np.float64)
+        key[np.isnat(array)] = np.nan
+        return key
+    return text_key(values)
+
+
+def ascending_order(key):
+    """Stable permutation sorting a key, with the number of present (non-NaN) values."""
+    order = np.argsort(key, kind='stable')
+    return order, len(key) - int(np.count_nonzero(np.isnan(key)))
+
+
+def descending_order(order, present):
+    """Reverse an ascending permutation while keeping missing values last."""
+    return np.concatenate((order[:present][::-1], order[present:]))
+
+
+def lexsort_key(key, descending=False):
+    """Key for np.lexsort ordering like a sort key, with missing values last in both directions.
+
+    Whole numbers spanning a small range, such as the ranks of categories
+    and text or years, become offsets in the smallest integer type, which
+    NumPy sorts by radix sort instead of comparisons.
+    """
+    missing = np.isnan(key)
+    present = key[~missing]
+    if not len(present):
+        return np.zeros(len(key), dtype=np.int8)
+    low, high = present.min(), present.max()
+    if high - low < 2 ** 31 - 1 and np.array_equal(present, np.floor(present)):
+        span = int(high - low)
+        offsets = high - key if descending else key - low
+        offsets[missing] = span + 1
+        return offsets.astype(np.min_scalar_type(span + 1))
+    return -key if descending else key
+
+
+def composite_order(keys, descending):
+    """Stable permutation sorting by several keys, the first one deciding first."""
+    return np.lexsort([lexsort_key(key, desc) for key, desc in zip(reversed(keys), reversed(descending))])
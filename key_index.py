@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import csv
+import hashlib
+import io
+import json
+import mmap
+import os
+import tempfile
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from catalog_cache import file_fingerprint, quick_hash
+from csv_loader import read_csv_kwargs
+from merge_engine import LOAD, ALIGN, WRITE, upsert
+from row_index import CSVRowIndex
+
+# Stands in for a missing key when hashing
+MISSING_KEY = "\x00"
+
+
+def key_hashes(keys):
+    """64-bit hashes of a Series of keys read as text."""
+    keys = keys.astype(object).where(keys.notna(), MISSING_KEY)
+    return pd.util.hash_pandas_object(keys, index=False, categorize=False).to_numpy()
+
+
+def text_kwargs(dialect):
+    """Keyword arguments for pd.read_csv that read every value as text."""
+    kwargs = read_csv_kwargs(dialect, typed=False)
+    kwargs['dtype'] = str
+    return kwargs
+
+
+class MasterKeyIndex:
+    """Sorted index of the keys of a master CSV file and the byte range of each row.
+
+    With the index, delta files can be merged into the master with the
+    "Aktualisieren" strategy by parsing only the master rows whose keys
+    occur in the deltas. All other rows are copied to the output byte for
+    byte, and the index of the output is derived from the old one instead
+    of being rebuilt, so the next delta again only costs its own size.
+
+    Values are handled as text, like in the streaming merge. Each line of
+    the master must hold one record, as quoted line breaks are not
+    supported.
+    """
+
+    def __init__(self, index_dir, file_path, key_column, dialect, max_entries=10):
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(exist_ok=True)
+        self.file_path = file_path
+        self.key_column = key_column
+        self.dialect = dialect
+        self.max_entries = max_entries
+        self.hashes = None  # sorted key hashes
+        self.rows = None  # row number of every hash
+        self.starts = None  # byte offset of every row, followed by the end of the data
+        self.columns = []
+
+    def _base_path(self, file_path):
+        name = f"{os.path.abspath(file_path)}\x1f{self.key_column}"
+        return self.index_dir / hashlib.blake2b(name.encode(), digest_size=8).hexdigest()
+
+    def load(self):
+        """Load the stored index if the master has not changed since; return success."""
+        base_path = self._base_path(self.file_path)
+        try:
+            with open(base_path.with_suffix(".json"), "r") as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+        fingerprint = file_fingerprint(self.file_path)
+        if (manifest['size'] != fingerprint['size'] or manifest['mtime'] != fingerprint['mtime']
+                or manifest['hash'] != quick_hash(self.file_path)):
+            return False
+        try:
+            with np.load(base_path.with_suffix(".npz")) as arrays:
+                self.hashes, self.rows, self.starts = arrays['hashes'], arrays['rows'], arrays['starts']
+        except Exception as e:
+            print(f"Error reading key index for {self.file_path}: {e}")
+            return False
+        self.columns = manifest['columns']
+        return True
+
+    def build(self, progress=None):
+        """Index the master from scratch: one scan for the row offsets, one parse of the key column."""
+        if self.dialect['encoding'] == 'utf-16':
+            raise ValueError("UTF-16-Dateien können nicht indiziert werden")
+        row_index = CSVRowIndex(self.file_path, self.dialect, stride=1)
+        try:
+            row_index.build(progress=lambda percent, rows: progress(LOAD, percent // 2) if progress else None)
+            self.columns = row_index.columns
+            starts = np.frombuffer(row_index.offsets, dtype=np.uint64).astype(np.int64)
+        finally:
+            row_index.close()
+        if self.key_column not in self.columns:
+            raise ValueError(f"Die Spalte {self.key_column} fehlt in {os.path.basename(self.file_path)}")
+
+        keys = pd.read_csv(self.file_path, usecols=[self.key_column], skip_blank_lines=False,
+                           engine='c', **text_kwargs(self.dialect))[self.key_column]
+        if len(keys) != len(starts):
+            raise ValueError("Die Datei enthält Zeilenumbrüche innerhalb von Feldern und kann nicht indiziert werden")
+        if progress is not None:
+            progress(LOAD, 100)
+
+        self.starts = np.append(starts, os.path.getsize(self.file_path))
+        hashes = key_hashes(keys)
+        self.rows = np.argsort(hashes, kind='stable')
+        self.hashes = hashes[self.rows]
+
+    def save(self):
+        """Store the index of the current master file."""
+        base_path = self._base_path(self.file_path)
+        manifest = file_fingerprint(self.file_path)
+        manifest['hash'] = quick_hash(self.file_path)
+        manifest['key_column'] = self.key_column
+        manifest['columns'] = self.columns
+        try:
+            np.savez(base_path.with_suffix(".npz"), hashes=self.hashes, rows=self.rows, starts=self.starts)
+            # The manifest is written last so an interrupted write is never trusted
+            with open(base_path.with_suffix(".json"), "w") as f:
+                json.dump(manifest, f, indent=4)
+            self._evict()
+        except Exception as e:
+            print(f"Error writing key index for {self.file_path}: {e}")
+
+    def _evict(self):
+        """Remove the oldest indexes beyond max_entries."""
+        manifests = sorted(self.index_dir.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        for manifest_path in manifests[:-self.max_entries]:
+            for path in (manifest_path.with_suffix(".npz"), manifest_path):
+                if path.exists():
+                    path.unlink()
+
+    def ensure(self, progress=None):
+        """Load the stored index, or build and store it if it is missing or stale."""
+        if not self.load():
+            self.build(progress)
+            self.save()
+
+    def candidate_rows(self, hashes):
+        """Rows of the master whose key hash is among hashes, in file order."""
+        hashes = np.unique(hashes)
+        lower = np.searchsorted(self.hashes, hashes, side='left')
+        upper = np.searchsorted(self.hashes, hashes, side='right')
+        found = upper > lower
+        if not found.any():
+            return np.empty(0, dtype=np.int64)
+        rows = np.concatenate([self.rows[begin:end] for begin, end in zip(lower[found], upper[found])])
+        return np.sort(rows)
+
+    def read_rows(self, source, rows):
+        """Parse the given rows of the master as text."""
+        header = bytes(source[:self.starts[0]])
+        lines = []
+        for row in rows:
+            line = bytes(source[self.starts[row]:self.starts[row + 1]])
+            lines.append(line if line.endswith(b'\n') else line + b'\n')
+        data = pd.read_csv(io.BytesIO(header + b''.join(lines)), skip_blank_lines=False,
+                           engine='c', **text_kwargs(self.dialect))
+        return data.reindex(columns=self.columns)
+
+    def upsert(self, deltas, conflict, output_path, progress=None):
+        """Write the master updated by the delta DataFrames to output_path.
+
+        Returns the number of rows written. The index is updated to describe
+        the output and stored for it.
+        """
+        def report(stage, percent, rows=None):
+            if progress is not None:
+                progress(stage, percent, rows)
+
+        row_count = len(self.starts) - 1
+        report(ALIGN, 0, row_count + sum(len(delta) for delta in deltas))
+        delta_keys = pd.concat([delta[self.key_column] for delta in deltas], ignore_index=True)
+        with open(self.file_path, 'rb') as f:
+            size = os.path.getsize(self.file_path)
+            source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+            try:
+                # Hash matches are confirmed on the parsed key, so collisions do no harm
+                rows = self.candidate_rows(key_hashes(delta_keys))
+                original = self.read_rows(source, rows)
+                matches = original[self.key_column].isin(delta_keys).to_numpy()
+                rows, original = rows[matches], original[matches].reset_index(drop=True)
+
+                merged = original
+                for i, delta in enumerate(deltas):
+                    merged = upsert(merged, delta, self.key_column, conflict)
+                    report(ALIGN, (i + 1) * 100 // len(deltas))
+                merged = merged.reindex(columns=self.columns)
+                updated, appended = merged.iloc[:len(rows)], merged.iloc[len(rows):]
+                unchanged = ((original == updated) | (original.isna() & updated.isna())).all(axis=1).to_numpy()
+                rows, updated = rows[~unchanged], updated[~unchanged]
+                report(ALIGN, 100, row_count + len(appended))
+
+                self.write_output(source, size, output_path, rows, updated, appended, report)
+            finally:
+                if isinstance(source, mmap.mmap):
+                    source.close()
+        return len(self.starts) - 1
+
+    def encode_rows(self, data, terminator):
+        """Serialize rows in the master's dialect, one bytes object per row."""
+        encoding = 'utf-8' if self.dialect['encoding'] == 'utf-8-sig' else self.dialect['encoding']
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=self.dialect['sep'], quotechar=self.dialect['quotechar'],
+                            doublequote=self.dialect['doublequote'], lineterminator=terminator)
+        lines = []
+        for values in data.astype(object).where(data.notna(), "").itertuples(index=False):
+            writer.writerow(values)
+            lines.append(buffer.getvalue().encode(encoding))
+            buffer.seek(0)
+            buffer.truncate()
+        return lines
+
+    def write_output(self, source, size, output_path, rows, updated, appended, report, block_size=16 * 1024 * 1024):
+        """Copy the master with replaced and appended rows, then update the index."""
+        terminator = b'\r\n' if bytes(source[max(self.starts[0] - 2, 0):self.starts[0]]) == b'\r\n' else b'\n'
+        updated_lines = self.encode_rows(updated, terminator.decode())
+        appended_lines = self.encode_rows(appended, terminator.decode())
+        row_count = len(self.starts) - 1
+        # A replaced last row brings its own line break
+        last_replaced = len(rows) > 0 and rows[-1] == row_count - 1
+        missing_newline = size > self.starts[0] and bytes(source[size - 1:size]) != b'\n' and not last_replaced
+
+        def copy(begin, end):
+            for position in range(begin, end, block_size):
+                output.write(source[position:min(position + block_size, end)])
+
+        report(WRITE, 0, 0)
+        directory = os.path.dirname(os.path.abspath(output_path))
+        handle, temp_path = tempfile.mkstemp(suffix=".csv", dir=directory)
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                cursor = 0
+                for i, (row, line) in enumerate(zip(rows, updated_lines)):
+                    copy(cursor, self.starts[row])
+                    output.write(line)
+                    cursor = self.starts[row + 1]
+                    report(WRITE, i * 90 // len(rows))
+                copy(cursor, size)
+                if missing_newline and appended_lines:
+                    output.write(terminator)
+                output.writelines(appended_lines)
+            # Written beside the output and moved into place, so the master may be its own output
+            os.replace(temp_path, output_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        # Shift the offsets of the rows behind every replaced row
+        lengths = np.diff(self.starts)
+        lengths[rows] = [len(line) for line in updated_lines]
+        if missing_newline and appended_lines:
+            lengths[-1] += len(terminator)
+        lengths = np.concatenate([lengths, np.array([len(line) for line in appended_lines], dtype=np.int64)])
+        self.starts = self.starts[0] + np.concatenate([[0], np.cumsum(lengths)])
+
+        if len(appended):
+            new_hashes = key_hashes(appended[self.key_column])
+            order = np.argsort(new_hashes, kind='stable')
+            positions = np.searchsorted(self.hashes, new_hashes[order], side='right')
+            self.hashes = np.insert(self.hashes, positions, new_hashes[order])
+            self.rows = np.insert(self.rows, positions, row_count + order)
+
+        self.file_path = output_path
+        self.save()
+        report(WRITE, 100, row_count + len(appended))
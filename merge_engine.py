@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import warnings
+import numpy as np
+import pandas as pd
+
+# Merge strategies, in the order of CSVMergerDialog.merge_strategy_combo
+APPEND, UNION, INTERSECTION, UPDATE = range(4)
+
+# Conflict resolutions, in the order of CSVMergerDialog.conflict_resolution_combo
+KEEP_FIRST, KEEP_LAST, KEEP_LONGER, MERGE_VALUES = range(4)
+
+# Separator placed between distinct values by MERGE_VALUES
+MERGE_SEPARATOR = "; "
+
+# Hash keys of the two halves of a 128-bit row fingerprint
+FINGERPRINT_KEYS = ("0123456789123456", "fedcba9876543210")
+
+
+# Merge stages reported to the progress callback, in the order they run
+LOAD, ALIGN, DEDUPE, WRITE = "load", "align", "dedupe", "write"
+
+
+class MergeCancelled(Exception):
+    """Raised from a progress callback to stop a running merge."""
+
+
+def merge_frames(dfs, strategy, conflict, match_column=None, progress=None, verify_duplicates=False):
+    """Merge a list of DataFrames with the given strategy and conflict resolution.
+    
+    progress, if given, is called as progress(stage, percent, rows) between
+    the steps of the merge, with the number of rows at that point, and may
+    raise MergeCancelled to abort it.
+    verify_duplicates makes the union compare rows whose fingerprints
+    match, instead of trusting the fingerprint.
+    """
+    def report(stage, percent, rows=None):
+        if progress is not None:
+            progress(stage, percent, rows)
+
+    if strategy == APPEND:
+        report(ALIGN, 0, sum(len(df) for df in dfs))
+        result = pd.concat(dfs, ignore_index=True)
+        report(ALIGN, 100, len(result))
+
+        # Handle duplicates based on conflict resolution
+        if match_column is not None and match_column in result.columns:
+            report(DEDUPE, 0, len(result))
+            if conflict == KEEP_FIRST:
+                result = result.drop_duplicates(subset=match_column, keep='first')
+            elif conflict == KEEP_LAST:
+                result = result.drop_duplicates(subset=match_column, keep='last')
+            else:
+                result = reduce_groups(result, match_column, conflict)
+            report(DEDUPE, 100, len(result))
+
+    elif strategy == UNION:
+        # Concatenate all and remove duplicates
+        report(ALIGN, 0, sum(len(df) for df in dfs))
+        result = pd.concat(dfs, ignore_index=True)
+        report(ALIGN, 100, len(result))
+        report(DEDUPE, 0, len(result))
+        if match_column is not None and match_column in result.columns:
+            result = result.drop_duplicates(subset=match_column)
+        else:
+            result = drop_duplicate_rows(result, verify=verify_duplicates)
+        report(DEDUPE, 100, len(result))
+
+    elif strategy == INTERSECTION:
+        report(ALIGN, 0, sum(len(df) for df in dfs))
+        result = intersect_frames(dfs, match_column, report)
+        report(ALIGN, 100, len(result))
+
+    elif strategy == UPDATE:
+        result = dfs[0].reset_index(drop=True)
+        report(ALIGN, 0, sum(len(df) for df in dfs))
+        for i, df in enumerate(dfs[1:], 1):
+            report(ALIGN, (i - 1) * 100 // (len(dfs) - 1))
+            if match_column is not None and match_column in result.columns and match_column in df.columns:
+                result = upsert(result, df, match_column, conflict)
+            else:
+                # Without a match column, just append
+                result = pd.concat([result, df], ignore_index=True)
+        report(ALIGN, 100, len(result))
+
+    else:
+        raise ValueError(f"Unbekannte Strategie: {strategy}")
+
+    return result
+
+
+def row_fingerprints(df, bits=64):
+    """Hash every row of a DataFrame into a compact fingerprint.
+    
+    Returns a uint64 array for 64 bits, or an (n, 2) uint64 array for 128
+    bits. Hashing runs column by column in vectorized code, so it is far
+    cheaper than comparing rows of object columns directly.
+    """
+    if bits not in (64, 128):
+        raise ValueError(f"Nicht unterstützte Fingerabdruck-Länge: {bits}")
+    halves = []
+    for hash_key in FINGERPRINT_KEYS[:bits // 64]:
+        fingerprint = np.full(len(df), 0x345678, dtype=np.uint64)
+        for i in range(df.shape[1]):
+            values = df.iloc[:, i]
+            # Hashing the distinct values first only pays off for repetitive columns
+            sample = values.iloc[:10000]
+            categorize = sample.nunique(dropna=False) < len(sample) // 2
+            hashes = pd.util.hash_pandas_object(values, index=False, hash_key=hash_key,
+                                                categorize=categorize).to_numpy()
+            fingerprint = (fingerprint ^ hashes) * np.uint64(1000003 + 2 * i)
+        halves.append(fingerprint)
+    return halves[0] if bits == 64 else np.column_stack(halves)
+
+
+def drop_duplicate_rows(df, bits=64, verify=False):
+    """Drop rows that repeat an earlier row, comparing row fingerprints.
+    
+    With verify, every row dropped is compared with the first row of the
+    same fingerprint; where they differ, the rows sharing that fingerprint
+    are deduplicated by their values instead.
+    """
+    fingerprints = pd.DataFrame(row_fingerprints(df, bits).reshape(len(df), -1))
+    duplicated = fingerprints.duplicated().to_numpy(copy=True)
+
+    if verify and duplicated.any():
+        codes = fingerprints.groupby(list(fingerprints.columns), sort=False).ngroup().to_numpy()
+        first_rows = np.zeros(codes.max() + 1, dtype=np.int64)
+        first_rows[codes[::-1]] = np.arange(len(codes))[::-1]
+        rows = np.flatnonzero(duplicated)
+        equal = np.ones(len(rows), dtype=bool)
+        for column in range(df.shape[1]):
+            values = df.iloc[:, column]
+            dropped = values.iloc[rows].to_numpy()
+            kept = values.iloc[first_rows[codes[rows]]].to_numpy()
+            equal &= (dropped == kept) | (pd.isna(dropped) & pd.isna(kept))
+        if not equal.all():
+            colliding = np.isin(codes, codes[rows[~equal]])
+            duplicated[colliding] = df[colliding].duplicated().to_numpy()
+
+    return df[~duplicated]
+
+
+def intersect_frames(dfs, match_column=None, progress=None):
+    """Return one row for every key that occurs in all DataFrames.
+    
+    Rows are matched on the match column, or on all columns the inputs have
+    in common. The distinct keys of the smallest input are probed against
+    the other inputs from small to large, so the key set never outgrows
+    the smallest input. Each input contributes the first row of every key;
+    a column found in several inputs is suffixed with the 1-based number
+    of its input, e.g. "Titel_2". Rows keep the order of the first input.
+    """
+    if match_column is not None and all(match_column in df.columns for df in dfs):
+        key_columns = [match_column]
+    else:
+        key_columns = [column for column in dfs[0].columns if all(column in df.columns for df in dfs[1:])]
+    if not key_columns:
+        return pd.DataFrame()  # No common columns to merge on
+
+    keys = frame_keys(dfs, key_columns)
+    by_size = sorted(range(len(dfs)), key=lambda i: len(dfs[i]))
+    common = pd.unique(keys[by_size[0]])
+    for done, i in enumerate(by_size[1:], 1):
+        if progress is not None:
+            progress(ALIGN, done * 100 // len(dfs))
+        # The hash table is built from the common keys and probed with the larger input
+        common = pd.unique(keys[i][keys[i].isin(common)])
+
+    # Non-key columns that occur in more than one input need a suffix
+    column_counts = {}
+    for df in dfs:
+        for column in df.columns:
+            if column not in key_columns:
+                column_counts[column] = column_counts.get(column, 0) + 1
+
+    parts = []
+    for number, (df, df_keys) in enumerate(zip(dfs, keys), 1):
+        rows = np.flatnonzero((df_keys.isin(common) & ~df_keys.duplicated()).to_numpy())
+        part = df.iloc[rows]
+        part.index = pd.Index(df_keys.to_numpy()[rows])
+        if number == 1:
+            parts.append(part[key_columns])
+            order = part.index
+        part = part.drop(columns=key_columns)
+        part.columns = [f"{column}_{number}" if column_counts[column] > 1 else column for column in part.columns]
+        parts.append(part.reindex(order))
+    return pd.concat(parts, axis=1).reset_index(drop=True)
+
+
+def frame_keys(dfs, key_columns):
+    """Key of every row of every DataFrame: the value of a single key column, or a hash of several.
+    
+    Several key columns are factorized across all DataFrames together before
+    hashing, so equal values get equal keys even where the inputs parsed
+    them into different dtypes, such as int64 and float64.
+    """
+    if len(key_columns) == 1:
+        return [df[key_columns[0]].reset_index(drop=True) for df in dfs]
+    codes = pd.DataFrame({i: pd.factorize(pd.concat([df[column] for df in dfs], ignore_index=True))[0]
+                          for i, column in enumerate(key_columns)})
+    hashes = pd.util.hash_pandas_object(codes, index=False).to_numpy()
+    bounds = np.cumsum([0] + [len(df) for df in dfs])
+    return [pd.Series(hashes[start:end]) for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def upsert(base, delta, match_column, conflict):
+    """Update rows of base whose key occurs in delta and append the new keys.
+
+    Both frames are aligned on the match column in one step, so the cost is
+    linear in the number of rows instead of one scan of base per delta row.
+    Later rows of delta win over earlier ones with the same key, and missing
+    values in delta never overwrite existing values.
+    """
+    base = base.reset_index(drop=True)
+    base_keys = base[match_column]
+    in_base = delta[match_column].isin(base_keys)
+
+    if conflict != KEEP_FIRST and in_base.any():
+        updates = delta[in_base].drop_duplicates(subset=match_column, keep='last').set_index(match_column)
+        target = base_keys.isin(updates.index).to_numpy()
+        # One row of updates per matching row of base, duplicates in base included
+        incoming = updates.reindex(base_keys[target])
+
+        for column in updates.columns:
+            new = pd.Series(incoming[column].to_numpy(), index=base.index[target])
+            if column not in base.columns:
+                base[column] = pd.Series(np.nan, index=base.index, dtype=object)
+            old = base.loc[target, column]
+            resolved = resolve_conflict(old, new, conflict)
+            changed = (resolved.notna() & (resolved != old)).to_numpy()
+            if changed.any():
+                mask = np.zeros(len(base), dtype=bool)
+                mask[np.flatnonzero(target)[changed]] = True
+                base[column] = set_values(base[column], mask, resolved[changed].to_numpy())
+
+    # Add new rows
+    new_rows = delta[~in_base]
+    return pd.concat([base, new_rows], ignore_index=True)
+
+
+def reduce_groups(data, match_column, conflict):
+    """Collapse all rows sharing a key into one row per key.
+    
+    KEEP_LONGER takes, per column, the longest value of each group;
+    MERGE_VALUES joins the distinct values of each group in order of
+    appearance. Groups are found by factorizing the match column once and
+    reduced with NumPy sorts, so there is no Python call per group.
+    """
+    data = data.reset_index(drop=True)
+    # Codes number the keys in order of first appearance
+    codes, uniques = pd.factorize(data[match_column], use_na_sentinel=False)
+    group_count = len(uniques)
+    first_rows = np.flatnonzero(~data[match_column].duplicated(keep='first').to_numpy())
+    result = data.iloc[first_rows].reset_index(drop=True)
+
+    for column in data.columns:
+        if column == match_column:
+            continue
+        if conflict == KEEP_LONGER:
+            result[column] = longest_per_group(data[column], codes)
+        elif conflict == MERGE_VALUES:
+            result[column] = join_per_group(data[column], codes, group_count)
+        else:
+            raise ValueError(f"Unbekannte Konfliktauflösung: {conflict}")
+    return result
+
+
+def longest_per_group(values, codes):
+    """Return the first of the longest values of every group."""
+    lengths = value_lengths(values).to_numpy()
+    # Stable sort by group, longest first; the first row of each group wins
+    order = np.lexsort((-lengths, codes))
+    sorted_codes = codes[order]
+    group_starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    return values.iloc[order[group_starts]].reset_index(drop=True)
+
+
+def join_per_group(values, codes, group_count):
+    """Return the distinct values of every group joined by MERGE_SEPARATOR."""
+    present = np.flatnonzero(values.notna().to_numpy())
+    pairs = pd.DataFrame({'code': codes[present], 'value': values.iloc[present].astype(str).to_numpy()},
+                         index=present).drop_duplicates()
+    pair_codes = pairs['code'].to_numpy()
+    counts = np.bincount(pair_codes, minlength=group_count)
+    single = counts[pair_codes] == 1
+
+    joined = np.full(group_count, np.nan, dtype=object)
+    # Groups with a single distinct value keep it with its original type
+    joined[pair_codes[single]] = values.to_numpy()[pairs.index[single]]
+
+    multiple_codes = pair_codes[~single]
+    if len(multiple_codes):
+        multiple_values = pairs['value'].to_numpy(dtype=object)[~single]
+        # Number the values of each group in order of appearance
+        order = np.argsort(multiple_codes, kind='stable')
+        multiple_codes, multiple_values = multiple_codes[order], multiple_values[order]
+        starts = np.r_[True, multiple_codes[1:] != multiple_codes[:-1]]
+        start_positions = np.maximum.accumulate(np.where(starts, np.arange(len(starts)), 0))
+        ranks = np.arange(len(starts)) - start_positions
+
+        # Append the n-th value of every group in one array operation per rank
+        group_codes = multiple_codes[starts]
+        merged = multiple_values[starts].copy()
+        by_rank = np.lexsort((multiple_codes, ranks))
+        rank_bounds = np.searchsorted(ranks[by_rank], np.arange(1, ranks.max() + 2))
+        for begin, end in zip(rank_bounds[:-1], rank_bounds[1:]):
+            rows = by_rank[begin:end]
+            positions = np.searchsorted(group_codes, multiple_codes[rows])
+            merged[positions] = merged[positions] + MERGE_SEPARATOR + multiple_values[rows]
+        joined[group_codes] = merged
+    return pd.Series(joined).infer_objects()
+
+
+def resolve_conflict(old, new, conflict):
+    """Combine two aligned Series of competing values cell by cell."""
+    if conflict == KEEP_FIRST:
+        return old.where(old.notna(), new)
+    if conflict == KEEP_LAST:
+        return new.where(new.notna(), old)
+    if conflict == KEEP_LONGER:
+        take_new = new.notna() & (value_lengths(new) > value_lengths(old))
+        return old.where(~take_new, new)
+    if conflict == MERGE_VALUES:
+        both = old.notna() & new.notna() & (old.astype(str) != new.astype(str))
+        result = new.where(new.notna(), old).astype(object)
+        if both.any():
+            result[both] = [
+                o if f"{MERGE_SEPARATOR}{n}{MERGE_SEPARATOR}" in f"{MERGE_SEPARATOR}{o}{MERGE_SEPARATOR}"
+                else f"{o}{MERGE_SEPARATOR}{n}"
+                for o, n in zip(old[both].astype(str), new[both].astype(str))
+            ]
+        return result
+    raise ValueError(f"Unbekannte Konfliktauflösung: {conflict}")
+
+
+def value_lengths(values):
+    """Length of the string form of every value, 0 for missing values."""
+    return values.astype(str).str.len().where(values.notna(), 0)
+
+
+def set_values(column, mask, values):
+    """Return a copy of column with values written where mask is set.
+
+    The dtype is kept when the values fit, otherwise the column is widened.
+    """
+    result = column.copy()
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", FutureWarning)
+            result[mask] = values
+    except (TypeError, ValueError, FutureWarning):
+        result = column.astype(object)
+        result[mask] = values
+        result = result.infer_objects()
+    return result
+
+
+class KeySketch:
+    """K-minimum-values sketch estimating the number of distinct keys.
+    
+    Only the k smallest 64-bit hashes of the keys are kept, so a sketch of
+    any number of rows stays small, and sketches of several files can be
+    combined to estimate the size of their union or intersection.
+    """
+
+    def __init__(self, k=4096):
+        self.k = k
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def add(self, keys):
+        """Add a Series or DataFrame of keys, compared by their text form."""
+        hashes = pd.util.hash_pandas_object(keys.astype(str), index=False).to_numpy()
+        self.hashes = np.unique(np.concatenate([self.hashes, hashes]))[:self.k]
+
+    def merge(self, other):
+        self.hashes = np.unique(np.concatenate([self.hashes, other.hashes]))[:self.k]
+
+    def estimate(self):
+        if len(self.hashes) < self.k:
+            return len(self.hashes)  # Every distinct key is still in the sketch
+        return int((self.k - 1) / (float(self.hashes[-1]) / 2.0 ** 64))
+
+
+def union_sketch(sketches):
+    """Sketch of the union of the keys of several sketches."""
+    union = KeySketch(min(sketch.k for sketch in sketches))
+    for sketch in sketches:
+        union.merge(sketch)
+    return union
+
+
+def estimate_common_keys(sketches):
+    """Estimate the number of keys occurring in all sketched inputs."""
+    union = union_sketch(sketches)
+    if not len(union.hashes):
+        return 0
+    # A key among the union's smallest hashes that occurs in an input
+    # is necessarily also among that input's smallest hashes
+    in_all = np.ones(len(union.hashes), dtype=bool)
+    for sketch in sketches:
+        in_all &= np.isin(union.hashes, sketch.hashes)
+    return int(union.estimate() * in_all.mean())
+
+
+def estimate_merged_rows(sketches, row_counts, strategy):
+    """Estimate the row count of a merge from key sketches of its inputs.
+    
+    sketches is None when the strategy does not match rows by key, in which
+    case every input row ends up in the result.
+    """
+    if sketches is None:
+        return sum(row_counts)
+    if strategy == INTERSECTION:
+        return estimate_common_keys(sketches)
+    if strategy == UPDATE:
+        # Rows of the base file are kept, rows of later files only with new keys
+        rows = row_counts[0]
+        for i in range(1, len(sketches)):
+            known = union_sketch(sketches[:i])
+            keys = max(sketches[i].estimate(), 1)
+            new_share = 1 - min(estimate_common_keys([known, sketches[i]]) / keys, 1)
+            rows += int(row_counts[i] * new_share)
+        return rows
+    return union_sketch(sketches).estimate()
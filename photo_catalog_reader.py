@@ -3,43 +3,292 @@
 
 import sys
 import os
+from bisect import bisect_right
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QLabel, QPushButton, QFileDialog, 
                             QTableView, QStatusBar, QAction, QMenu, QMessageBox,
-                            QTabWidget, QSplitter)
-from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+                            QTabWidget, QSplitter, QProgressBar, QLineEdit, QShortcut)
+from PyQt5.QtCore import Qt, QAbstractItemModel, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, QTimer, pyqtSignal
 from PyQt5.QtGui import QIcon, QKeySequence, QFont
 
+# Import from parent directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import Config
+from catalog_cache import DialectCache, SidecarCache, StatisticsCache
+from csv_loader import CSVLoaderThread, resolve_dialect
+from row_index import CSVRowIndex, RowIndexModel, RowIndexThread
+from search_index import SearchIndexThread
+from advanced_search import CustomProxyModel
+from column_stats import ColumnProfileWidget, StatisticsThread, statistics_to_dict
+from table_sort import ascending_order, composite_order, descending_order, sort_key
+
+class CategoricalColumn:
+    """Indexable view of a categorical column that looks values up by their codes.
+    
+    Indexing a pandas Categorical costs microseconds per cell, while this
+    view costs two NumPy lookups and keeps the memory savings of the codes.
+    """
+    
+    def __init__(self, values):
+        self.codes = values.cat.codes.to_numpy()
+        # Code -1 marks a missing value and picks the trailing NaN
+        self.categories = np.append(values.cat.categories.to_numpy(dtype=object), np.nan)
+
+    def __getitem__(self, row):
+        return self.categories[self.codes[row]]
+
+
+def column_array(values):
+    """Return a column as an array that is cheap to index cell by cell."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return CategoricalColumn(values)
+    if values.dtype.kind == 'M':
+        # Dates without a time of day are shown without one
+        present = values.dropna()
+        unit = 'D' if (present == present.dt.normalize()).all() else 's'
+        return values.to_numpy().astype(f"datetime64[{unit}]")
+    return values.to_numpy()
+
+
 class PandasModel(QAbstractTableModel):
-    """Model for displaying pandas DataFrame in a QTableView."""
+    """Model for displaying pandas DataFrame in a QTableView.
     
-    def __init__(self, data):
+    Every column is extracted once into a contiguous NumPy array, so data()
+    never goes through the DataFrame indexing machinery. Display strings are
+    only produced for cells the view actually paints and are kept in a
+    bounded LRU cache, which keeps scrolling smooth on very large catalogs.
+    
+    Sorting keeps the DataFrame as it is and only permutes the rows of the
+    view. The permutation of every sorted column is cached until the column
+    is edited, so sorting by it again, in either direction, is immediate.
+    Sorting by several columns caches the composite permutation until one
+    of its columns is edited.
+    """
+    data_edited = pyqtSignal(int, int)  # DataFrame row, column
+    
+    def __init__(self, data, cache_size=20000):
         super().__init__()
-        self._data = data
+        self._headers = [str(column) for column in data.columns]
+        self._display_cache = OrderedDict()
+        self._cache_size = cache_size
+        self._order = None  # DataFrame row of every view row, None while unsorted
+        self._positions = None  # view row of every DataFrame row
+        self._sort_keys = {}  # column -> sort key of its values
+        self._sort_orders = {}  # column -> ascending permutation and number of present values
+        self._composite_orders = OrderedDict()  # ((column, order), ...) -> permutation
+        self._composite_size = 8
+        self._sort_columns = []  # (column, order) pairs of the current sort
+        self._editable = True  # False while chunks of a file are still streaming in
+        self._set_frames([data])
+
+    def _set_frames(self, frames):
+        """Extract the column arrays of every loaded chunk."""
+        self._frames = frames
+        self._chunks = [[column_array(frame.iloc[:, i]) for i in range(frame.shape[1])]
+                        for frame in frames]
+        self._chunk_starts = []
+        self._row_count = 0
+        for frame in frames:
+            self._chunk_starts.append(self._row_count)
+            self._row_count += len(frame)
+        self._display_cache.clear()
+
+    def _locate(self, row):
+        """Return the chunk index and the row offset within that chunk."""
+        if len(self._chunks) == 1:
+            return 0, row
+        chunk = bisect_right(self._chunk_starts, row) - 1
+        return chunk, row - self._chunk_starts[chunk]
+
+    def append_data(self, data):
+        """Append rows of a streamed chunk without resetting the view."""
+        if data.empty:
+            return
+        first = self._row_count
+        self.beginInsertRows(QModelIndex(), first, first + len(data) - 1)
+        self._frames.append(data)
+        self._chunks.append([column_array(data.iloc[:, i]) for i in range(data.shape[1])])
+        self._chunk_starts.append(first)
+        self._row_count += len(data)
+        self._clear_sort_cache()
+        if self._order is not None:
+            # Rows streamed in after a sort are shown at the end until the next sort
+            appended = np.arange(first, self._row_count)
+            self._order = np.concatenate((self._order, appended))
+            self._positions = np.concatenate((self._positions, appended))
+        self.endInsertRows()
+
+    def set_dataframe(self, data):
+        """Replace the chunked storage by the complete DataFrame of the same rows."""
+        self._set_frames([data])
+        self._clear_sort_cache()
+        self._editable = True
+        self.dataChanged.emit(self.index(0, 0),
+                              self.index(self.rowCount() - 1, self.columnCount() - 1))
+
+    def set_editable(self, editable):
+        """Allow or forbid editing cells, e.g. while the rest of the file is loading."""
+        self._editable = editable
+
+    def dataframe(self):
+        """Return all rows of the model as a single DataFrame."""
+        if len(self._frames) > 1:
+            self._set_frames([pd.concat(self._frames)])
+        return self._frames[0]
+
+    def frame_rows(self, rows):
+        """Map rows of the view to rows of the DataFrame."""
+        rows = np.asarray(rows, dtype=np.intp)
+        return rows if self._order is None else self._order[rows]
+
+    def view_rows(self, rows):
+        """Map rows of the DataFrame to rows of the view."""
+        rows = np.asarray(rows, dtype=np.intp)
+        return rows if self._positions is None else self._positions[rows]
+
+    def _clear_sort_cache(self, column=None):
+        """Forget the sort keys and permutations of a column, or of all columns."""
+        if column is None:
+            self._sort_keys.clear()
+            self._sort_orders.clear()
+            self._composite_orders.clear()
+            return
+        self._sort_keys.pop(column, None)
+        self._sort_orders.pop(column, None)
+        for columns in [columns for columns in self._composite_orders
+                        if any(sorted_column == column for sorted_column, _ in columns)]:
+            del self._composite_orders[columns]
+
+    def _sort_key(self, column):
+        key = self._sort_keys.get(column)
+        if key is None:
+            key = self._sort_keys[column] = sort_key(self.dataframe().iloc[:, column])
+        return key
+
+    def sort_columns(self):
+        """Return the (column, order) pairs the view is sorted by, the first one deciding first."""
+        return list(self._sort_columns)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Sort the view by a column with a stable argsort of its typed values."""
+        self.sort_by([(column, order)])
+
+    def sort_by(self, columns):
+        """Sort the view by several columns with np.lexsort, the first one deciding first."""
+        columns = tuple((column, order) for column, order in columns if 0 <= column < len(self._headers))
+        if not columns or not self._row_count:
+            return
+        if len(columns) == 1:
+            column, order = columns[0]
+            cached = self._sort_orders.get(column)
+            if cached is None:
+                cached = self._sort_orders[column] = ascending_order(self._sort_key(column))
+            rows = cached[0] if order == Qt.AscendingOrder else descending_order(*cached)
+        else:
+            rows = self._composite_orders.get(columns)
+            if rows is None:
+                rows = composite_order([self._sort_key(column) for column, _ in columns],
+                                       [order == Qt.DescendingOrder for _, order in columns])
+                self._composite_orders[columns] = rows
+                if len(self._composite_orders) > self._composite_size:
+                    self._composite_orders.popitem(last=False)
+            else:
+                self._composite_orders.move_to_end(columns)
+        self._sort_columns = list(columns)
+        self.set_row_order(rows)
+
+    def set_row_order(self, rows):
+        """Show the DataFrame rows in the given order, keeping selections on their rows."""
+        self.layoutAboutToBeChanged.emit([], QAbstractItemModel.VerticalSortHint)
+        previous = self.persistentIndexList()
+        frame_rows = self.frame_rows([index.row() for index in previous])
+        self._order = rows
+        self._positions = np.empty_like(rows)
+        self._positions[rows] = np.arange(len(rows))
+        view_rows = self.view_rows(frame_rows)
+        self.changePersistentIndexList(previous, [self.index(int(row), index.column())
+                                                  for row, index in zip(view_rows, previous)])
+        self.layoutChanged.emit([], QAbstractItemModel.VerticalSortHint)
 
     def rowCount(self, parent=QModelIndex()):
-        return self._data.shape[0]
+        return self._row_count
 
     def columnCount(self, parent=QModelIndex()):
-        return self._data.shape[1]
+        return len(self._headers)
 
     def data(self, index, role=Qt.DisplayRole):
-        if not index.isValid():
+        if role not in (Qt.DisplayRole, Qt.EditRole) or not index.isValid():
             return None
             
-        if role == Qt.DisplayRole:
-            value = self._data.iloc[index.row(), index.column()]
-            return str(value)
-            
-        return None
+        row, column = index.row(), index.column()
+        if self._order is not None:
+            row = int(self._order[row])
+        key = row * len(self._headers) + column
+        cache = self._display_cache
+        text = cache.get(key)
+        if text is None:
+            chunk, offset = self._locate(row)
+            text = str(self._chunks[chunk][column][offset])
+            cache[key] = text
+            if len(cache) > self._cache_size:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return text
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if not self._editable:
+            return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.EditRole):
+        """Write an edited cell back to the DataFrame, keeping the column's dtype if possible."""
+        if role != Qt.EditRole or not index.isValid() or not self._editable or len(self._frames) > 1:
+            return False  # Rows can only be edited once the whole file is loaded
+        frame = self._frames[0]
+        row, column = index.row(), index.column()
+        if self._order is not None:
+            row = int(self._order[row])
+        values = frame.iloc[:, column]
+        try:
+            if value == "":
+                value = np.nan
+            elif values.dtype.kind in 'iuf':
+                value = pd.to_numeric(value)
+            elif values.dtype.kind == 'M':
+                value = pd.to_datetime(value)
+        except ValueError:
+            return False
+        if isinstance(values.dtype, pd.CategoricalDtype) and not pd.isna(value) and value not in values.cat.categories:
+            frame.isetitem(column, values.cat.add_categories([value]))
+        try:
+            frame.iat[row, column] = value
+        except (TypeError, ValueError):
+            # The value does not fit the dtype, e.g. a missing value in an integer column
+            values = frame.iloc[:, column].astype(object)
+            values.iat[row] = value
+            frame.isetitem(column, values.infer_objects())
+        self._chunks[0][column] = column_array(frame.iloc[:, column])
+        self._clear_sort_cache(column)
+        self._display_cache.pop(row * len(self._headers) + column, None)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        self.data_edited.emit(row, column)
+        return True
 
     def headerData(self, section, orientation, role=Qt.DisplayRole):
         if role == Qt.DisplayRole:
-            if orientation == Qt.Horizontal:
-                return str(self._data.columns[section])
-            if orientation == Qt.Vertical:
-                return str(self._data.index[section])
+            if orientation == Qt.Horizontal and section < len(self._headers):
+                return self._headers[section]
+            if orientation == Qt.Vertical and section < self._row_count:
+                if self._order is not None:
+                    section = int(self._order[section])
+                chunk, offset = self._locate(section)
+                return str(self._frames[chunk].index[offset])
         return None
 
 
@@ -50,6 +299,22 @@ class MainWindow(QMainWindow):
         # Variables to store current data
         self.current_file = None
         self.current_data = None
+        self.loader_thread = None
+        self.rows_shown = 0
+        self.previous_catalog = (None, "Foto-Katalog Verwaltung")  # file and title shown before a load
+        self.row_index = None
+        self.search_index = None
+        self.index_thread = None
+        self.search_proxy = None
+        self.pending_index_rows = set()  # rows edited while the search index is built
+        self.column_statistics = {}  # ColumnStatistics by column name
+        self.statistics_thread = None
+        self.stale_statistics = set()  # columns edited while the statistics are computed
+        
+        self.config = Config()
+        self.dialect_cache = DialectCache(self.config.config_dir)
+        self.sidecar_cache = SidecarCache(self.config.config_dir)
+        self.statistics_cache = StatisticsCache(self.config.config_dir)
         
         self.setWindowTitle("Foto-Katalog Verwaltung")
         self.setGeometry(100, 100, 1200, 800)
@@ -59,6 +324,11 @@ class MainWindow(QMainWindow):
         self.setStatusBar(self.statusBar)
         self.statusBar.showMessage("Bereit")
         
+        self.load_progress = QProgressBar()
+        self.load_progress.setMaximumWidth(200)
+        self.load_progress.setVisible(False)
+        self.statusBar.addPermanentWidget(self.load_progress)
+        
         # Create main widget and layout
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
@@ -67,6 +337,9 @@ class MainWindow(QMainWindow):
         # Create toolbar with buttons
         self.create_toolbar()
         
+        # Create quick search bar, hidden until Ctrl+F
+        self.create_search_bar()
+        
         # Create menu bar
         self.create_menu_bar()
         
@@ -90,10 +363,48 @@ class MainWindow(QMainWindow):
         self.save_button.setEnabled(False)
         toolbar_layout.addWidget(self.save_button)
         
+        self.cancel_load_button = QPushButton("Laden abbrechen")
+        self.cancel_load_button.clicked.connect(self.cancel_loading)
+        self.cancel_load_button.setVisible(False)
+        toolbar_layout.addWidget(self.cancel_load_button)
+        
         toolbar_layout.addStretch()
         
         self.main_layout.addWidget(toolbar_widget)
 
+    def create_search_bar(self):
+        self.search_bar = QWidget()
+        search_layout = QHBoxLayout(self.search_bar)
+        search_layout.setContentsMargins(0, 0, 0, 0)
+        
+        search_layout.addWidget(QLabel("Suchen:"))
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Wortanfänge in allen Textspalten ...")
+        self.search_edit.setClearButtonEnabled(True)
+        search_layout.addWidget(self.search_edit)
+        
+        # Filter once typing pauses instead of on every key stroke
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.apply_quick_search)
+        self.search_edit.textChanged.connect(self.search_timer.start)
+        self.search_edit.returnPressed.connect(self.apply_quick_search)
+        
+        self.search_result_label = QLabel()
+        search_layout.addWidget(self.search_result_label)
+        
+        close_button = QPushButton("Schließen")
+        close_button.clicked.connect(self.close_quick_search)
+        search_layout.addWidget(close_button)
+        
+        escape_shortcut = QShortcut(QKeySequence(Qt.Key_Escape), self.search_edit)
+        escape_shortcut.setContext(Qt.WidgetShortcut)
+        escape_shortcut.activated.connect(self.close_quick_search)
+        
+        self.search_bar.setVisible(False)
+        self.main_layout.addWidget(self.search_bar)
+
     def create_menu_bar(self):
         menu_bar = self.menuBar()
         
@@ -105,6 +416,11 @@ class MainWindow(QMainWindow):
         open_action.triggered.connect(self.open_file)
         file_menu.addAction(open_action)
         
+        open_indexed_action = QAction("Große Datei &durchsuchen...", self)
+        open_indexed_action.setShortcut("Ctrl+Shift+O")
+        open_indexed_action.triggered.connect(self.open_file_indexed)
+        file_menu.addAction(open_indexed_action)
+        
         save_action = QAction("&Speichern", self)
         save_action.setShortcut(QKeySequence.Save)
         save_action.triggered.connect(self.save_file)
@@ -124,6 +440,11 @@ class MainWindow(QMainWindow):
         
         # Placeholder for other menus to be added by enhancements
         self.tools_menu = menu_bar.addMenu("&Werkzeuge")
+        
+        find_action = QAction("&Suchen...", self)
+        find_action.setShortcut(QKeySequence.Find)
+        find_action.triggered.connect(self.show_quick_search)
+        self.tools_menu.addAction(find_action)
         self.help_menu = menu_bar.addMenu("&Hilfe")
         
         about_action = QAction("Ü&ber", self)
@@ -136,29 +457,61 @@ class MainWindow(QMainWindow):
         
         # Table view for the catalog data
         self.table_view = QTableView()
-        self.table_view.setSortingEnabled(True)
-        self.table_view.horizontalHeader().setStretchLastSection(True)
+        # Header clicks sort through on_header_clicked, which also sorts by several columns;
+        # like QTableView does while sorting is enabled, they no longer select the column
+        header = self.table_view.horizontalHeader()
+        header.sectionPressed.disconnect(self.table_view.selectColumn)
+        header.sectionEntered.disconnect()
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.sectionClicked.connect(self.on_header_clicked)
+        header.setStretchLastSection(True)
         self.splitter.addWidget(self.table_view)
         
         # Add preview placeholder (to be used for image preview)
+        self.side_tabs = QTabWidget()
         self.preview_widget = QWidget()
         preview_layout = QVBoxLayout(self.preview_widget)
         preview_layout.addWidget(QLabel("Vorschau"))
         self.preview_image = QLabel("Kein Bild ausgewählt")
         self.preview_image.setAlignment(Qt.AlignCenter)
         preview_layout.addWidget(self.preview_image)
-        self.splitter.addWidget(self.preview_widget)
+        self.side_tabs.addTab(self.preview_widget, "Vorschau")
+        
+        # Column profile, filled once the statistics of a catalog are ready
+        self.profile_widget = ColumnProfileWidget()
+        self.side_tabs.addTab(self.profile_widget, "Spaltenprofil")
+        self.splitter.addWidget(self.side_tabs)
         
         # Set initial sizes
         self.splitter.setSizes([700, 500])
         
         self.main_layout.addWidget(self.splitter)
         
+    def table_model(self):
+        """Return the model holding the catalog, even while a search filters the view."""
+        model = self.table_view.model()
+        return model.sourceModel() if isinstance(model, CustomProxyModel) else model
+
+    def filter_proxy(self):
+        """Return the search proxy of the shown catalog and show the table through it."""
+        model = self.table_model()
+        if self.search_proxy is None or self.search_proxy.sourceModel() is not model:
+            self.search_proxy = CustomProxyModel(self)
+            self.search_proxy.setSourceModel(model)
+            self.search_proxy.set_search_index(self.search_index)
+            self.search_proxy.set_statistics(self.column_statistics)
+        if self.table_view.model() is not self.search_proxy:
+            self.table_view.setModel(self.search_proxy)
+        return self.search_proxy
+
     def update_table_view(self, data):
         """Update the table view with new data."""
         self.current_data = data
         model = PandasModel(data)
+        model.data_edited.connect(self.on_data_edited)
         self.table_view.setModel(model)
+        self.table_view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
         
         # Update status bar with row/column count
         if not data.empty:
@@ -168,6 +521,34 @@ class MainWindow(QMainWindow):
             self.statusBar.showMessage("Keine Daten geladen")
             self.save_button.setEnabled(False)
 
+    def on_header_clicked(self, column):
+        """Sort by the clicked column; with Shift, add it to the sort columns or flip its order."""
+        model = self.table_model()
+        if not isinstance(model, PandasModel):
+            return
+        columns = model.sort_columns()
+        orders = dict(columns)
+        if QApplication.keyboardModifiers() & Qt.ShiftModifier and columns:
+            if column in orders:
+                flipped = Qt.DescendingOrder if orders[column] == Qt.AscendingOrder else Qt.AscendingOrder
+                columns = [(c, flipped if c == column else order) for c, order in columns]
+            else:
+                columns.append((column, Qt.AscendingOrder))
+        elif columns == [(column, Qt.AscendingOrder)]:
+            columns = [(column, Qt.DescendingOrder)]
+        else:
+            columns = [(column, Qt.AscendingOrder)]
+        
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            model.sort_by(columns)
+        finally:
+            QApplication.restoreOverrideCursor()
+        self.table_view.horizontalHeader().setSortIndicator(column, dict(columns)[column])
+        arrows = {Qt.AscendingOrder: "↑", Qt.DescendingOrder: "↓"}
+        self.statusBar.showMessage("Sortiert nach " + ", ".join(
+            f"{model.headerData(c, Qt.Horizontal)} {arrows[order]}" for c, order in columns))
+
     def open_file(self):
         """Open a CSV file."""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -175,15 +556,304 @@ class MainWindow(QMainWindow):
         )
         
         if file_path:
-            try:
-                # Try to detect encoding and separator
-                data = pd.read_csv(file_path, sep=None, engine='python')
-                self.current_file = file_path
-                self.update_table_view(data)
-                self.setWindowTitle(f"Foto-Katalog Verwaltung - {os.path.basename(file_path)}")
-                self.statusBar.showMessage(f"Datei geöffnet: {file_path}")
-            except Exception as e:
-                QMessageBox.critical(self, "Fehler beim Öffnen", f"Die Datei konnte nicht geladen werden: {str(e)}")
+            self.load_file(file_path)
+
+    def stop_loading(self):
+        """Stop a running load and release a memory-mapped file."""
+        if self.loader_thread is not None and self.loader_thread.isRunning():
+            self.loader_thread.cancel()
+            self.loader_thread.wait()
+        self.stop_search_index()
+        self.stop_column_statistics()
+        self.close_quick_search()
+        if self.row_index is not None:
+            self.update_table_view(pd.DataFrame())
+            self.row_index.close()
+            self.row_index = None
+
+    def load_file(self, file_path):
+        """Load a CSV file in the background, showing rows as they arrive."""
+        self.stop_loading()
+            
+        # Shown again if the load ends before the first chunk of the new file arrives
+        if self.current_data is not None and not self.current_data.empty:
+            self.previous_catalog = (self.current_file, self.windowTitle())
+        else:
+            self.previous_catalog = (None, "Foto-Katalog Verwaltung")
+        self.current_file = file_path
+        self.setWindowTitle(f"Foto-Katalog Verwaltung - {os.path.basename(file_path)}")
+        
+        self.loader_thread = CSVLoaderThread(file_path, self.dialect_cache, self.sidecar_cache,
+                                             categories=self.config.load_categories())
+        self.loader_thread.chunk_loaded.connect(self.on_chunk_loaded)
+        self.loader_thread.progress_updated.connect(self.on_load_progress)
+        self.loader_thread.data_loaded.connect(self.on_data_loaded)
+        self.loader_thread.load_finished.connect(self.on_load_finished)
+        
+        self.rows_shown = 0
+        self.load_progress.setValue(0)
+        self.load_progress.setVisible(True)
+        self.cancel_load_button.setVisible(True)
+        self.statusBar.showMessage(f"Lade {file_path} ...")
+        self.loader_thread.start()
+
+    def open_file_indexed(self):
+        """Open a CSV file too large for memory in read-only mode."""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Große CSV-Datei durchsuchen", "", "CSV-Dateien (*.csv);;Alle Dateien (*)"
+        )
+        
+        if file_path:
+            self.load_file_indexed(file_path)
+
+    def load_file_indexed(self, file_path):
+        """Memory-map a CSV file and index its rows instead of loading it."""
+        self.stop_loading()
+        
+        try:
+            dialect = resolve_dialect(file_path, self.dialect_cache)
+            self.row_index = CSVRowIndex(file_path, dialect)
+        except Exception as e:
+            QMessageBox.critical(self, "Fehler beim Öffnen", f"Die Datei konnte nicht geöffnet werden: {str(e)}")
+            return
+            
+        # Rows are only read on demand, so there is no DataFrame to save or export
+        self.current_file = None
+        self.current_data = None
+        self.save_button.setEnabled(False)
+        self.setWindowTitle(f"Foto-Katalog Verwaltung - {os.path.basename(file_path)} (schreibgeschützt)")
+        
+        model = RowIndexModel(self.row_index)
+        self.table_view.setModel(model)
+        
+        self.loader_thread = RowIndexThread(self.row_index)
+        self.loader_thread.rows_indexed.connect(model.rows_indexed)
+        self.loader_thread.progress_updated.connect(self.on_index_progress)
+        self.loader_thread.index_finished.connect(self.on_index_finished)
+        
+        self.load_progress.setValue(0)
+        self.load_progress.setVisible(True)
+        self.cancel_load_button.setVisible(True)
+        self.statusBar.showMessage(f"Indiziere {file_path} ...")
+        self.loader_thread.start()
+
+    def on_index_progress(self, value):
+        self.load_progress.setValue(value)
+        self.load_progress.setFormat(f"{value}% - {self.loader_thread.rows_loaded} Zeilen")
+
+    def on_index_finished(self, success, message):
+        if self.sender() is not self.loader_thread:
+            return
+        self.load_progress.setVisible(False)
+        self.cancel_load_button.setVisible(False)
+        
+        rows = self.table_view.model().rowCount()
+        if success or self.loader_thread.is_cancelled():
+            self.statusBar.showMessage(f"{message} - {rows} Zeilen, nur die sichtbaren werden gelesen")
+        else:
+            self.statusBar.showMessage("Fehler beim Indizieren")
+            QMessageBox.critical(self, "Fehler beim Öffnen", message)
+
+    def cancel_loading(self):
+        """Stop the running background load."""
+        if self.loader_thread is not None:
+            self.loader_thread.cancel()
+
+    def on_chunk_loaded(self, chunk):
+        """Show the first chunk immediately and append the following ones."""
+        if self.sender() is not self.loader_thread:
+            return  # Chunk of a load that was replaced in the meantime
+        if self.rows_shown == 0:
+            self.update_table_view(chunk)
+            # Editing, saving and exporting must wait until the whole file is loaded,
+            # as the complete DataFrame replaces the streamed chunks
+            self.table_model().set_editable(False)
+            self.current_data = None
+            self.save_button.setEnabled(False)
+        else:
+            self.table_model().append_data(chunk)
+        self.rows_shown += len(chunk)
+
+    def on_load_progress(self, value):
+        self.load_progress.setValue(value)
+        self.load_progress.setFormat(f"{value}% - {self.rows_shown} Zeilen")
+
+    def on_data_loaded(self, data):
+        """Swap the streamed chunks for the complete DataFrame."""
+        if self.sender() is not self.loader_thread:
+            return
+        self.current_data = data
+        model = self.table_model()
+        if isinstance(model, PandasModel) and model.rowCount() == len(data):
+            model.set_dataframe(data)
+        else:
+            self.update_table_view(data)
+
+    def on_load_finished(self, success, message):
+        if self.sender() is not self.loader_thread:
+            return
+        self.load_progress.setVisible(False)
+        self.cancel_load_button.setVisible(False)
+        
+        if success:
+            self.save_button.setEnabled(not self.current_data.empty)
+            self.statusBar.showMessage(f"{message} - {self.memory_message(self.loader_thread)}")
+            self.start_search_index()
+            self.start_column_statistics()
+            return
+            
+        if self.rows_shown == 0:
+            # Nothing of the new file is shown, so the previous catalog stays
+            self.current_file, title = self.previous_catalog
+            self.setWindowTitle(title)
+            self.start_search_index()
+            self.start_column_statistics()
+            if self.loader_thread.is_cancelled():
+                self.statusBar.showMessage(message)
+            else:
+                self.statusBar.showMessage("Fehler beim Öffnen")
+                QMessageBox.critical(self, "Fehler beim Öffnen", message)
+            return
+            
+        # Never let a partially loaded file overwrite the original on save
+        self.current_file = None
+        model = self.table_model()
+        if isinstance(model, PandasModel):
+            self.current_data = model.dataframe()
+            model.set_editable(True)
+            self.save_button.setEnabled(not self.current_data.empty)
+            self.start_search_index()
+            self.start_column_statistics()
+            
+        if self.loader_thread.is_cancelled():
+            self.statusBar.showMessage(f"{message} - {len(self.current_data)} Zeilen geladen")
+        else:
+            self.statusBar.showMessage("Fehler beim Öffnen")
+            QMessageBox.critical(self, "Fehler beim Öffnen", message)
+
+    def start_search_index(self):
+        """Build the full-text index of the loaded catalog in the background."""
+        self.stop_search_index()
+        if self.current_data is None or self.current_data.empty:
+            return
+        self.index_thread = SearchIndexThread(self.current_data)
+        self.index_thread.index_ready.connect(self.on_search_index_ready)
+        self.index_thread.start()
+
+    def stop_search_index(self):
+        if self.index_thread is not None and self.index_thread.isRunning():
+            self.index_thread.cancel()
+            self.index_thread.wait()
+        self.index_thread = None
+        self.search_index = None
+        self.pending_index_rows.clear()
+
+    def on_search_index_ready(self, index):
+        if self.sender() is not self.index_thread:
+            return  # Index of a catalog that was replaced in the meantime
+        if self.pending_index_rows:
+            index.update_rows(self.current_data, sorted(self.pending_index_rows))
+            self.pending_index_rows.clear()
+        self.search_index = index
+        if self.search_proxy is not None:
+            self.search_proxy.set_search_index(index)
+        self.apply_quick_search()
+
+    def on_data_edited(self, row, column):
+        """Keep the search index in step with edited cells."""
+        if self.search_index is not None:
+            self.search_index.update_rows(self.current_data, [row])
+        elif self.index_thread is not None:
+            self.pending_index_rows.add(row)
+        # The statistics of the column no longer hold; the others stay valid.
+        # The name comes from the model, as current_data is None while a file is streaming
+        name = str(self.table_model().headerData(column, Qt.Horizontal))
+        if self.statistics_thread is not None:
+            self.stale_statistics.add(name)
+        if self.column_statistics.pop(name, None) is not None:
+            self.show_column_statistics()
+
+    def start_column_statistics(self):
+        """Compute the column statistics of the loaded catalog in the background, or load them from the cache."""
+        self.stop_column_statistics()
+        if self.current_data is None or self.current_data.empty:
+            return
+        # Statistics of a partly loaded file are not cached
+        self.statistics_thread = StatisticsThread(self.current_data, self.current_file, self.statistics_cache)
+        self.statistics_thread.statistics_ready.connect(self.on_column_statistics_ready)
+        self.statistics_thread.start()
+        self.show_column_statistics()
+
+    def stop_column_statistics(self):
+        if self.statistics_thread is not None and self.statistics_thread.isRunning():
+            self.statistics_thread.cancel()
+            self.statistics_thread.wait()
+        self.statistics_thread = None
+        self.column_statistics = {}
+        self.stale_statistics.clear()
+        if self.search_proxy is not None:
+            self.search_proxy.set_statistics({})
+        self.show_column_statistics()
+
+    def on_column_statistics_ready(self, statistics):
+        if self.sender() is not self.statistics_thread:
+            return  # Statistics of a catalog that was replaced in the meantime
+        thread = self.statistics_thread
+        self.statistics_thread = None
+        if statistics and not self.stale_statistics and not thread.from_cache and thread.file_path:
+            self.statistics_cache.store(thread.file_path, statistics_to_dict(statistics))
+        for column in self.stale_statistics:
+            statistics.pop(column, None)
+        self.stale_statistics.clear()
+        self.column_statistics = statistics
+        if self.search_proxy is not None:
+            self.search_proxy.set_statistics(statistics)
+        self.show_column_statistics()
+
+    def show_column_statistics(self):
+        columns = [] if self.current_data is None else self.current_data.columns
+        self.profile_widget.set_statistics(columns, self.column_statistics,
+                                           computing=self.statistics_thread is not None)
+
+    def show_quick_search(self):
+        """Show the quick search bar and focus it."""
+        self.search_bar.setVisible(True)
+        self.search_edit.setFocus()
+        self.search_edit.selectAll()
+
+    def close_quick_search(self):
+        self.search_edit.clear()
+        self.search_timer.stop()
+        self.quick_search("")
+        self.search_bar.setVisible(False)
+
+    def apply_quick_search(self):
+        self.quick_search(self.search_edit.text())
+
+    def quick_search(self, text):
+        """Filter the table to the rows containing all words of the quick search."""
+        self.search_timer.stop()
+        if self.current_data is None or not isinstance(self.table_model(), PandasModel):
+            self.search_result_label.setText("Datei wird noch geladen" if text.strip() else "")
+            return
+        if not text.strip() and not isinstance(self.table_view.model(), CustomProxyModel):
+            self.search_result_label.setText("")
+            return
+        proxy = self.filter_proxy()
+        proxy.set_quick_search(text)
+        if not proxy.is_filtered():
+            self.table_view.setModel(proxy.sourceModel())
+            self.search_result_label.setText("")
+            return
+        hint = "" if self.search_index is not None else " (ohne Index, dieser wird noch erstellt)"
+        self.search_result_label.setText(f"{proxy.rowCount()} Treffer{hint}")
+
+    def memory_message(self, loader):
+        """Describe the memory used by the loaded catalog for the status bar."""
+        after = f"{loader.memory_after / 1024 ** 2:.1f} MB"
+        if loader.memory_before is None:
+            return f"Speicher: {after}"
+        return f"Speicher: {loader.memory_before / 1024 ** 2:.1f} MB → {after}"
 
     def save_file(self):
         """Save current data to the current file."""
@@ -31,6 +31,13 @@ except ImportError:
     HAS_PIL = False
 
 
+def format_value(value):
+    """Text of a cell for exports; parsed dates without a time of day are shown as plain dates."""
+    if isinstance(value, pd.Timestamp) and value == value.normalize():
+        return value.strftime("%Y-%m-%d")
+    return value
+
+
 class ExportThread(QThread):
     """Thread to handle export operations without freezing the UI."""
     progress_updated = pyqtSignal(int)
@@ -119,7 +126,7 @@ class ExportThread(QThread):
             for _, row in self.data.iterrows():
                 html_content += '            <tr>\n'
                 for col in self.data.columns:
-                    cell_value = row[col]
+                    cell_value = format_value(row[col])
                     if include_images and col == 'image_path':
                         cell_value = f'<img src="{cell_value}" style="max-width: 100px; max-height: 100px;">'
                     html_content += f'                <td>{cell_value}</td>\n'
@@ -164,7 +171,7 @@ class ExportThread(QThread):
         for _, row in self.data.iterrows():
             row_data = []
             for col in self.data.columns:
-                cell_value = row[col]
+                cell_value = format_value(row[col])
                 if include_images and col == 'image_path':
                     if os.path.exists(cell_value):
                         img = PILImage.open(cell_value)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import csv
+import mmap
+import os
+from array import array
+from collections import OrderedDict
+import numpy as np
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QThread, pyqtSignal
+
+
+def choose_stride(file_path, max_index_bytes=256 * 1024 * 1024, sample_size=1024 * 1024):
+    """Pick how many lines share one index entry so the index stays small.
+
+    Every stride-th line start is stored; the lines in between are found by
+    scanning forward from the nearest indexed line when they are requested.
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_size)
+    lines = max(sample.count(b'\n'), 1)
+    estimated_lines = size * lines // max(len(sample), 1)
+    stride = 1
+    while estimated_lines // stride * 8 > max_index_bytes:
+        stride *= 2
+    return stride
+
+
+class CSVRowIndex:
+    """Memory-mapped CSV file with a compact index of line start offsets.
+
+    Rows are parsed only when they are requested, so files larger than the
+    available memory can be browsed. Quoted fields containing line breaks
+    are not supported, as each line is treated as one record.
+    """
+
+    def __init__(self, file_path, dialect, stride=None):
+        self.file_path = file_path
+        self.dialect = dialect
+        self.stride = stride or choose_stride(file_path)
+        self.offsets = array('Q')  # start of every stride-th data line
+        self.row_count = 0
+        self.complete = False
+
+        self._file = open(file_path, 'rb')
+        self._size = os.path.getsize(file_path)
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._size else b''
+
+        header_end = self._find_line_end(0)
+        self.columns = self._parse_line(0, header_end) if self._size else []
+        self._data_start = min(header_end + 1, self._size)
+
+    def close(self):
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        self._file.close()
+
+    def _find_line_end(self, start):
+        end = self._mmap.find(b'\n', start) if self._size else -1
+        return self._size if end < 0 else end
+
+    def _parse_line(self, start, end):
+        line = self._mmap[start:end].decode(self.dialect['encoding'], errors='replace').rstrip('\r')
+        if start == 0:
+            line = line.lstrip('\ufeff')
+        for record in csv.reader([line], delimiter=self.dialect['sep'],
+                                 quotechar=self.dialect['quotechar']):
+            return record
+        return []
+
+    def build(self, block_size=16 * 1024 * 1024, progress=None, is_cancelled=None):
+        """Scan the file for line breaks, extending the index block by block."""
+        position = self._data_start
+        while position < self._size:
+            if is_cancelled is not None and is_cancelled():
+                return False
+            count = min(block_size, self._size - position)
+            block = np.frombuffer(self._mmap, dtype=np.uint8, count=count, offset=position)
+            # Every line break except the very last byte starts a new line
+            starts = np.flatnonzero(block == 10).astype(np.uint64) + np.uint64(position + 1)
+            if position == self._data_start:
+                starts = np.concatenate([np.array([position], dtype=np.uint64), starts])
+            if len(starts) and starts[-1] >= self._size:
+                starts = starts[:-1]
+
+            line_numbers = np.arange(self.row_count, self.row_count + len(starts))
+            self.offsets.frombytes(starts[line_numbers % self.stride == 0].tobytes())
+            self.row_count += len(starts)
+            position += count
+
+            if progress is not None:
+                progress(position * 100 // self._size, self.row_count)
+        self.complete = True
+        return True
+
+    def row(self, row):
+        """Parse and return the fields of one data row."""
+        start = self.offsets[row // self.stride]
+        for _ in range(row % self.stride):
+            start = self._find_line_end(start) + 1
+        return self._parse_line(start, self._find_line_end(start))
+
+
+class RowIndexThread(QThread):
+    """Thread to build a CSVRowIndex without freezing the UI."""
+    progress_updated = pyqtSignal(int)
+    rows_indexed = pyqtSignal(int)
+    index_finished = pyqtSignal(bool, str)  # success, message
+
+    def __init__(self, row_index):
+        super().__init__()
+        self.row_index = row_index
+        self.rows_loaded = 0
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        try:
+            finished = self.row_index.build(progress=self.report_progress, is_cancelled=self.is_cancelled)
+            if finished:
+                self.index_finished.emit(True, f"Datei indiziert: {self.row_index.file_path}")
+            else:
+                self.index_finished.emit(False, "Indizierung abgebrochen")
+        except Exception as e:
+            self.index_finished.emit(False, f"Die Datei konnte nicht indiziert werden: {str(e)}")
+
+    def report_progress(self, percent, rows):
+        self.rows_loaded = rows
+        self.progress_updated.emit(percent)
+        self.rows_indexed.emit(rows)
+
+
+class RowIndexModel(QAbstractTableModel):
+    """Model that parses only the rows of a CSVRowIndex the view requests."""
+
+    def __init__(self, row_index, cache_rows=5000):
+        super().__init__()
+        self._index = row_index
+        self._row_count = 0
+        self._row_cache = OrderedDict()
+        self._cache_rows = cache_rows
+
+    def rows_indexed(self, count):
+        """Make rows found by the index builder visible."""
+        if count > self._row_count:
+            self.beginInsertRows(QModelIndex(), self._row_count, count - 1)
+            self._row_count = count
+            self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self._index.columns)
+
+    def row_values(self, row):
+        cache = self._row_cache
+        values = cache.get(row)
+        if values is None:
+            values = self._index.row(row)
+            cache[row] = values
+            if len(cache) > self._cache_rows:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(row)
+        return values
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        values = self.row_values(index.row())
+        column = index.column()
+        return values[column] if column < len(values) else ""
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            if orientation == Qt.Horizontal:
+                return self._index.columns[section]
+            if orientation == Qt.Vertical:
+                return str(section)
+        return None
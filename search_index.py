@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import time
+from bisect import bisect_left
+import numpy as np
+import pandas as pd
+from PyQt5.QtCore import QThread, pyqtSignal
+
+# Optional import - pyarrow splits a whole column into words in one call
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+TOKEN_PATTERN = re.compile(r"\w+")
+# The same words for pyarrow's RE2 engine, whose \w only covers ASCII
+ARROW_SEPARATOR_PATTERN = r"[^\pL\pN_]+"
+
+# Appended to a prefix to find the end of its range in a sorted vocabulary
+PREFIX_END = "\U0010ffff"
+
+
+def tokenize(text):
+    """Split a text into lower-case words."""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def is_text_column(values):
+    """Columns holding free text or categories are indexed, numbers and dates are not."""
+    return isinstance(values.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(values.dtype)
+
+
+def distinct_values(values):
+    """Return the codes of every row and the distinct values of a column; missing values get code -1."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    return pd.factorize(values)
+
+
+def word_mask(values, words):
+    """Rows in which every word starts a word of the value, found without an index.
+
+    Every distinct value is tokenized once, so columns with repeated values
+    are scanned quickly; this is used while the index is still being built.
+    """
+    codes, uniques = distinct_values(values)
+    matches = np.ones(len(uniques), dtype=bool)
+    for i, value in enumerate(uniques):
+        tokens = tokenize(value)
+        matches[i] = all(any(token.startswith(word) for token in tokens) for word in words)
+    return np.append(matches, False)[codes]
+
+
+def tokenize_values(values):
+    """Split distinct values into words.
+    
+    Returns the position of the value and the number of the word for every
+    word of every value, each word counted once per value, and the sorted
+    list of distinct words the numbers refer to.
+    """
+    if HAS_PYARROW:
+        lists = pc.split_pattern_regex(pc.utf8_lower(pa.array(values, type=pa.large_string())),
+                                       ARROW_SEPARATOR_PATTERN)
+        words = pc.list_flatten(lists)
+        # Separators at the start or end of a value leave empty words
+        keep = pc.not_equal(words, "")
+        positions = pc.filter(pc.list_parent_indices(lists), keep).to_numpy().astype(np.int64)
+        encoded = pc.dictionary_encode(pc.filter(words, keep))
+        word_codes = encoded.indices.to_numpy().astype(np.int64)
+        distinct = encoded.dictionary.to_numpy(zero_copy_only=False)
+    else:
+        positions, words = [], []
+        for i, value in enumerate(values):
+            tokens = tokenize(value)
+            positions.extend([i] * len(tokens))
+            words.extend(tokens)
+        positions = np.asarray(positions, dtype=np.int64)
+        word_codes, distinct = pd.factorize(np.asarray(words, dtype=object))
+    
+    # Renumber the words in sorted order, so a prefix maps to a range of numbers
+    order = np.argsort(np.asarray(distinct, dtype=object))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    # Drop words repeated within a value; sorting beats np.unique's hashing on large inputs
+    pairs = np.sort(positions * max(len(order), 1) + rank[word_codes])
+    pairs = pairs[np.concatenate([[True], pairs[1:] != pairs[:-1]])] if len(pairs) else pairs
+    return pairs // max(len(order), 1), pairs % max(len(order), 1), [distinct[i] for i in order]
+
+
+class ColumnPostings:
+    """Sorted vocabulary of one column with the rows of every word.
+
+    The rows of all words are stored back to back in one array, so the
+    rows of all words sharing a prefix form one contiguous slice.
+    """
+
+    def __init__(self, values):
+        codes, uniques = distinct_values(values)
+        pair_values, pair_words, self.words = tokenize_values(np.asarray(uniques, dtype=object))
+
+        # Expand every (word, distinct value) pair to the rows holding that value
+        present = np.flatnonzero(codes >= 0)
+        value_rows = present[np.argsort(codes[present], kind='stable')]
+        value_counts = np.bincount(codes[present], minlength=len(uniques))
+        value_starts = np.concatenate([[0], np.cumsum(value_counts)])
+        pair_counts = value_counts[pair_values]
+        pair_offsets = np.concatenate([[0], np.cumsum(pair_counts)])
+        within = np.arange(pair_offsets[-1]) - np.repeat(pair_offsets[:-1], pair_counts)
+        entry_rows = value_rows[np.repeat(value_starts[pair_values], pair_counts) + within]
+        entry_words = np.repeat(pair_words, pair_counts)
+
+        # One sort of combined keys orders the entries by word, then by row
+        keys = np.sort(entry_words * max(len(values), 1) + entry_rows)
+        self.rows = (keys % max(len(values), 1)).astype(np.int32 if len(values) < 2 ** 31 else np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(entry_words, minlength=len(self.words)))])
+
+    def prefix_rows(self, prefix):
+        """Rows holding a word that starts with prefix, unsorted and possibly repeated."""
+        lower = bisect_left(self.words, prefix)
+        upper = bisect_left(self.words, prefix + PREFIX_END)
+        return self.rows[self.offsets[lower]:self.offsets[upper]]
+
+    def prefix_count(self, prefix):
+        """Number of postings of the words starting with prefix, at least its number of rows."""
+        return int(self.offsets[bisect_left(self.words, prefix + PREFIX_END)] - self.offsets[bisect_left(self.words, prefix)])
+
+    def size(self):
+        """Approximate memory used by the postings in bytes."""
+        return self.rows.nbytes + self.offsets.nbytes + sum(len(word) + 50 for word in self.words)
+
+
+def trigram_codes(texts, start=0):
+    """Return the positions and codes of all trigrams of a list of strings.
+    
+    The strings are laid out as a fixed-width UTF-32 matrix, so the three
+    characters of every window are combined into one int64 code at once.
+    """
+    chars = np.array(texts, dtype=str)
+    width = chars.dtype.itemsize // 4
+    if width < 3:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    matrix = chars.view(np.uint32).reshape(len(texts), width).astype(np.int64)
+    # Code points need 21 bits, so three of them fit into 63
+    codes = (matrix[:, :-2] << 42) | (matrix[:, 1:-1] << 21) | matrix[:, 2:]
+    valid = matrix[:, 2:] != 0  # windows reaching into the padding of shorter strings
+    positions = np.broadcast_to(np.arange(start, start + len(texts))[:, None], codes.shape)
+    return positions[valid], codes[valid]
+
+
+class SubstringIndex:
+    """Trigram and reversed-string index of the distinct values of one text column.
+    
+    "enthält" looks up the trigrams of the search value and only checks
+    the distinct values holding all of them; "endet mit" finds the values
+    in a sorted list of reversed values by binary search. Either way the
+    cost depends on the number of matching values, not on the size of the
+    catalog, and the matching rows are picked through the value codes.
+    Values entered by edits are kept in a short list that is always checked.
+    """
+    
+    def __init__(self, values, batch_cells=2 ** 21):
+        started = time.perf_counter()
+        codes, uniques = distinct_values(values)
+        self.codes = np.array(codes, dtype=np.int64)
+        self.values = pd.Series(np.asarray(uniques, dtype=object), dtype=str)
+        self.lowered = self.values.str.lower()
+        self.added_values = []  # values entered by edits, numbered after the indexed ones
+        
+        # Values are batched by length, so the padded matrices stay small
+        lengths = self.lowered.str.len().to_numpy(dtype=np.int64)
+        by_length = np.argsort(lengths, kind='stable')
+        sorted_lengths = lengths[by_length]
+        positions, trigrams = [], []
+        first = 0
+        while first < len(by_length):
+            # The longest value of a batch sets the width of its matrix
+            end = min(len(by_length), first + max(1, batch_cells // max(sorted_lengths[first], 1)))
+            while end - first > 1 and sorted_lengths[end - 1] * (end - first) > batch_cells:
+                end = first + (end - first) // 2
+            batch = by_length[first:end]
+            batch_positions, batch_trigrams = trigram_codes(self.lowered.iloc[batch].tolist())
+            positions.append(batch[batch_positions])
+            trigrams.append(batch_trigrams)
+            first = end
+        positions = np.concatenate(positions) if positions else np.empty(0, dtype=np.int64)
+        trigrams = np.concatenate(trigrams) if trigrams else np.empty(0, dtype=np.int64)
+        
+        # Number the distinct trigrams in sorted order, so one sort of combined
+        # keys groups the values by trigram and drops repeats within a value
+        trigram_ids, distinct = pd.factorize(trigrams)
+        order = np.argsort(distinct)
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        value_count = max(len(self.values), 1)
+        keys = np.sort(rank[trigram_ids] * value_count + positions)
+        keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])[:len(keys)]]
+        self.trigrams = distinct[order]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(keys // value_count, minlength=len(order)))])
+        self.value_ids = (keys % value_count).astype(np.int32 if value_count < 2 ** 31 else np.int64)
+        
+        reversed_values = self.lowered.str[::-1]
+        self.suffix_order = reversed_values.argsort().to_numpy()
+        self.suffix_keys = reversed_values.iloc[self.suffix_order].array
+        self.build_seconds = time.perf_counter() - started
+        
+    def update_rows(self, data, column, rows):
+        """Point edited rows to their new values, which are always checked on search."""
+        if len(data) > len(self.codes):
+            self.codes = np.concatenate([self.codes, np.full(len(data) - len(self.codes), -1, dtype=np.int64)])
+        for row in rows:
+            value = data[column].iat[row]
+            if pd.isna(value):
+                self.codes[row] = -1
+            else:
+                self.added_values.append(str(value))
+                self.codes[row] = len(self.values) + len(self.added_values) - 1
+                
+    def contains_candidates(self, needle):
+        """Indexed values that may contain the lower-case needle."""
+        if len(needle) < 3:
+            return np.arange(len(self.values))  # too short for a trigram
+        _, codes = trigram_codes([needle])
+        codes = np.unique(codes)
+        lower = np.searchsorted(self.trigrams, codes)
+        if ((lower == len(self.trigrams)) | (self.trigrams[np.minimum(lower, len(self.trigrams) - 1)] != codes)).any():
+            return np.empty(0, dtype=np.int64)
+        lists = sorted((self.value_ids[self.offsets[i]:self.offsets[i + 1]] for i in lower), key=len)
+        ids = lists[0]
+        for other in lists[1:]:
+            ids = np.intersect1d(ids, other, assume_unique=True)
+        return ids
+        
+    def suffix_candidates(self, needle):
+        """Indexed values that end with the lower-case needle."""
+        key = needle[::-1]
+        lower = bisect_left(self.suffix_keys, key)
+        upper = bisect_left(self.suffix_keys, key + PREFIX_END)
+        return self.suffix_order[lower:upper]
+        
+    def mask(self, operator, value, case_sensitive):
+        """Rows whose value contains ('contains') or ends with ('ends_with') value."""
+        needle = value.lower()
+        if operator == 'contains':
+            candidates = self.contains_candidates(needle)
+            test = (lambda text: value in text) if case_sensitive else (lambda text: needle in text.lower())
+        elif operator == 'ends_with':
+            candidates = self.suffix_candidates(needle)
+            test = (lambda text: text.endswith(value)) if case_sensitive else (lambda text: text.lower().endswith(needle))
+        else:
+            raise ValueError(f"Unbekannte Bedingung: {operator}")
+            
+        # Candidates only share the trigrams or the case-insensitive suffix, so they are checked
+        texts = self.values if case_sensitive else self.lowered
+        texts = texts.iloc[candidates]
+        target = value if case_sensitive else needle
+        found = texts.str.contains(target, regex=False) if operator == 'contains' else texts.str.endswith(target)
+        # The last entry stands for missing values
+        matches = np.zeros(len(self.values) + len(self.added_values) + 1, dtype=bool)
+        matches[candidates[found.to_numpy(dtype=bool, na_value=False)]] = True
+        matches[len(self.values):-1] = [test(text) for text in self.added_values]
+        return matches[self.codes]
+        
+    def size(self):
+        """Approximate memory used by the index in bytes."""
+        strings = self.values.memory_usage(deep=True) + self.lowered.memory_usage(deep=True) * 2
+        return int(self.trigrams.nbytes + self.offsets.nbytes + self.value_ids.nbytes
+                   + self.suffix_order.nbytes + self.codes.nbytes + strings)
+
+
+class TokenIndex:
+    """Inverted index of the words in the text columns of a catalog.
+
+    Words are looked up by prefix in a sorted vocabulary, and the rows of a
+    query are collected in a boolean mask, so a query costs one pass over
+    the rows of its words instead of a scan of every value. Edited rows are
+    kept in a small overlay until the next rebuild; their old words are
+    masked out of the postings.
+    
+    Substring indexes are optional, as they take several times the memory
+    of the column, and are added per column on request.
+    """
+
+    def __init__(self):
+        self.columns = {}
+        self.row_count = 0
+        self.changed = np.zeros(0, dtype=bool)  # rows whose postings are out of date
+        self.overlay = {}  # column -> {row: words} for changed rows
+        self.substrings = {}  # column -> SubstringIndex
+
+    def build(self, data, is_cancelled=None):
+        """Index every text column of a DataFrame; return False if cancelled."""
+        columns = {}
+        for column in data.columns:
+            if is_cancelled is not None and is_cancelled():
+                return False
+            if is_text_column(data[column]):
+                columns[str(column)] = ColumnPostings(data[column])
+        self.columns = columns
+        self.row_count = len(data)
+        self.changed = np.zeros(self.row_count, dtype=bool)
+        self.overlay = {column: {} for column in columns}
+        return True
+
+    def update_rows(self, data, rows):
+        """Re-index rows after they were edited or appended."""
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(data) > self.row_count:
+            self.changed = np.concatenate([self.changed, np.zeros(len(data) - self.row_count, dtype=bool)])
+            self.row_count = len(data)
+        self.changed[rows] = True
+        for column, overlay in self.overlay.items():
+            values = data[column]
+            for row in rows.tolist():
+                value = values.iat[row]
+                overlay[row] = set() if pd.isna(value) else set(tokenize(value))
+        for column, substrings in self.substrings.items():
+            substrings.update_rows(data, column, rows.tolist())
+
+    def add_substring_index(self, data, column):
+        """Build the substring index of a text column unless it exists; return it."""
+        if column not in self.substrings:
+            self.substrings[column] = SubstringIndex(data[column])
+        return self.substrings[column]
+
+    def word_mask(self, column, word):
+        """Boolean mask of the rows of a column holding a word that starts with word."""
+        mask = np.zeros(self.row_count, dtype=bool)
+        mask[self.columns[column].prefix_rows(word)] = True
+        if self.changed.any():
+            mask &= ~self.changed
+            for row, tokens in self.overlay[column].items():
+                if any(token.startswith(word) for token in tokens):
+                    mask[row] = True
+        return mask
+
+    def search(self, query, columns=None):
+        """Rows in which every word of the query starts a word in one of the columns."""
+        columns = [column for column in (columns or self.columns) if column in self.columns]
+        words = tokenize(query)
+        if not words or not columns:
+            return np.arange(self.row_count) if not words else np.zeros(0, dtype=np.int64)
+        result = None
+        for word in words:
+            found = np.zeros(self.row_count, dtype=bool)
+            for column in columns:
+                found |= self.word_mask(column, word)
+            result = found if result is None else result & found
+        return np.flatnonzero(result)
+
+    def size(self):
+        """Approximate memory used by the index in bytes."""
+        return sum(postings.size() for postings in self.columns.values())
+
+
+def find_rows(data, query, columns=None, index=None):
+    """Rows in which every word of the query starts a word in one of the columns.
+    
+    The index answers the query when it covers the columns; otherwise the
+    text columns are scanned.
+    """
+    if columns is None:
+        columns = [str(column) for column in data.columns if is_text_column(data[column])]
+    if index is not None and index.row_count == len(data) and all(column in index.columns for column in columns):
+        return index.search(query, columns)
+    result = np.ones(len(data), dtype=bool)
+    for word in tokenize(query):
+        found = np.zeros(len(data), dtype=bool)
+        for column in columns:
+            found |= word_mask(data[column], [word])
+        result &= found
+    return np.flatnonzero(result)
+
+
+class SearchIndexThread(QThread):
+    """Thread to build a TokenIndex without freezing the UI."""
+    index_ready = pyqtSignal(object)  # TokenIndex
+
+    def __init__(self, data):
+        super().__init__()
+        self.data = data
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        index = TokenIndex()
+        try:
+            if index.build(self.data, is_cancelled=self.is_cancelled):
+                self.index_ready.emit(index)
+        except Exception as e:
+            print(f"Error building search index: {e}")